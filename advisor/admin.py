@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AdvisorAssignment, ChatMessage, PlanComment
+from .models import AdvisorAssignment, ChatMessage, Conversation, Meeting, MeetingSlot, PlanComment
 
 
 @admin.register(AdvisorAssignment)
@@ -10,12 +10,20 @@ class AdvisorAssignmentAdmin(admin.ModelAdmin):
     raw_id_fields = ('student', 'advisor')
 
 
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ('student', 'advisor', 'plan', 'student_unread', 'advisor_unread', 'last_message_at')
+    list_filter = ('last_message_at',)
+    search_fields = ('student__username', 'advisor__username')
+    raw_id_fields = ('student', 'advisor', 'plan')
+
+
 @admin.register(ChatMessage)
 class ChatMessageAdmin(admin.ModelAdmin):
     list_display = ('sender', 'recipient', 'is_read', 'sent_at')
     list_filter = ('is_read', 'sent_at')
     search_fields = ('sender__username', 'recipient__username', 'message')
-    raw_id_fields = ('sender', 'recipient', 'plan')
+    raw_id_fields = ('conversation', 'sender', 'recipient', 'plan')
 
 
 @admin.register(PlanComment)
@@ -25,3 +33,19 @@ class PlanCommentAdmin(admin.ModelAdmin):
     search_fields = ('plan__student__username', 'advisor__username', 'comment')
     raw_id_fields = ('plan', 'advisor')
 
+
+
+@admin.register(MeetingSlot)
+class MeetingSlotAdmin(admin.ModelAdmin):
+    list_display = ('advisor', 'starts_at', 'ends_at', 'location')
+    list_filter = ('starts_at',)
+    search_fields = ('advisor__username', 'location')
+    raw_id_fields = ('advisor',)
+
+
+@admin.register(Meeting)
+class MeetingAdmin(admin.ModelAdmin):
+    list_display = ('student', 'advisor', 'starts_at', 'status', 'next_reminder_at')
+    list_filter = ('status', 'starts_at')
+    search_fields = ('student__username', 'advisor__username')
+    raw_id_fields = ('slot', 'student', 'advisor', 'cancelled_by')
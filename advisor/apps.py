@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AdvisorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'advisor'
+
+    def ready(self):
+        # Import outbox handlers to ensure they're registered
+        from . import handlers  # noqa: F401
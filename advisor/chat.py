@@ -0,0 +1,126 @@
+"""
+Chat conversations, history and read receipts.
+
+Every message belongs to a ``Conversation`` between a student and their
+advisor, optionally about one of the student's plans. History is read as
+keyset pages of the ``(conversation, sent_at, id)`` index, so a page costs
+the same however long the conversation is.
+
+Each conversation keeps how many messages each side has not read. Saving
+messages adds to the recipients' counters and reading subtracts the rows
+actually marked, in the same transaction, so the inbox never counts.
+A read receipt covers everything up to a time: one ``UPDATE`` of that
+range of the index marks it read, however many messages it holds.
+"""
+import logging
+from collections import Counter
+from typing import Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import AdvisorAssignment, ChatMessage, Conversation
+
+logger = logging.getLogger(__name__)
+
+
+def chat_group(conversation_id) -> str:
+    """Channel layer group of a conversation's open connections."""
+    return f'chat_{int(conversation_id)}'
+
+
+def conversation_for(student, advisor, plan=None) -> Tuple[Optional[Conversation], bool, str]:
+    """
+    The conversation between ``student`` and ``advisor`` (about ``plan``,
+    if given), started if there is none yet.
+
+    Returns ``(conversation, created, '')``, or ``(None, False, error)``
+    when they have no active assignment or the plan is not the student's.
+    """
+    if plan is not None and plan.student_id != student.pk:
+        return None, False, 'This plan belongs to another student'
+
+    with transaction.atomic():
+        # Locking the assignment serializes two parties starting the same conversation
+        assignment = AdvisorAssignment.objects.select_for_update().filter(
+            student=student, advisor=advisor, is_active=True
+        ).first()
+        if assignment is None:
+            return None, False, 'You are not assigned to each other'
+
+        conversation = Conversation.objects.filter(
+            student=student, advisor=advisor, plan=plan
+        ).order_by('id').first()
+        if conversation is not None:
+            return conversation, False, ''
+        return Conversation.objects.create(student=student, advisor=advisor, plan=plan), True, ''
+
+
+def save_messages(messages):
+    """
+    Save ``messages`` with one ``bulk_create`` and add them to their
+    conversations' unread counters and last message times.
+    """
+    if not messages:
+        return
+    received, latest = {}, {}
+    for message in messages:
+        received.setdefault(message.conversation_id, Counter())[message.recipient_id] += 1
+        latest[message.conversation_id] = max(latest.get(message.conversation_id, message.sent_at), message.sent_at)
+
+    with transaction.atomic():
+        ChatMessage.objects.bulk_create(messages)
+        students = Conversation.objects.filter(id__in=latest).order_by().values_list('id', 'student_id')
+        # In id order, so concurrent savers lock the rows in the same order
+        for conversation_id, student_id in sorted(students):
+            counts = received[conversation_id]
+            student_unread = counts[student_id]
+            advisor_unread = sum(counts.values()) - student_unread
+            Conversation.objects.filter(pk=conversation_id).update(
+                student_unread=F('student_unread') + student_unread,
+                advisor_unread=F('advisor_unread') + advisor_unread,
+                last_message_at=Greatest(F('last_message_at'), latest[conversation_id]),
+            )
+
+
+def mark_read(conversation, reader_id, up_to=None) -> int:
+    """
+    Mark the messages ``reader_id`` received in ``conversation`` up to
+    ``up_to`` (default: now) read.
+
+    One ``UPDATE`` covers the whole range, the reader's counter drops by
+    the number of rows it changed and the conversation's open connections
+    are told. Returns that number.
+    """
+    up_to = up_to or timezone.now()
+    field = conversation.unread_field(reader_id)
+    with transaction.atomic():
+        updated = ChatMessage.objects.filter(
+            conversation=conversation, recipient_id=reader_id, is_read=False, sent_at__lte=up_to
+        ).update(is_read=True, read_at=timezone.now())
+        if updated:
+            Conversation.objects.filter(pk=conversation.pk).update(
+                **{field: Greatest(F(field) - updated, 0)}
+            )
+            publish_read(conversation.pk, reader_id, up_to)
+    return updated
+
+
+def publish_read(conversation_id, reader_id, up_to):
+    """Tell the conversation's open connections what ``reader_id`` has read, after commit."""
+    event = {'type': 'chat_read', 'reader_id': reader_id, 'up_to': up_to.isoformat()}
+    transaction.on_commit(lambda: _send(conversation_id, event))
+
+
+def _send(conversation_id, event):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(chat_group(conversation_id), event)
+    except Exception:
+        logger.warning('Could not send a read receipt to conversation %s', conversation_id, exc_info=True)
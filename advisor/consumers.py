@@ -1,79 +1,292 @@
+"""
+WebSocket chat between a student and their advisor.
+
+A room is one ``Conversation`` (see ``advisor.chat``), joined at
+``ws/chat/<conversation_id>/``. Only its student and advisor may join, and
+only while their assignment is active. The sender is always the connected
+user, and the other participant is looked up once at connect, so relaying
+a message needs no queries.
+
+Messages are broadcast to the room at once and saved write-behind: each
+event loop keeps one ``MessageBuffer`` for all its connections, which
+saves whatever has accumulated with a single ``bulk_create`` every
+``CHAT_FLUSH_INTERVAL`` seconds, or as soon as ``CHAT_FLUSH_SIZE``
+messages are waiting. A busy loop therefore makes one database call per
+interval instead of one per message, and never more than one at a time
+on the thread-sensitive executor.
+
+Read receipts (``{"action": "read", "up_to": ...}``) are debounced the same
+way: a connection marks everything up to the latest time it was sent at
+most once every ``CHAT_READ_DELAY`` seconds, with one ``UPDATE``.
+"""
+import asyncio
 import json
-from channels.generic.websocket import AsyncWebsocketConsumer
+import logging
+import weakref
+
 from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# Close code for connections to a room the user does not belong to
+FORBIDDEN = 4403
+
+
+class MessageBuffer:
+    """Chat messages waiting to be saved by one ``bulk_create``."""
+
+    def __init__(self):
+        self.messages = []
+        self.flush_task = None
+        self.failures = 0
+
+    def add(self, message):
+        self.messages.append(message)
+        if len(self.messages) >= getattr(settings, 'CHAT_FLUSH_SIZE', 500):
+            self._schedule(0)
+        elif self.flush_task is None:
+            self._schedule(getattr(settings, 'CHAT_FLUSH_INTERVAL', 0.05))
+
+    def _schedule(self, delay):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+        self.flush_task = asyncio.ensure_future(self._flush_after(delay))
+
+    async def _flush_after(self, delay):
+        await asyncio.sleep(delay)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Save every waiting message now."""
+        batch, self.messages = self.messages, []
+        if not batch:
+            return
+        try:
+            await database_sync_to_async(_save_messages)(batch)
+        except Exception:
+            # One bad conversation, such as one deleted meanwhile, must not
+            # hold back the other rooms' messages
+            batch = await database_sync_to_async(_save_by_conversation)(batch)
+        else:
+            batch = []
+
+        if not batch:
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.failures > getattr(settings, 'CHAT_FLUSH_RETRIES', 3):
+            logger.error('Dropping %d chat messages that could not be saved', len(batch))
+            self.failures = 0
+            return
+        logger.warning('Could not save %d chat messages; retrying', len(batch))
+        # Ahead of anything that arrived meanwhile, keeping their order
+        self.messages[:0] = batch
+        if self.flush_task is None:
+            self._schedule(getattr(settings, 'CHAT_FLUSH_INTERVAL', 0.05))
+
+
+def _save_messages(messages):
+    from .chat import save_messages
+
+    save_messages(messages)
+
+
+def _save_by_conversation(messages):
+    """Save ``messages`` one conversation at a time; returns those that could not be saved."""
+    conversations = {}
+    for message in messages:
+        conversations.setdefault(message.conversation_id, []).append(message)
+
+    failed = []
+    for conversation_id, group in conversations.items():
+        try:
+            _save_messages(group)
+        except Exception:
+            logger.warning(
+                'Could not save %d chat messages for conversation %s', len(group), conversation_id, exc_info=True
+            )
+            failed.extend(group)
+    return failed
+
+
+_buffers = weakref.WeakKeyDictionary()
+
+
+def message_buffer() -> MessageBuffer:
+    """The buffer shared by the connections on the running event loop."""
+    loop = asyncio.get_running_loop()
+    buffer = _buffers.get(loop)
+    if buffer is None:
+        buffer = _buffers[loop] = MessageBuffer()
+    return buffer
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
     """WebSocket consumer for real-time chat between students and advisors."""
-    
+
     async def connect(self):
-        self.room_name = self.scope['url_route']['kwargs']['room_name']
-        self.room_group_name = f'chat_{self.room_name}'
-        
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        self.conversation_id = int(self.scope['url_route']['kwargs']['conversation_id'])
+        participants = await self.get_participants(user.pk)
+        if participants is None:
+            await self.close(code=FORBIDDEN)
+            return
+
+        from .chat import chat_group
+
+        self.student_id, advisor_id, self.plan_id = participants
+        self.sender_id = user.pk
+        self.recipient_id = advisor_id if user.pk == self.student_id else self.student_id
+        self.room_group_name = chat_group(self.conversation_id)
+        self.read_up_to = None
+        self.read_task = None
+
         # Join room group
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
-        
+
         await self.accept()
-    
+
     async def disconnect(self, close_code):
+        if not hasattr(self, 'room_group_name'):
+            return
         # Leave room group
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
-    
+        # Save this connection's last messages and receipt before it goes away
+        await message_buffer().flush()
+        if self.read_task is not None:
+            self.read_task.cancel()
+            await self.mark_read()
+
     async def receive(self, text_data):
-        """Receive message from WebSocket."""
-        text_data_json = json.loads(text_data)
-        message = text_data_json.get('message', '')
-        sender_id = text_data_json.get('sender_id')
-        recipient_id = text_data_json.get('recipient_id')
-        
-        # Save message to database
-        await self.save_message(sender_id, recipient_id, message)
-        
+        """Receive a message or read receipt from WebSocket."""
+        try:
+            content = json.loads(text_data)
+            message = content.get('message', '')
+        except (ValueError, AttributeError):
+            return
+        if content.get('action') == 'read':
+            self.receive_read(content.get('up_to'))
+            return
+        if not isinstance(message, str) or not message.strip():
+            return
+
+        from .models import ChatMessage
+
+        sent_at = timezone.now()
+        message_buffer().add(ChatMessage(
+            conversation_id=self.conversation_id,
+            sender_id=self.sender_id,
+            recipient_id=self.recipient_id,
+            plan_id=self.plan_id,
+            message=message,
+            sent_at=sent_at
+        ))
+
         # Send message to room group
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 'type': 'chat_message',
                 'message': message,
-                'sender_id': sender_id,
-                'timestamp': timezone.now().isoformat(),
+                'sender_id': self.sender_id,
+                'timestamp': sent_at.isoformat(),
             }
         )
-    
+
+    def receive_read(self, up_to):
+        """Note that the user has read up to ``up_to`` (default: now), marked shortly."""
+        if up_to is None:
+            up_to = timezone.now()
+        else:
+            try:
+                up_to = parse_datetime(up_to)
+            except (TypeError, ValueError):
+                return
+            if up_to is None:
+                return
+        if timezone.is_naive(up_to):
+            up_to = timezone.make_aware(up_to)
+        # Reading never reaches past the present
+        up_to = min(up_to, timezone.now())
+        if self.read_up_to is None or up_to > self.read_up_to:
+            self.read_up_to = up_to
+        if self.read_task is None:
+            self.read_task = asyncio.ensure_future(self._mark_read_after(
+                getattr(settings, 'CHAT_READ_DELAY', 0.5)
+            ))
+
+    async def _mark_read_after(self, delay):
+        await asyncio.sleep(delay)
+        self.read_task = None
+        await self.mark_read()
+
+    async def mark_read(self):
+        """Mark what the user has read so far, after saving the messages it covers."""
+        up_to, self.read_up_to = self.read_up_to, None
+        if up_to is None:
+            return
+        await message_buffer().flush()
+        try:
+            await database_sync_to_async(self._mark_read)(up_to)
+        except Exception:
+            logger.warning('Could not mark conversation %s read', self.conversation_id, exc_info=True)
+
+    def _mark_read(self, up_to):
+        from .chat import mark_read
+        from .models import Conversation
+
+        conversation = Conversation(pk=self.conversation_id, student_id=self.student_id)
+        return mark_read(conversation, self.sender_id, up_to)
+
     async def chat_message(self, event):
         """Receive message from room group."""
         message = event['message']
         sender_id = event['sender_id']
         timestamp = event['timestamp']
-        
+
         # Send message to WebSocket
         await self.send(text_data=json.dumps({
             'message': message,
             'sender_id': sender_id,
             'timestamp': timestamp,
         }))
-    
+
+    async def chat_read(self, event):
+        """Receive a read receipt from room group."""
+        await self.send(text_data=json.dumps({
+            'type': 'read',
+            'reader_id': event['reader_id'],
+            'up_to': event['up_to'],
+        }))
+
     @database_sync_to_async
-    def save_message(self, sender_id, recipient_id, message):
-        """Save chat message to database."""
-        from .models import ChatMessage
-        from authentication.models import User
-        
-        try:
-            sender = User.objects.get(id=sender_id)
-            recipient = User.objects.get(id=recipient_id)
-            
-            ChatMessage.objects.create(
-                sender=sender,
-                recipient=recipient,
-                message=message
-            )
-        except User.DoesNotExist:
-            pass
+    def get_participants(self, user_id):
+        """
+        ``(student_id, advisor_id, plan_id)`` of the conversation if the user
+        takes part in it and its assignment is active, else None.
+        """
+        from .models import AdvisorAssignment, Conversation
+
+        return Conversation.objects.filter(
+            Q(student_id=user_id) | Q(advisor_id=user_id),
+            Exists(AdvisorAssignment.objects.filter(
+                student=OuterRef('student'), advisor=OuterRef('advisor'), is_active=True
+            )),
+            pk=self.conversation_id,
+        ).values_list('student_id', 'advisor_id', 'plan_id').first()
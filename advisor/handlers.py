@@ -0,0 +1,37 @@
+"""
+Outbox handlers telling the other party about meeting bookings and
+cancellations. They may run more than once for the same event.
+"""
+from django.utils import timezone
+
+from infrastructure.outbox import handles
+from notifications.models import Notification
+from .models import Meeting
+
+
+def _notify(recipient, other, meeting, title, verb):
+    start = timezone.localtime(meeting.starts_at)
+    Notification.objects.create(
+        recipient=recipient,
+        notification_type=Notification.Type.GENERAL,
+        title=title,
+        message=f'{other.get_full_name() or other.username} {verb} the meeting on {start:%B %d at %I:%M %p}.',
+        link='',
+        metadata={'meeting_id': meeting.pk},
+    )
+
+
+@handles('meeting.booked')
+def meeting_booked(meeting_id):
+    meeting = Meeting.objects.select_related('student', 'advisor').get(pk=meeting_id)
+    _notify(meeting.advisor, meeting.student, meeting, 'Meeting booked', 'booked')
+
+
+@handles('meeting.cancelled')
+def meeting_cancelled(meeting_id):
+    meeting = Meeting.objects.select_related('student', 'advisor').get(pk=meeting_id)
+    if meeting.cancelled_by_id == meeting.student_id:
+        recipient, other = meeting.advisor, meeting.student
+    else:
+        recipient, other = meeting.student, meeting.advisor
+    _notify(recipient, other, meeting, 'Meeting cancelled', 'cancelled')
@@ -0,0 +1,140 @@
+"""
+Advisor meeting scheduling.
+
+Advisors publish ``MeetingSlot``s and their assigned students book them.
+Overlaps are found with the same half-open interval test the planner uses
+for sections (``planning.utils.check_time_overlap``: ``start1 < end2 and
+start2 < end1``), run as a query over the indexed ``starts_at`` of the
+person's booked meetings, so back-to-back meetings do not conflict.
+
+Each booked meeting keeps the time of its next reminder in
+``next_reminder_at``; see ``advisor.reminders`` for how they are sent.
+"""
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from infrastructure import outbox
+from .models import AdvisorAssignment, Meeting, MeetingSlot
+
+
+def reminder_offsets():
+    """How long before a meeting each reminder is sent, earliest first."""
+    minutes = getattr(settings, 'MEETING_REMINDER_OFFSETS', [1440, 60])
+    return [timedelta(minutes=offset) for offset in sorted(minutes, reverse=True)]
+
+
+def schedule_next_reminder(meeting, sent, now=None):
+    """
+    Point ``meeting`` at its first reminder from offset ``sent`` onward that
+    is still in the future. Reminders whose time has passed (booked late,
+    or sent late) are skipped rather than sent together.
+    """
+    now = now or timezone.now()
+    offsets = reminder_offsets()
+    for index in range(sent, len(offsets)):
+        remind_at = meeting.starts_at - offsets[index]
+        if remind_at > now:
+            meeting.next_reminder_at, meeting.reminders_sent = remind_at, index
+            return
+    meeting.next_reminder_at, meeting.reminders_sent = None, len(offsets)
+
+
+def overlapping(queryset, starts_at, ends_at):
+    """Rows of ``queryset`` overlapping ``[starts_at, ends_at)``."""
+    return queryset.filter(starts_at__lt=ends_at, ends_at__gt=starts_at)
+
+
+def find_conflict(user, starts_at, ends_at) -> Tuple[bool, str]:
+    """Check ``user``'s booked meetings, as student or advisor, against a time."""
+    conflict = overlapping(
+        Meeting.objects.filter(Q(student=user) | Q(advisor=user), status=Meeting.Status.BOOKED),
+        starts_at, ends_at
+    ).order_by('starts_at').first()
+    if conflict is None:
+        return False, ""
+    start, end = timezone.localtime(conflict.starts_at), timezone.localtime(conflict.ends_at)
+    return True, (
+        f"Time conflict with a meeting on {start:%Y-%m-%d} "
+        f"{start:%I:%M %p}-{end:%I:%M %p}"
+    )
+
+
+def bookable_slots(student):
+    """Future slots of ``student``'s active advisors that nobody has booked."""
+    return MeetingSlot.objects.filter(
+        Exists(AdvisorAssignment.objects.filter(
+            advisor=OuterRef('advisor'), student=student, is_active=True
+        )),
+        starts_at__gt=timezone.now(),
+    ).exclude(
+        Exists(Meeting.objects.filter(slot=OuterRef('pk'), status=Meeting.Status.BOOKED))
+    )
+
+
+def create_slot(advisor, starts_at, ends_at, location='') -> Tuple[Optional[MeetingSlot], str]:
+    """Offer a slot, unless it overlaps the advisor's other slots."""
+    if ends_at <= starts_at:
+        return None, 'A slot must end after it starts'
+    if starts_at <= timezone.now():
+        return None, 'Slots must be in the future'
+    if overlapping(MeetingSlot.objects.filter(advisor=advisor), starts_at, ends_at).exists():
+        return None, 'This slot overlaps another of your slots'
+    return MeetingSlot.objects.create(
+        advisor=advisor, starts_at=starts_at, ends_at=ends_at, location=location
+    ), ''
+
+
+def book(student, slot_id, agenda='') -> Tuple[Optional[Meeting], str]:
+    """
+    Book slot ``slot_id`` for ``student``.
+
+    The slot row is locked while checking, so two students racing for it
+    are serialized; the partial unique constraint on booked meetings backs
+    that up. Returns ``(meeting, '')`` or ``(None, error)``.
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            slot = bookable_slots(student).select_for_update().filter(pk=slot_id).first()
+            if slot is None:
+                return None, 'This slot is not available'
+
+            conflict, description = find_conflict(student, slot.starts_at, slot.ends_at)
+            if conflict:
+                return None, description
+
+            meeting = Meeting(
+                slot=slot, student=student, advisor_id=slot.advisor_id,
+                starts_at=slot.starts_at, ends_at=slot.ends_at, agenda=agenda
+            )
+            schedule_next_reminder(meeting, 0, now)
+            meeting.save()
+            outbox.record('meeting.booked', meeting_id=meeting.pk)
+    except IntegrityError:
+        return None, 'This slot is not available'
+    return meeting, ''
+
+
+def cancel(meeting, user) -> Tuple[bool, str]:
+    """Cancel a booked meeting on behalf of either party, freeing its slot."""
+    if meeting.status != Meeting.Status.BOOKED:
+        return False, 'This meeting has already been cancelled'
+    if meeting.starts_at <= timezone.now():
+        return False, 'Meetings that have started cannot be cancelled'
+
+    with transaction.atomic():
+        meeting.status = Meeting.Status.CANCELLED
+        meeting.cancelled_by = user
+        meeting.cancelled_at = timezone.now()
+        # Dropping out of the reminder index stops its reminders
+        meeting.next_reminder_at = None
+        meeting.save(update_fields=[
+            'status', 'cancelled_by', 'cancelled_at', 'next_reminder_at', 'updated_at'
+        ])
+        outbox.record('meeting.cancelled', meeting_id=meeting.pk)
+    return True, ''
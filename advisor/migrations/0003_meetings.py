@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advisor', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeetingSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('location', models.CharField(blank=True, help_text='Office, room or video link', max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('advisor', models.ForeignKey(limit_choices_to={'role': 'ADVISOR'}, on_delete=django.db.models.deletion.CASCADE, related_name='meeting_slots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Meeting Slot',
+                'verbose_name_plural': 'Meeting Slots',
+                'db_table': 'meeting_slots',
+                'ordering': ['starts_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Meeting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('BOOKED', 'Booked'), ('CANCELLED', 'Cancelled')], default='BOOKED', max_length=10)),
+                ('agenda', models.TextField(blank=True, help_text='What the student would like to discuss')),
+                ('next_reminder_at', models.DateTimeField(blank=True, help_text='When the next reminder is due; empty once none are left', null=True)),
+                ('reminders_sent', models.PositiveSmallIntegerField(default=0, help_text='Reminder offsets already sent or skipped')),
+                ('cancelled_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('advisor', models.ForeignKey(limit_choices_to={'role': 'ADVISOR'}, on_delete=django.db.models.deletion.CASCADE, related_name='advised_meetings', to=settings.AUTH_USER_MODEL)),
+                ('cancelled_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('student', models.ForeignKey(limit_choices_to={'role': 'STUDENT'}, on_delete=django.db.models.deletion.CASCADE, related_name='advisor_meetings', to=settings.AUTH_USER_MODEL)),
+                ('slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meetings', to='advisor.meetingslot')),
+            ],
+            options={
+                'verbose_name': 'Meeting',
+                'verbose_name_plural': 'Meetings',
+                'db_table': 'advisor_meetings',
+                'ordering': ['starts_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='meetingslot',
+            index=models.Index(fields=['advisor', 'starts_at'], name='meeting_slo_advisor_deeb9a_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='meetingslot',
+            constraint=models.CheckConstraint(condition=models.Q(('ends_at__gt', models.F('starts_at'))), name='meeting_slot_ends_after_start'),
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(condition=models.Q(('next_reminder_at__isnull', False)), fields=['next_reminder_at'], name='meeting_next_reminder_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['student', 'starts_at'], name='advisor_mee_student_4c8e62_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meeting',
+            index=models.Index(fields=['advisor', 'starts_at'], name='advisor_mee_advisor_d692e4_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='meeting',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'BOOKED')), fields=('slot',), name='one_booking_per_meeting_slot'),
+        ),
+    ]
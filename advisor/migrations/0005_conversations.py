@@ -0,0 +1,99 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def assign_conversations(apps, schema_editor):
+    """Group existing messages into conversations and count their unread messages."""
+    ChatMessage = apps.get_model('advisor', 'ChatMessage')
+    Conversation = apps.get_model('advisor', 'Conversation')
+
+    pairs = ChatMessage.objects.order_by().values_list(
+        'sender_id', 'recipient_id', 'sender__role', 'plan_id'
+    ).distinct()
+    for sender_id, recipient_id, sender_role, plan_id in pairs:
+        if sender_role == 'STUDENT':
+            student_id, advisor_id = sender_id, recipient_id
+        else:
+            student_id, advisor_id = recipient_id, sender_id
+        conversation = Conversation.objects.filter(
+            student_id=student_id, advisor_id=advisor_id, plan_id=plan_id
+        ).first() or Conversation.objects.create(
+            student_id=student_id, advisor_id=advisor_id, plan_id=plan_id
+        )
+        ChatMessage.objects.filter(
+            sender_id=sender_id, recipient_id=recipient_id, plan_id=plan_id
+        ).update(conversation=conversation)
+
+    for conversation in Conversation.objects.all():
+        totals = ChatMessage.objects.filter(conversation=conversation).aggregate(
+            last=Max('sent_at'),
+            student_unread=Count('id', filter=Q(is_read=False, recipient_id=conversation.student_id)),
+            advisor_unread=Count('id', filter=Q(is_read=False, recipient_id=conversation.advisor_id)),
+        )
+        conversation.last_message_at = totals['last'] or conversation.last_message_at
+        conversation.student_unread = totals['student_unread']
+        conversation.advisor_unread = totals['advisor_unread']
+        conversation.save(update_fields=['last_message_at', 'student_unread', 'advisor_unread'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advisor', '0004_chatmessage_sent_at_default'),
+        ('planning', '0002_studentplan_student_pla_created_0de7a8_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_unread', models.PositiveIntegerField(default=0)),
+                ('advisor_unread', models.PositiveIntegerField(default=0)),
+                ('last_message_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('advisor', models.ForeignKey(limit_choices_to={'role': 'ADVISOR'}, on_delete=django.db.models.deletion.CASCADE, related_name='advisor_conversations', to=settings.AUTH_USER_MODEL)),
+                ('plan', models.ForeignKey(blank=True, help_text='Plan the conversation is about, if any', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conversations', to='planning.studentplan')),
+                ('student', models.ForeignKey(limit_choices_to={'role': 'STUDENT'}, on_delete=django.db.models.deletion.CASCADE, related_name='student_conversations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Conversation',
+                'verbose_name_plural': 'Conversations',
+                'db_table': 'conversations',
+                'ordering': ['-last_message_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='conversation',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='advisor.conversation'),
+        ),
+        migrations.RunPython(assign_conversations, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='conversation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='advisor.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['conversation', 'sent_at', 'id'], name='chat_messag_convers_736f09_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['student', 'last_message_at', 'id'], name='conversatio_student_ae37cb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['advisor', 'last_message_at', 'id'], name='conversatio_advisor_4871fc_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(condition=models.Q(('plan__isnull', False)), fields=('student', 'advisor', 'plan'), name='one_conversation_per_plan'),
+        ),
+    ]
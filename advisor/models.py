@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from authentication.models import User
 from planning.models import StudentPlan
@@ -39,9 +40,77 @@ class AdvisorAssignment(models.Model):
         return f"{self.student.username} -> {self.advisor.username}"
 
 
+class Conversation(models.Model):
+    """A chat between a student and their advisor, optionally about one plan."""
+    
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='student_conversations',
+        limit_choices_to={'role': 'STUDENT'}
+    )
+    
+    advisor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='advisor_conversations',
+        limit_choices_to={'role': 'ADVISOR'}
+    )
+    
+    plan = models.ForeignKey(
+        StudentPlan,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='conversations',
+        help_text=_('Plan the conversation is about, if any')
+    )
+    
+    # Messages each side has not read, kept up to date as messages are
+    # saved and read rather than counted
+    student_unread = models.PositiveIntegerField(default=0)
+    advisor_unread = models.PositiveIntegerField(default=0)
+    
+    last_message_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'conversations'
+        verbose_name = _('Conversation')
+        verbose_name_plural = _('Conversations')
+        ordering = ['-last_message_at']
+        indexes = [
+            models.Index(fields=['student', 'last_message_at', 'id']),
+            models.Index(fields=['advisor', 'last_message_at', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'advisor', 'plan'],
+                condition=models.Q(plan__isnull=False),
+                name='one_conversation_per_plan'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.student.username} <-> {self.advisor.username}"
+    
+    def unread_field(self, user_id) -> str:
+        """The counter of messages ``user_id`` has not read."""
+        return 'student_unread' if user_id == self.student_id else 'advisor_unread'
+    
+    def other_participant_id(self, user_id):
+        return self.advisor_id if user_id == self.student_id else self.student_id
+
+
 class ChatMessage(models.Model):
     """Model for real-time chat messages between students and advisors."""
     
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name='messages'
+    )
+    
     sender = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -71,7 +140,8 @@ class ChatMessage(models.Model):
         default=False
     )
     
-    sent_at = models.DateTimeField(auto_now_add=True)
+    # Set when the message is received; it is saved a moment later
+    sent_at = models.DateTimeField(default=timezone.now)
     read_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
@@ -79,6 +149,10 @@ class ChatMessage(models.Model):
         verbose_name = _('Chat Message')
         verbose_name_plural = _('Chat Messages')
         ordering = ['sent_at']
+        indexes = [
+            # History pages and read receipts are ranges of one conversation
+            models.Index(fields=['conversation', 'sent_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.sender.username} -> {self.recipient.username}: {self.message[:50]}"
@@ -126,3 +200,135 @@ class PlanComment(models.Model):
     def __str__(self):
         return f"Comment by {self.advisor.username} on {self.plan}"
 
+
+
+class MeetingSlot(models.Model):
+    """A block of time an advisor offers for a meeting with one of their students."""
+    
+    advisor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='meeting_slots',
+        limit_choices_to={'role': 'ADVISOR'}
+    )
+    
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    
+    location = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text=_('Office, room or video link')
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'meeting_slots'
+        verbose_name = _('Meeting Slot')
+        verbose_name_plural = _('Meeting Slots')
+        ordering = ['starts_at']
+        indexes = [
+            models.Index(fields=['advisor', 'starts_at']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(ends_at__gt=models.F('starts_at')),
+                name='meeting_slot_ends_after_start'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.advisor.username}: {self.starts_at:%Y-%m-%d %H:%M}"
+
+
+class Meeting(models.Model):
+    """A student's booking of an advisor's meeting slot."""
+    
+    class Status(models.TextChoices):
+        BOOKED = 'BOOKED', _('Booked')
+        CANCELLED = 'CANCELLED', _('Cancelled')
+    
+    slot = models.ForeignKey(
+        MeetingSlot,
+        on_delete=models.CASCADE,
+        related_name='meetings'
+    )
+    
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='advisor_meetings',
+        limit_choices_to={'role': 'STUDENT'}
+    )
+    
+    advisor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='advised_meetings',
+        limit_choices_to={'role': 'ADVISOR'}
+    )
+    
+    # Copied from the slot so conflict and reminder queries need no join
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.BOOKED
+    )
+    
+    agenda = models.TextField(
+        blank=True,
+        help_text=_('What the student would like to discuss')
+    )
+    
+    next_reminder_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_('When the next reminder is due; empty once none are left')
+    )
+    
+    reminders_sent = models.PositiveSmallIntegerField(
+        default=0,
+        help_text=_('Reminder offsets already sent or skipped')
+    )
+    
+    cancelled_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    
+    cancelled_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'advisor_meetings'
+        verbose_name = _('Meeting')
+        verbose_name_plural = _('Meetings')
+        ordering = ['starts_at']
+        indexes = [
+            # Reminders due: only meetings with a reminder left are indexed
+            models.Index(
+                fields=['next_reminder_at'],
+                condition=models.Q(next_reminder_at__isnull=False),
+                name='meeting_next_reminder_idx'
+            ),
+            models.Index(fields=['student', 'starts_at']),
+            models.Index(fields=['advisor', 'starts_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['slot'],
+                condition=models.Q(status='BOOKED'),
+                name='one_booking_per_meeting_slot'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.student.username} with {self.advisor.username} at {self.starts_at:%Y-%m-%d %H:%M}"
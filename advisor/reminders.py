@@ -0,0 +1,137 @@
+"""
+Meeting reminders.
+
+``check_meeting_reminders`` runs every ``MEETING_REMINDER_TICK`` seconds.
+Each run reads only the meetings whose ``next_reminder_at`` falls before
+the end of the tick, a range scan of the partial index on that column,
+however many meetings are booked further out. It places them in a
+``TimingWheel`` of ``MEETING_REMINDER_RESOLUTION``-second buckets and
+queues one ``send_meeting_reminders`` task per non-empty bucket, due at
+the bucket's start. A reminder is therefore sent within one bucket of its
+time, instead of up to a whole tick late, the database is read once per
+tick rather than once per bucket, and no worker waits for the buckets.
+
+Sending claims a meeting only if its ``next_reminder_at`` is still the
+value that was loaded, so a meeting rescheduled, cancelled or reminded
+by an overlapping run in the meantime is skipped.
+"""
+import logging
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from notifications import delivery
+from notifications.models import Notification
+from .meetings import schedule_next_reminder
+from .models import Meeting
+
+logger = logging.getLogger(__name__)
+
+
+class TimingWheel:
+    """
+    Items bucketed by due time: ``span`` seconds from ``start`` in buckets
+    of ``resolution`` seconds. Items already due go in the first bucket.
+    """
+
+    def __init__(self, start, span, resolution):
+        self.start = start
+        self.resolution = resolution
+        self.buckets = [[] for _ in range(max(1, math.ceil(span / resolution)))]
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.buckets)
+
+    def add(self, when, item):
+        index = max(0, math.floor((when - self.start).total_seconds() / self.resolution))
+        if index >= len(self.buckets):
+            raise ValueError(f'{when} is past the end of the wheel')
+        self.buckets[index].append(item)
+
+    def __iter__(self):
+        """Yield ``(bucket_start, items)`` for each non-empty bucket, in order."""
+        for index, bucket in enumerate(self.buckets):
+            if bucket:
+                yield self.start + timedelta(seconds=index * self.resolution), bucket
+
+
+def run_tick(now=None) -> int:
+    """
+    Queue the reminders due before the end of this tick, a task per bucket;
+    returns how many meetings were queued.
+    """
+    from notifications.tasks import send_meeting_reminders
+
+    now = now or timezone.now()
+    tick = getattr(settings, 'MEETING_REMINDER_TICK', 60)
+    wheel = TimingWheel(now, tick, getattr(settings, 'MEETING_REMINDER_RESOLUTION', 1))
+    for meeting_id, remind_at in Meeting.objects.filter(
+        next_reminder_at__lt=now + timedelta(seconds=tick)
+    ).values_list('id', 'next_reminder_at'):
+        wheel.add(remind_at, (meeting_id, remind_at))
+
+    queued = 0
+    for due_at, items in wheel:
+        try:
+            send_meeting_reminders.apply_async(
+                ([(meeting_id, remind_at.isoformat()) for meeting_id, remind_at in items],), eta=due_at
+            )
+        except Exception:
+            # Broker unavailable; the meetings stay due and the next tick queues them
+            logger.warning('Could not queue %d meeting reminders', len(items), exc_info=True)
+            continue
+        queued += len(items)
+    return queued
+
+
+def send_reminders(items) -> int:
+    """
+    Remind both parties of the meetings in ``items`` (``(meeting_id,
+    remind_at)`` pairs) in one transaction, and schedule their next reminder.
+    """
+    expected = dict(items)
+    now = timezone.now()
+    with transaction.atomic():
+        meetings = [
+            meeting for meeting in Meeting.objects.select_for_update(of=('self',)).filter(
+                id__in=expected, status=Meeting.Status.BOOKED
+            ).select_related('student', 'advisor')
+            if meeting.next_reminder_at == expected[meeting.pk]
+        ]
+        if not meetings:
+            return 0
+
+        preferences = delivery.load_preferences(
+            {meeting.student_id for meeting in meetings} | {meeting.advisor_id for meeting in meetings},
+            'meeting_reminders'
+        )
+        notifications = []
+        for meeting in meetings:
+            start = timezone.localtime(meeting.starts_at)
+            for recipient, other in ((meeting.student, meeting.advisor), (meeting.advisor, meeting.student)):
+                wants_notice, wants_email, _ = preferences[recipient.pk]
+                if not wants_notice:
+                    continue
+                notifications.append(Notification(
+                    recipient=recipient,
+                    notification_type=Notification.Type.MEETING_REMINDER,
+                    title=f'Meeting with {other.get_full_name() or other.username}',
+                    message=f'Your meeting starts on {start:%B %d at %I:%M %p}.',
+                    link='',
+                    send_email=wants_email,
+                    metadata={'meeting_id': meeting.pk, 'reminder': meeting.reminders_sent},
+                ))
+            schedule_next_reminder(meeting, meeting.reminders_sent + 1, now)
+
+        Meeting.objects.bulk_update(meetings, ['next_reminder_at', 'reminders_sent'])
+        # An advisor may get several reminders at once
+        delivery.create_many(
+            notifications,
+            [user_id for user_id, (_, _, wants_digest) in preferences.items() if wants_digest],
+            'meeting reminders'
+        )
+    return len(meetings)
+
@@ -0,0 +1,76 @@
+"""
+Serializers for advisor meeting scheduling and chat.
+"""
+from rest_framework import serializers
+from .models import ChatMessage, Conversation, Meeting, MeetingSlot
+
+
+class MeetingSlotSerializer(serializers.ModelSerializer):
+    """Serializer for an advisor's meeting slot."""
+    
+    advisor_name = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = MeetingSlot
+        fields = ['id', 'advisor', 'advisor_name', 'starts_at', 'ends_at', 'location', 'created_at']
+        read_only_fields = ['id', 'advisor', 'advisor_name', 'created_at']
+    
+    def get_advisor_name(self, obj):
+        return obj.advisor.get_full_name() or obj.advisor.username
+
+
+class MeetingSerializer(serializers.ModelSerializer):
+    """Serializer for a booked or cancelled meeting."""
+    
+    location = serializers.CharField(source='slot.location', read_only=True)
+    
+    class Meta:
+        model = Meeting
+        fields = [
+            'id', 'slot', 'student', 'advisor', 'starts_at', 'ends_at', 'location',
+            'status', 'agenda', 'cancelled_by', 'cancelled_at', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class BookMeetingSerializer(serializers.Serializer):
+    """Serializer for booking a slot."""
+    
+    slot_id = serializers.IntegerField()
+    agenda = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class ConversationSerializer(serializers.ModelSerializer):
+    """Serializer for a conversation, with the requesting user's unread count."""
+    
+    unread_count = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Conversation
+        fields = ['id', 'student', 'advisor', 'plan', 'unread_count', 'last_message_at', 'created_at']
+        read_only_fields = fields
+    
+    def get_unread_count(self, obj):
+        return getattr(obj, obj.unread_field(self.context['request'].user.pk))
+
+
+class StartConversationSerializer(serializers.Serializer):
+    """Serializer for starting a conversation with the other participant."""
+    
+    participant = serializers.IntegerField(help_text='The advisor, for students; the student, for advisors')
+    plan = serializers.IntegerField(required=False, allow_null=True, default=None)
+
+
+class ChatMessageSerializer(serializers.ModelSerializer):
+    """Serializer for a chat message in a conversation's history."""
+    
+    class Meta:
+        model = ChatMessage
+        fields = ['id', 'sender', 'recipient', 'message', 'is_read', 'sent_at', 'read_at']
+        read_only_fields = fields
+
+
+class ReadReceiptSerializer(serializers.Serializer):
+    """Serializer for marking a conversation read up to a time."""
+    
+    up_to = serializers.DateTimeField(required=False, allow_null=True, default=None)
@@ -1,3 +1,483 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from infrastructure import outbox
+from infrastructure.models import OutboxEvent
+from notifications import tasks
+from notifications.models import Notification, NotificationPreference
+from . import consumers
+from .chat import mark_read, save_messages
+from .models import AdvisorAssignment, ChatMessage, Conversation, Meeting, MeetingSlot
+from .reminders import TimingWheel, run_tick
+from .routing import websocket_urlpatterns
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    MEETING_REMINDER_OFFSETS=[1440, 60]
+)
+class MeetingSchedulingTestCase(TestCase):
+    """Test offering, booking and cancelling advisor meetings."""
+
+    def setUp(self):
+        self.advisor = User.objects.create_user(username='advisor', password='pass', role=User.Role.ADVISOR)
+        self.student = User.objects.create_user(username='student', password='pass', role=User.Role.STUDENT)
+        self.other_student = User.objects.create_user(username='other', password='pass', role=User.Role.STUDENT)
+        AdvisorAssignment.objects.create(student=self.student, advisor=self.advisor)
+        AdvisorAssignment.objects.create(student=self.other_student, advisor=self.advisor)
+
+        self.start = (timezone.now() + timedelta(days=3)).replace(microsecond=0)
+        self.slot = self.make_slot(self.start)
+        self.api_client = APIClient()
+
+    def make_slot(self, starts_at, minutes=30):
+        return MeetingSlot.objects.create(
+            advisor=self.advisor, starts_at=starts_at, ends_at=starts_at + timedelta(minutes=minutes)
+        )
+
+    def book(self, user, slot):
+        self.api_client.force_authenticate(user)
+        return self.api_client.post('/api/meetings/book/', {'slot_id': slot.pk}, format='json')
+
+    def test_advisor_slots_may_not_overlap(self):
+        self.api_client.force_authenticate(self.advisor)
+        response = self.api_client.post('/api/meeting-slots/', {
+            'starts_at': (self.start + timedelta(minutes=15)).isoformat(),
+            'ends_at': (self.start + timedelta(minutes=45)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        # Back to back is fine
+        response = self.api_client.post('/api/meeting-slots/', {
+            'starts_at': (self.start + timedelta(minutes=30)).isoformat(),
+            'ends_at': (self.start + timedelta(minutes=60)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['advisor'], self.advisor.pk)
+
+    def test_book_schedules_first_reminder(self):
+        response = self.book(self.student, self.slot)
+        self.assertEqual(response.status_code, 201)
+
+        meeting = Meeting.objects.get()
+        self.assertEqual(meeting.next_reminder_at, self.start - timedelta(days=1))
+        self.assertEqual(meeting.reminders_sent, 0)
+        self.assertEqual(OutboxEvent.objects.get().topic, 'meeting.booked')
+
+        # The slot is no longer offered, and cannot be booked twice
+        self.api_client.force_authenticate(self.other_student)
+        self.assertEqual(self.api_client.get('/api/meeting-slots/').data['results'], [])
+        self.assertEqual(self.book(self.other_student, self.slot).status_code, 409)
+
+    def test_late_booking_skips_passed_reminders(self):
+        slot = self.make_slot(timezone.now() + timedelta(hours=3))
+        self.book(self.student, slot)
+        meeting = Meeting.objects.get()
+        self.assertEqual(meeting.next_reminder_at, slot.starts_at - timedelta(hours=1))
+        self.assertEqual(meeting.reminders_sent, 1)
+
+    def test_overlapping_meetings_conflict(self):
+        other_advisor = User.objects.create_user(username='advisor2', role=User.Role.ADVISOR)
+        AdvisorAssignment.objects.create(student=self.student, advisor=other_advisor)
+        overlapping = MeetingSlot.objects.create(
+            advisor=other_advisor,
+            starts_at=self.start + timedelta(minutes=20),
+            ends_at=self.start + timedelta(minutes=50)
+        )
+        self.assertEqual(self.book(self.student, self.slot).status_code, 201)
+
+        response = self.book(self.student, overlapping)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('Time conflict', response.data['error'])
+
+    def test_only_assigned_students_can_book(self):
+        stranger = User.objects.create_user(username='stranger', role=User.Role.STUDENT)
+        self.assertEqual(self.book(stranger, self.slot).status_code, 409)
+
+    def test_cancel_frees_slot_and_stops_reminders(self):
+        self.book(self.student, self.slot)
+        meeting = Meeting.objects.get()
+
+        response = self.api_client.post(f'/api/meetings/{meeting.pk}/cancel/')
+        self.assertEqual(response.status_code, 200)
+        meeting.refresh_from_db()
+        self.assertEqual(meeting.status, Meeting.Status.CANCELLED)
+        self.assertIsNone(meeting.next_reminder_at)
+
+        # The advisor is told by the outbox dispatcher
+        outbox.dispatch()
+        notification = Notification.objects.get(recipient=self.advisor, title='Meeting cancelled')
+        self.assertIn('student', notification.message)
+
+        self.assertEqual(self.book(self.other_student, self.slot).status_code, 201)
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    MEETING_REMINDER_OFFSETS=[1440, 60],
+    MEETING_REMINDER_TICK=60,
+    MEETING_REMINDER_RESOLUTION=1
+)
+class MeetingReminderTestCase(TestCase):
+    """Test the timing wheel that sends meeting reminders."""
+
+    def setUp(self):
+        self.advisor = User.objects.create_user(username='advisor', role=User.Role.ADVISOR, first_name='Ada')
+        self.students = User.objects.bulk_create([
+            User(username=f'student{n}', email=f'student{n}@example.com', role=User.Role.STUDENT)
+            for n in range(3)
+        ])
+        self.now = timezone.now()
+
+    def meeting(self, student, remind_in, sent=0):
+        starts_at = self.now + timedelta(hours=1, seconds=remind_in)
+        slot = MeetingSlot.objects.create(
+            advisor=self.advisor, starts_at=starts_at, ends_at=starts_at + timedelta(minutes=30)
+        )
+        return Meeting.objects.create(
+            slot=slot, student=student, advisor=self.advisor, starts_at=starts_at,
+            ends_at=slot.ends_at, next_reminder_at=self.now + timedelta(seconds=remind_in),
+            reminders_sent=sent
+        )
+
+    def test_wheel_orders_buckets(self):
+        wheel = TimingWheel(self.now, 60, 10)
+        wheel.add(self.now + timedelta(seconds=35), 'b')
+        wheel.add(self.now - timedelta(seconds=5), 'a')
+        wheel.add(self.now + timedelta(seconds=39), 'c')
+        self.assertEqual(len(wheel), 3)
+        self.assertEqual(list(wheel), [
+            (self.now, ['a']),
+            (self.now + timedelta(seconds=30), ['b', 'c']),
+        ])
+        with self.assertRaises(ValueError):
+            wheel.add(self.now + timedelta(seconds=60), 'd')
+
+    def queue_tick(self):
+        """Run a tick, returning the ``(items, eta)`` of each bucket task it queued."""
+        with mock.patch.object(tasks.send_meeting_reminders, 'apply_async') as queue:
+            queued = run_tick(self.now)
+        return queued, [(call.args[0][0], call.kwargs['eta']) for call in queue.call_args_list]
+
+    @mock.patch('notifications.tasks.send_notification_emails')
+    def test_reminders_are_queued_for_their_bucket(self, mock_send_emails):
+        overdue = self.meeting(self.students[0], -30, sent=1)
+        later = self.meeting(self.students[1], 20, sent=1)
+        next_tick = self.meeting(self.students[2], 90, sent=1)
+        NotificationPreference.objects.create(user=self.advisor, email_notifications=False)
+
+        queued, buckets = self.queue_tick()
+
+        # Overdue reminders are due at once; the other waits for its bucket
+        self.assertEqual(queued, 2)
+        self.assertEqual([eta for _, eta in buckets], [self.now, self.now + timedelta(seconds=20)])
+        self.assertEqual([[meeting_id for meeting_id, _ in items] for items, _ in buckets], [[overdue.pk], [later.pk]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for items, _ in buckets:
+                tasks.send_meeting_reminders(items)
+
+        self.assertEqual(
+            set(Notification.objects.values_list('recipient_id', flat=True)),
+            {self.students[0].pk, self.students[1].pk, self.advisor.pk}
+        )
+        self.assertEqual(Notification.objects.filter(recipient=self.advisor).count(), 2)
+        self.assertIn('Ada', Notification.objects.filter(recipient=self.students[0]).get().title)
+        # Only the students want email
+        emailed = [i for call in mock_send_emails.delay.call_args_list for i in call.args[0]]
+        self.assertEqual(len(emailed), 2)
+
+        # That was the last reminder; the next tick's meeting is untouched
+        overdue.refresh_from_db()
+        self.assertIsNone(overdue.next_reminder_at)
+        self.assertEqual(overdue.reminders_sent, 2)
+        next_tick.refresh_from_db()
+        self.assertEqual(next_tick.reminders_sent, 1)
+        self.assertFalse(Notification.objects.filter(recipient=self.students[2]).exists())
+
+    def test_only_due_meetings_are_read(self):
+        for student in self.students:
+            self.meeting(student, 3600)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.queue_tick(), (0, []))
+
+    @mock.patch('notifications.tasks.send_notification_emails')
+    def test_changed_meetings_are_skipped(self, mock_send_emails):
+        meeting = self.meeting(self.students[0], 20)
+        _, buckets = self.queue_tick()
+
+        # Cancelled before its bucket came due
+        Meeting.objects.filter(pk=meeting.pk).update(status=Meeting.Status.CANCELLED, next_reminder_at=None)
+
+        self.assertEqual(tasks.send_meeting_reminders(buckets[0][0]), 'Sent reminders for 0 meetings')
+        self.assertFalse(Notification.objects.exists())
+
+    def test_overlapping_ticks_remind_once(self):
+        self.meeting(self.students[0], 20, sent=1)
+        _, first = self.queue_tick()
+        _, second = self.queue_tick()
+
+        tasks.send_meeting_reminders(first[0][0])
+        tasks.send_meeting_reminders(second[0][0])
+        self.assertEqual(Notification.objects.filter(recipient=self.students[0]).count(), 1)
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    CHAT_FLUSH_INTERVAL=0.1,
+    CHAT_FLUSH_SIZE=500,
+    CHAT_READ_DELAY=0.1
+)
+class ChatConsumerTestCase(TransactionTestCase):
+    """Test chat room access, write-behind message saving and read receipts."""
+
+    def setUp(self):
+        self.student = User.objects.create_user(username='student', role=User.Role.STUDENT)
+        self.advisor = User.objects.create_user(username='advisor', role=User.Role.ADVISOR)
+        self.stranger = User.objects.create_user(username='stranger', role=User.Role.STUDENT)
+        AdvisorAssignment.objects.create(student=self.student, advisor=self.advisor)
+        self.conversation = Conversation.objects.create(student=self.student, advisor=self.advisor)
+        self.room = self.conversation.pk
+
+    async def connect(self, user, room=None):
+        communicator = WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f'/ws/chat/{room or self.room}/'
+        )
+        communicator.scope['user'] = user
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+    async def test_only_participants_can_join(self):
+        _, connected, _ = await self.connect(AnonymousUser())
+        self.assertFalse(connected)
+        _, connected, code = await self.connect(self.stranger)
+        self.assertFalse(connected)
+        self.assertEqual(code, consumers.FORBIDDEN)
+        _, connected, _ = await self.connect(self.student, room=self.room + 1)
+        self.assertFalse(connected)
+
+        await sync_to_async(AdvisorAssignment.objects.update)(is_active=False)
+        _, connected, _ = await self.connect(self.student)
+        self.assertFalse(connected)
+
+    async def test_other_sites_cannot_open_connections(self):
+        from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+        from django.contrib.sessions.backends.db import SessionStore
+        from smart_registration.asgi import application
+
+        def log_in():
+            session = SessionStore()
+            session[SESSION_KEY] = str(self.student.pk)
+            session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+            session[HASH_SESSION_KEY] = self.student.get_session_auth_hash()
+            session.create()
+            return session.session_key
+        cookie = f'sessionid={await sync_to_async(log_in)()}'.encode()
+
+        for origin, allowed in ((b'http://testserver', True), (b'https://evil.example', False)):
+            communicator = WebsocketCommunicator(
+                application, f'/ws/chat/{self.room}/', headers=[(b'cookie', cookie), (b'origin', origin)]
+            )
+            connected, _ = await communicator.connect()
+            self.assertEqual(connected, allowed)
+            if connected:
+                await communicator.disconnect()
+
+    async def test_messages_are_relayed_then_saved_together(self):
+        student, connected, _ = await self.connect(self.student)
+        self.assertTrue(connected)
+        advisor, _, _ = await self.connect(self.advisor)
+
+        with mock.patch('advisor.consumers._save_messages', wraps=consumers._save_messages) as save:
+            for n in range(3):
+                # A client-supplied sender is ignored
+                await student.send_json_to({'message': f'Hello {n}', 'sender_id': self.advisor.pk})
+            for n in range(3):
+                frame = await advisor.receive_json_from(timeout=2)
+                self.assertEqual(frame['message'], f'Hello {n}')
+                self.assertEqual(frame['sender_id'], self.student.pk)
+
+            await asyncio.sleep(0.3)
+            self.assertEqual(save.call_count, 1)
+
+        messages = await sync_to_async(list)(ChatMessage.objects.order_by('sent_at', 'id').values_list(
+            'conversation_id', 'sender_id', 'recipient_id', 'message'
+        ))
+        self.assertEqual(messages, [
+            (self.conversation.pk, self.student.pk, self.advisor.pk, f'Hello {n}') for n in range(3)
+        ])
+        await sync_to_async(self.conversation.refresh_from_db)()
+        self.assertEqual((self.conversation.student_unread, self.conversation.advisor_unread), (0, 3))
+        await student.disconnect()
+        await advisor.disconnect()
+
+    async def test_full_buffer_and_disconnect_flush_immediately(self):
+        communicator, _, _ = await self.connect(self.advisor)
+        with self.settings(CHAT_FLUSH_SIZE=2, CHAT_FLUSH_INTERVAL=60):
+            await communicator.send_json_to({'message': 'One'})
+            await communicator.send_json_to({'message': 'Two'})
+            await communicator.send_json_to({'message': 'Three'})
+            for _ in range(3):
+                await communicator.receive_json_from(timeout=2)
+            await asyncio.sleep(0.1)
+            self.assertEqual(await sync_to_async(ChatMessage.objects.count)(), 2)
+
+            await communicator.disconnect()
+        self.assertEqual(await sync_to_async(ChatMessage.objects.count)(), 3)
+        self.assertEqual(
+            await sync_to_async(ChatMessage.objects.filter(recipient=self.student).count)(), 3
+        )
+
+    async def test_a_failing_conversation_does_not_drop_the_others(self):
+        doomed = await sync_to_async(Conversation.objects.create)(student=self.stranger, advisor=self.advisor)
+        buffer = consumers.MessageBuffer()
+        with self.settings(CHAT_FLUSH_INTERVAL=60, CHAT_FLUSH_RETRIES=1):
+            for conversation in (self.conversation, doomed):
+                buffer.add(ChatMessage(
+                    conversation_id=conversation.pk, sender_id=conversation.student_id,
+                    recipient_id=self.advisor.pk, message='Hello'
+                ))
+            # Deleted while its message waited in the buffer
+            await sync_to_async(doomed.delete)()
+
+            with self.assertLogs('advisor.consumers', 'WARNING'):
+                await buffer.flush()
+            self.assertEqual(
+                await sync_to_async(list)(ChatMessage.objects.values_list('conversation_id', flat=True)),
+                [self.conversation.pk]
+            )
+            self.assertEqual(len(buffer.messages), 1)
+
+            with self.assertLogs('advisor.consumers', 'ERROR'):
+                await buffer.flush()
+            self.assertEqual(buffer.messages, [])
+        buffer.flush_task.cancel()
+
+    async def test_read_receipts_are_batched_and_broadcast(self):
+        student, _, _ = await self.connect(self.student)
+        advisor, _, _ = await self.connect(self.advisor)
+        for n in range(3):
+            await student.send_json_to({'message': f'Hello {n}'})
+        for _ in range(3):
+            await advisor.receive_json_from(timeout=2)
+            await student.receive_json_from(timeout=2)
+
+        with mock.patch('advisor.chat.mark_read', wraps=mark_read) as marked:
+            # Still in the buffer: marking saves them first
+            await advisor.send_json_to({'action': 'read', 'up_to': '2000-01-01T00:00:00Z'})
+            await advisor.send_json_to({'action': 'read'})
+            receipt = await student.receive_json_from(timeout=2)
+            self.assertEqual(marked.call_count, 1)
+        self.assertEqual(receipt['type'], 'read')
+        self.assertEqual(receipt['reader_id'], self.advisor.pk)
+
+        self.assertEqual(await sync_to_async(ChatMessage.objects.filter(is_read=False).count)(), 0)
+        await sync_to_async(self.conversation.refresh_from_db)()
+        self.assertEqual(self.conversation.advisor_unread, 0)
+        await student.disconnect()
+        await advisor.disconnect()
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class ConversationTestCase(TestCase):
+    """Test conversations, history pages and unread counters."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.student = User.objects.create_user(username='student', role=User.Role.STUDENT)
+        self.advisor = User.objects.create_user(username='advisor', role=User.Role.ADVISOR)
+        self.stranger = User.objects.create_user(username='stranger', role=User.Role.STUDENT)
+        AdvisorAssignment.objects.create(student=self.student, advisor=self.advisor)
+        self.conversation = Conversation.objects.create(student=self.student, advisor=self.advisor)
+        self.start = timezone.now() - timedelta(hours=1)
+
+    def send(self, sender, recipient, count, conversation=None):
+        conversation = conversation or self.conversation
+        messages = [
+            ChatMessage(
+                conversation=conversation, sender=sender, recipient=recipient,
+                message=f'Message {n}', sent_at=self.start + timedelta(minutes=n)
+            )
+            for n in range(count)
+        ]
+        save_messages(messages)
+        return messages
+
+    def test_starting_a_conversation_returns_the_existing_one(self):
+        self.client.force_authenticate(user=self.advisor)
+        response = self.client.post('/api/conversations/', {'participant': self.student.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], self.conversation.pk)
+
+        self.client.force_authenticate(user=self.stranger)
+        response = self.client.post('/api/conversations/', {'participant': self.advisor.pk})
+        self.assertEqual(response.status_code, 403)
+
+    def test_unread_counts_are_kept_as_messages_are_saved(self):
+        other = Conversation.objects.create(student=self.student, advisor=self.advisor)
+        messages = [
+            ChatMessage(conversation=self.conversation, sender=self.student, recipient=self.advisor, message='a'),
+            ChatMessage(conversation=self.conversation, sender=self.advisor, recipient=self.student, message='b'),
+            ChatMessage(conversation=self.conversation, sender=self.advisor, recipient=self.student, message='c'),
+            ChatMessage(conversation=other, sender=self.student, recipient=self.advisor, message='d'),
+        ]
+        # One insert, one lookup and one update per conversation, in a savepoint
+        with self.assertNumQueries(6):
+            save_messages(messages)
+
+        self.conversation.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.conversation.student_unread, self.conversation.advisor_unread), (2, 1))
+        self.assertEqual((other.student_unread, other.advisor_unread), (0, 1))
+
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get(f'/api/conversations/{self.conversation.pk}/')
+        self.assertEqual(response.data['unread_count'], 2)
+
+    def test_history_pages_walk_every_message_once(self):
+        self.send(self.student, self.advisor, 25)
+        self.client.force_authenticate(user=self.advisor)
+
+        seen, url = [], f'/api/conversations/{self.conversation.pk}/messages/?page_size=10'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(message['id'] for message in response.data['results'])
+            url = response.data['next']
+
+        expected = list(self.conversation.messages.order_by('-sent_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+        self.client.force_authenticate(user=self.stranger)
+        response = self.client.get(f'/api/conversations/{self.conversation.pk}/messages/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_read_receipt_marks_a_range_with_one_update(self):
+        self.send(self.student, self.advisor, 10)
+        self.send(self.advisor, self.student, 2)
+
+        # Update of the range, then of the counter, in a savepoint
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(4):
+                updated = mark_read(self.conversation, self.advisor.pk, self.start + timedelta(minutes=5))
+        self.assertEqual(updated, 6)
+        self.conversation.refresh_from_db()
+        self.assertEqual((self.conversation.student_unread, self.conversation.advisor_unread), (2, 4))
+
+        self.client.force_authenticate(user=self.advisor)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/conversations/{self.conversation.pk}/read/')
+        self.assertEqual(response.data, {'updated': 4, 'unread_count': 0})
+        self.assertEqual(
+            ChatMessage.objects.filter(recipient=self.advisor, is_read=False).count(), 0
+        )
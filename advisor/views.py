@@ -1,3 +1,213 @@
-from django.shortcuts import render
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-# Create your views here.
+from authentication.models import User
+from planning.models import StudentPlan
+from smart_registration.pagination import KeysetPagination
+from . import chat, meetings
+from .models import Conversation, Meeting, MeetingSlot
+from .serializers import (
+    BookMeetingSerializer, ChatMessageSerializer, ConversationSerializer,
+    MeetingSerializer, MeetingSlotSerializer, ReadReceiptSerializer,
+    StartConversationSerializer,
+)
+
+
+class MeetingSlotViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet for advisors' meeting slots.
+    
+    Endpoints:
+    - list: Advisors see their slots; students see open future slots of their advisors
+    - create: Offer a slot (advisors only); slots may not overlap
+    - destroy: Remove a slot nobody has booked (advisors only)
+    """
+    serializer_class = MeetingSlotSerializer
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+    
+    def get_queryset(self):
+        """Return slots based on user role."""
+        user = self.request.user
+        
+        if user.is_advisor():
+            queryset = MeetingSlot.objects.filter(advisor=user)
+        elif user.is_student():
+            queryset = meetings.bookable_slots(user)
+        else:
+            return MeetingSlot.objects.none()
+        return queryset.select_related('advisor')
+    
+    def create(self, request, *args, **kwargs):
+        """Offer a new slot."""
+        if not request.user.is_advisor():
+            return Response(
+                {'error': 'Only advisors can offer meeting slots'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        slot, error = meetings.create_slot(request.user, **serializer.validated_data)
+        if slot is None:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(self.get_serializer(slot).data, status=status.HTTP_201_CREATED)
+    
+    def destroy(self, request, *args, **kwargs):
+        """Remove a slot unless it is booked."""
+        slot = self.get_object()
+        if slot.meetings.filter(status=Meeting.Status.BOOKED).exists():
+            return Response(
+                {'error': 'Cancel the meeting booked in this slot first'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        slot.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MeetingViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for advisor meetings.
+    
+    Endpoints:
+    - list: The user's meetings as student or advisor; ``upcoming=true`` for booked future ones
+    - retrieve: A single meeting
+    - book: Book a slot (students only)
+    - cancel: Cancel a booked meeting (either party)
+    """
+    serializer_class = MeetingSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        """Return the meetings the user takes part in."""
+        user = self.request.user
+        
+        if user.is_student():
+            queryset = Meeting.objects.filter(student=user)
+        elif user.is_advisor():
+            queryset = Meeting.objects.filter(advisor=user)
+        else:
+            return Meeting.objects.none()
+        
+        if self.request.query_params.get('upcoming', '').lower() == 'true':
+            queryset = queryset.filter(
+                status=Meeting.Status.BOOKED, starts_at__gt=timezone.now()
+            )
+        return queryset.select_related('slot')
+    
+    @action(detail=False, methods=['post'])
+    def book(self, request):
+        """Book one of an assigned advisor's open slots."""
+        if not request.user.is_student():
+            return Response(
+                {'error': 'Only students can book meetings'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = BookMeetingSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        meeting, error = meetings.book(request.user, **serializer.validated_data)
+        if meeting is None:
+            return Response({'error': error}, status=status.HTTP_409_CONFLICT)
+        
+        return Response(MeetingSerializer(meeting).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Cancel a booked meeting, freeing its slot."""
+        meeting = self.get_object()
+        cancelled, error = meetings.cancel(meeting, request.user)
+        if not cancelled:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(MeetingSerializer(meeting).data)
+
+
+class ConversationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for chats between students and their advisors.
+    
+    Endpoints:
+    - list: The user's conversations, most recently active first, keyset paginated
+    - retrieve: A single conversation with the user's unread count
+    - create: Start (or return) the conversation with an assigned advisor or student
+    - messages: The conversation's history, newest first, keyset paginated
+    - read: Mark the messages received up to ``up_to`` (default: now) read
+    """
+    serializer_class = ConversationSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    
+    @property
+    def cursor_ordering(self):
+        if self.action == 'messages':
+            return ('-sent_at', '-id')
+        return ('-last_message_at', '-id')
+    
+    def get_queryset(self):
+        """Return the conversations the user takes part in."""
+        user = self.request.user
+        return Conversation.objects.filter(Q(student=user) | Q(advisor=user))
+    
+    def create(self, request, *args, **kwargs):
+        """Start a conversation, or return the one already started."""
+        serializer = StartConversationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        user = request.user
+        participant_id = serializer.validated_data['participant']
+        if user.is_student():
+            student, advisor = user, User.objects.filter(pk=participant_id).first()
+        elif user.is_advisor():
+            student, advisor = User.objects.filter(pk=participant_id).first(), user
+        else:
+            return Response(
+                {'error': 'Only students and advisors can chat'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        if student is None or advisor is None:
+            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        plan = None
+        if serializer.validated_data['plan'] is not None:
+            plan = StudentPlan.objects.filter(pk=serializer.validated_data['plan']).first()
+            if plan is None:
+                return Response({'error': 'Plan not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        conversation, created, error = chat.conversation_for(student, advisor, plan)
+        if conversation is None:
+            return Response({'error': error}, status=status.HTTP_403_FORBIDDEN)
+        
+        return Response(
+            self.get_serializer(conversation).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+    
+    @action(detail=True, methods=['get'])
+    def messages(self, request, pk=None):
+        """Page through the conversation's messages, newest first."""
+        conversation = self.get_object()
+        page = self.paginate_queryset(conversation.messages.all())
+        return self.get_paginated_response(ChatMessageSerializer(page, many=True).data)
+    
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        """Mark every message received up to ``up_to`` read with one update."""
+        conversation = self.get_object()
+        serializer = ReadReceiptSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        updated = chat.mark_read(conversation, request.user.pk, serializer.validated_data['up_to'])
+        conversation.refresh_from_db(fields=['student_unread', 'advisor_unread'])
+        return Response({
+            'updated': updated,
+            'unread_count': getattr(conversation, conversation.unread_field(request.user.pk))
+        })
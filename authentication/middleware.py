@@ -21,6 +21,7 @@ class LoginRequiredMiddleware:
         '/static/',
         '/media/',
         '/api/',  # API endpoints handle their own authentication via DRF
+        '/registration/calendar/',  # Calendar feeds are authenticated by a signed token
     ]
     
     def __init__(self, get_response):
@@ -1,8 +1,6 @@
 from django.shortcuts import render
 from django.views.generic import TemplateView
-from notifications.models import Notification
-from planning.models import StudentPlan
-from registration.models import Enrollment
+from infrastructure.counters import get_counters
 
 
 class HomeView(TemplateView):
@@ -13,25 +11,11 @@ class HomeView(TemplateView):
         context = super().get_context_data(**kwargs)
         
         if self.request.user.is_authenticated:
-            # Get unread notifications count
-            unread_count = Notification.objects.filter(
-                recipient=self.request.user,
-                is_read=False
-            ).count()
-            context['unread_notifications'] = unread_count
-            
-            # Get active plans count
-            active_plans = StudentPlan.objects.filter(
-                student=self.request.user
-            ).count()
-            context['active_plans'] = active_plans
-            
-            # Get enrolled courses count
-            enrolled_count = Enrollment.objects.filter(
-                student=self.request.user,
-                status=Enrollment.Status.ENROLLED
-            ).count()
-            context['enrolled_courses'] = enrolled_count
+            # Denormalized counts, one cache read
+            counters = get_counters(self.request.user.pk)
+            context['unread_notifications'] = counters['unread_notifications']
+            context['active_plans'] = counters['plans']
+            context['enrolled_courses'] = counters['enrolled_courses']
         
         return context
 
@@ -0,0 +1,132 @@
+"""
+In-process autocomplete index for the course search modal.
+
+The index is a set of sorted key arrays searched with ``bisect``; a prefix
+lookup is a binary search followed by a short forward scan, so a query
+costs O(log n + k) and never touches the database. Each process builds the
+index from a snapshot of available sections and rebuilds it lazily when the
+shared catalog version (see ``courses.versioning``) moves.
+"""
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from .models import CourseSection
+from .versioning import get_catalog_version
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_CODE_STRIP_RE = re.compile(r'[^a-z0-9]')
+
+
+def normalize_code(value: str) -> str:
+    """Lower-case a course code or CRN and drop spaces/punctuation ('CS 101' -> 'cs101')."""
+    return _CODE_STRIP_RE.sub('', value.lower())
+
+
+class AutocompleteIndex:
+    """
+    Prefix index over course codes, CRNs and title tokens.
+
+    Lookups are ranked by key kind: course code matches first, then CRNs,
+    then full-title prefixes and finally individual title words.
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.suggestions: List[Dict] = []
+        codes, crns, titles, words = [], [], [], []
+
+        for position, row in enumerate(rows):
+            self.suggestions.append({
+                'id': row['id'],
+                'crn': row['crn'],
+                'course_code': row['course__course_code'],
+                'section_number': row['section_number'],
+                'title': row['course__title'],
+                'term': row['term'],
+                'year': row['year'],
+            })
+            codes.append((normalize_code(row['course__course_code']), position))
+            if row['crn']:
+                crns.append((normalize_code(row['crn']), position))
+            title = row['course__title'].lower()
+            titles.append((title, position))
+            for word in set(_TOKEN_RE.findall(title)):
+                words.append((word, position))
+
+        self._arrays = [sorted(codes), sorted(crns), sorted(titles), sorted(words)]
+
+    def __len__(self):
+        return len(self.suggestions)
+
+    @staticmethod
+    def _prefix_scan(array, prefix):
+        """Yield positions whose key starts with ``prefix``."""
+        i = bisect_left(array, (prefix,))
+        while i < len(array) and array[i][0].startswith(prefix):
+            yield array[i][1]
+            i += 1
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Return up to ``limit`` suggestions whose keys start with ``query``."""
+        text = ' '.join(query.lower().split())
+        if not text or limit <= 0:
+            return []
+
+        code_prefix = normalize_code(text)
+        tokens = _TOKEN_RE.findall(text)
+        codes, crns, titles, words = self._arrays
+        lookups = [(titles, text)]
+        if code_prefix:
+            lookups = [(codes, code_prefix), (crns, code_prefix)] + lookups
+        if tokens:
+            lookups.append((words, tokens[0]))
+
+        seen = set()
+        results = []
+        for array, prefix in lookups:
+            for position in self._prefix_scan(array, prefix):
+                if position in seen:
+                    continue
+                seen.add(position)
+                suggestion = self.suggestions[position]
+                # Word matches must contain the remaining query words too
+                if array is words and len(tokens) > 1:
+                    title = suggestion['title'].lower()
+                    if not all(token in title for token in tokens[1:]):
+                        continue
+                results.append(suggestion)
+                if len(results) >= limit:
+                    return results
+        return results
+
+
+def build_autocomplete_index(version=None) -> AutocompleteIndex:
+    """Build an index from a snapshot of the available catalog."""
+    rows = CourseSection.objects.filter(
+        is_available=True,
+        course__is_active=True
+    ).order_by('course__course_code', 'section_number').values(
+        'id', 'crn', 'section_number', 'term', 'year',
+        'course__course_code', 'course__title'
+    )
+    return AutocompleteIndex(rows, version=version)
+
+
+_index: Optional[AutocompleteIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_autocomplete_index() -> AutocompleteIndex:
+    """Return this process's index, rebuilding it if the catalog has changed."""
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = build_autocomplete_index(version=version)
+        return _index
@@ -0,0 +1,229 @@
+"""
+Versioned response caching for the read-mostly catalog endpoints.
+
+Responses are cached under a key built from the request path, the
+normalized query string and the catalog version covering the request (the
+term's version when the request is scoped to one term, the course version
+for documents built from course data alone). Any change the document
+depends on moves that version, so stale entries are never read again and
+simply expire.
+
+Every cacheable response carries a strong ETag derived from the same key
+plus a Last-Modified time, so revalidation requests are answered with
+304 Not Modified without running a query or touching the serializers.
+
+Seat counts are not part of the catalog version, since every enrollment
+moves them. Section responses are cached with ``live_seats=True``: the
+seat fields of the cached sections are replaced with current counts read
+by primary key in one query, the ETag also covers those counts, and no
+Last-Modified is sent because it could not account for them.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe, parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import CourseSection
+from .seats import seat_state
+from .versioning import get_catalog_version, get_course_version
+
+CACHE_KEY_PREFIX = 'courses:response'
+
+# Parameters that select a slice of a result set rather than filter it
+PAGING_PARAMS = ('page', 'page_size', 'ordering', 'cursor', 'flat')
+
+
+def _normalized_query(request, exclude=()):
+    """Sorted query parameters with empty values dropped."""
+    items = []
+    for name in sorted(request.query_params):
+        if name in exclude:
+            continue
+        values = sorted(v for v in request.query_params.getlist(name) if v != '')
+        items.extend(f'{name}={value}' for value in values)
+    return '&'.join(items)
+
+
+def _request_term(request):
+    term = request.query_params.get('term') or request.query_params.get('semester')
+    return term or None
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since
+        return if_none_match.strip() == '*' or etag in parse_etags(if_none_match)
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return (
+        if_modified_since is not None
+        and last_modified is not None
+        and int(last_modified) <= if_modified_since
+    )
+
+
+def _catalog_digest(request, exclude=(), courses_only=False):
+    term = _request_term(request)
+    # Course-only documents outside a term do not move with section edits
+    version = get_course_version() if courses_only and term is None else get_catalog_version(term)
+    raw_key = '|'.join([
+        request.get_host(), request.path, _normalized_query(request, exclude), str(version)
+    ])
+    return hashlib.sha256(raw_key.encode()).hexdigest()
+
+
+def _catalog_key(request, courses_only=False):
+    """Return the cache key and ETag for a request at the current catalog version."""
+    digest = _catalog_digest(request, courses_only=courses_only)
+    return f'{CACHE_KEY_PREFIX}:{digest}', f'"{digest[:32]}"'
+
+
+def filter_cache_key(request, namespace):
+    """
+    Cache key for data that depends on a request's filters but not on the
+    page being viewed, scoped to the current catalog version.
+    """
+    return f'courses:{namespace}:{_catalog_digest(request, exclude=PAGING_PARAMS)}'
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _section_payloads(data):
+    """The serialized sections in a list, paginated or detail response body."""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        if isinstance(data.get('results'), list):
+            return data['results']
+        if 'id' in data:
+            return [data]
+    return []
+
+
+def _seated_sections(data):
+    return [section for section in _section_payloads(data) if 'current_enrollment' in section]
+
+
+def overlay_seat_counts(data):
+    """Replace the seat fields of the sections in ``data`` with their current counts, in place."""
+    sections = _seated_sections(data)
+    if not sections:
+        return
+    rows = CourseSection.objects.filter(
+        id__in={section['id'] for section in sections}
+    ).values_list('id', 'current_enrollment', 'max_enrollment')
+    counts = {section_id: (current, maximum) for section_id, current, maximum in rows}
+
+    for section in sections:
+        if section['id'] in counts:
+            current, maximum = counts[section['id']]
+            state = seat_state(current, maximum)
+            # Same definition as the serializers, which do not clamp at zero
+            state['available_seats'] = maximum - current
+            section.update(state)
+
+
+def _seat_digest(data) -> str:
+    counts = sorted(
+        (section['id'], section['current_enrollment'], section['max_enrollment'])
+        for section in _seated_sections(data)
+    )
+    return hashlib.sha256(repr(counts).encode()).hexdigest()
+
+
+def cache_catalog_response(skip_params=(), live_seats=False):
+    """
+    Cache a catalog action's response per catalog version and query.
+
+    ``skip_params`` lists query parameters that make a response depend on
+    live seat counts; requests using any of them bypass the cache. With
+    ``live_seats`` the cached sections are given current seat counts on
+    every request (see ``overlay_seat_counts``).
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if any(request.query_params.get(name) for name in skip_params):
+                return view_method(self, request, *args, **kwargs)
+
+            cache_key, etag = _catalog_key(request)
+            cached = cache.get(cache_key)
+            if cached is None:
+                if not live_seats and _not_modified(request, etag, None):
+                    # The ETag embeds the version, so a match is still fresh
+                    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                data, last_modified = response.data, timezone.now().timestamp()
+                cache.set(
+                    cache_key,
+                    (data, last_modified),
+                    timeout=getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+                )
+            else:
+                data, last_modified = cached
+                response = None
+
+            if live_seats:
+                # A response just built already has current counts
+                if response is None:
+                    overlay_seat_counts(data)
+                etag = f'"{hashlib.sha256((etag + _seat_digest(data)).encode()).hexdigest()[:32]}"'
+                last_modified = None
+
+            if _not_modified(request, etag, last_modified):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            elif response is None:
+                response = Response(data)
+
+            return _set_validators(response, etag, last_modified)
+
+        return wrapper
+    return decorator
+
+
+def stream_catalog_json(request, build_chunks, courses_only=False):
+    """
+    Stream a cached JSON document for a catalog request.
+
+    ``build_chunks`` returns the document as a list of encoded byte
+    strings. It only runs when the current catalog version has no cached
+    copy, so a large payload is encoded once per version and then written
+    to clients chunk by chunk instead of being joined into one body.
+    Documents built from course data alone pass ``courses_only`` so they
+    are keyed on the course version and survive section edits.
+    """
+    cache_key, etag = _catalog_key(request, courses_only)
+
+    cached = cache.get(cache_key)
+    if cached is None:
+        if _not_modified(request, etag, None):
+            return HttpResponseNotModified(headers={'ETag': etag})
+        chunks, last_modified = build_chunks(), timezone.now().timestamp()
+        cache.set(
+            cache_key,
+            (chunks, last_modified),
+            timeout=getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+        )
+    else:
+        chunks, last_modified = cached
+        if _not_modified(request, etag, last_modified):
+            return _set_validators(HttpResponseNotModified(), etag, last_modified)
+
+    response = StreamingHttpResponse(iter(chunks), content_type='application/json')
+    return _set_validators(response, etag, last_modified)
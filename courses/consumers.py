@@ -0,0 +1,136 @@
+import asyncio
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from .seats import seat_group, seat_state
+
+# Largest number of sections one connection may watch
+MAX_SUBSCRIPTIONS = 200
+
+
+class SeatAvailabilityConsumer(AsyncJsonWebsocketConsumer):
+    """
+    WebSocket consumer pushing live seat counts for chosen sections.
+
+    Clients send ``{"action": "subscribe", "sections": [1, 2]}`` (or
+    ``"unsubscribe"``) and receive the current counts straight away, then
+    ``{"type": "seats", "sections": {"1": {...}}}`` frames as they change.
+
+    Updates are coalesced per connection: a section is sent at most once
+    per ``SEAT_UPDATE_INTERVAL`` seconds, only its latest counts are kept
+    while it waits, and counts equal to the last ones sent are dropped.
+    Sections that become due together share one frame.
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        self.interval = getattr(settings, 'SEAT_UPDATE_INTERVAL', 1.0)
+        self.sections = set()
+        self.pending = {}
+        self.last_sent = {}
+        self.sent_state = {}
+        self.flush_task = None
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if getattr(self, 'flush_task', None) is not None:
+            self.flush_task.cancel()
+        for section_id in getattr(self, 'sections', ()):
+            await self.channel_layer.group_discard(seat_group(section_id), self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if not isinstance(content, dict):
+            await self.send_json({'type': 'error', 'error': 'Messages must be JSON objects'})
+            return
+        action = content.get('action')
+        try:
+            section_ids = {int(section_id) for section_id in content.get('sections', [])}
+        except (TypeError, ValueError):
+            await self.send_json({'type': 'error', 'error': 'sections must be a list of ids'})
+            return
+
+        if action == 'subscribe':
+            section_ids -= self.sections
+            if len(self.sections) + len(section_ids) > MAX_SUBSCRIPTIONS:
+                await self.send_json({
+                    'type': 'error',
+                    'error': f'At most {MAX_SUBSCRIPTIONS} sections may be watched at once'
+                })
+                return
+            for section_id in section_ids:
+                await self.channel_layer.group_add(seat_group(section_id), self.channel_name)
+            self.sections |= section_ids
+
+            snapshot = await self.get_seat_counts(section_ids)
+            loop_time = asyncio.get_running_loop().time()
+            for section_id, state in snapshot.items():
+                self.sent_state[section_id] = state
+                self.last_sent[section_id] = loop_time
+            await self.send_json({
+                'type': 'seats',
+                'sections': {str(section_id): state for section_id, state in snapshot.items()}
+            })
+        elif action == 'unsubscribe':
+            for section_id in section_ids & self.sections:
+                await self.channel_layer.group_discard(seat_group(section_id), self.channel_name)
+                self.pending.pop(section_id, None)
+                self.last_sent.pop(section_id, None)
+                self.sent_state.pop(section_id, None)
+            self.sections -= section_ids
+        else:
+            await self.send_json({'type': 'error', 'error': 'Unknown action'})
+
+    async def seats_update(self, event):
+        """Receive a seat count change from a section group."""
+        section_id = event['section_id']
+        if section_id not in self.sections:
+            return
+        self.pending[section_id] = seat_state(event['current_enrollment'], event['max_enrollment'])
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        if self.flush_task is not None or not self.pending:
+            return
+        now = asyncio.get_running_loop().time()
+        due = min(
+            self.last_sent.get(section_id, float('-inf')) + self.interval
+            for section_id in self.pending
+        )
+        self.flush_task = asyncio.create_task(self.flush(max(0.0, due - now)))
+
+    async def flush(self, delay):
+        """Send every pending section whose interval has elapsed."""
+        if delay:
+            await asyncio.sleep(delay)
+        self.flush_task = None
+
+        now = asyncio.get_running_loop().time()
+        changes = {}
+        for section_id in list(self.pending):
+            if now - self.last_sent.get(section_id, float('-inf')) < self.interval:
+                continue
+            state = self.pending.pop(section_id)
+            if state == self.sent_state.get(section_id):
+                continue
+            changes[str(section_id)] = state
+            self.sent_state[section_id] = state
+            self.last_sent[section_id] = now
+
+        if changes:
+            await self.send_json({'type': 'seats', 'sections': changes})
+        self.schedule_flush()
+
+    @database_sync_to_async
+    def get_seat_counts(self, section_ids):
+        from .models import CourseSection
+
+        rows = CourseSection.objects.filter(id__in=section_ids).values_list(
+            'id', 'current_enrollment', 'max_enrollment'
+        )
+        return {section_id: seat_state(current, maximum) for section_id, current, maximum in rows}
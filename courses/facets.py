@@ -0,0 +1,106 @@
+"""
+Facet counts for catalog search.
+
+All facets for a filtered queryset come from a single grouped query. On
+PostgreSQL the query uses ``GROUPING SETS`` so each facet is grouped on its
+own; elsewhere the queryset is grouped by every facet column at once and
+the combinations are rolled up per facet in Python.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, F
+
+# Facet name -> field path on CourseSection
+SECTION_FACETS = {
+    'department': 'course__department',
+    'term': 'term',
+    'level': 'course__level',
+    'campus': 'campus',
+    'credits': 'course__credits',
+}
+
+# Facet name -> field path on Course
+COURSE_FACETS = {
+    'department': 'department',
+    'level': 'level',
+    'credits': 'credits',
+}
+
+
+def _sorted_buckets(counts) -> List[dict]:
+    return [
+        {'value': value, 'count': count}
+        for value, count in sorted(
+            counts.items(), key=lambda item: (item[0] is None, item[0] if item[0] is not None else 0)
+        )
+    ]
+
+
+def _rolled_up(queryset, facets) -> Dict[str, dict]:
+    counts = {name: defaultdict(int) for name in facets}
+    combinations = queryset.values_list(*facets.values()).annotate(facet_count=Count('id'))
+    for row in combinations:
+        *values, count = row
+        for name, value in zip(facets, values):
+            counts[name][value] += count
+    return counts
+
+
+def _grouping_sets(queryset, facets) -> Dict[str, dict]:
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    aliases = {name: f'facet_{name}' for name in facets}
+
+    inner = queryset.annotate(
+        **{aliases[name]: F(path) for name, path in facets.items()}
+    ).values(*aliases.values())
+    inner_sql, params = inner.query.sql_with_params()
+
+    columns = [quote(alias) for alias in aliases.values()]
+    sql = (
+        f'SELECT {", ".join(columns)}, '
+        f'{", ".join(f"GROUPING({column})" for column in columns)}, COUNT(*) '
+        f'FROM ({inner_sql}) AS facet_rows '
+        f'GROUP BY GROUPING SETS ({", ".join(f"({column})" for column in columns)})'
+    )
+
+    counts = {name: defaultdict(int) for name in facets}
+    names = list(facets)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for row in cursor.fetchall():
+            values, grouped, count = row[:len(names)], row[len(names):-1], row[-1]
+            # GROUPING() is 0 for the column this row was grouped by
+            position = list(grouped).index(0)
+            counts[names[position]][values[position]] += count
+    return counts
+
+
+def compute_facets(queryset, facets) -> Dict[str, List[dict]]:
+    """
+    Return ``{facet: [{'value': ..., 'count': ...}, ...]}`` for ``queryset``.
+
+    ``facets`` maps facet names to field paths, e.g. ``SECTION_FACETS``.
+    """
+    queryset = queryset.order_by().select_related(None).prefetch_related(None)
+    if connections[queryset.db].vendor == 'postgresql':
+        counts = _grouping_sets(queryset, facets)
+    else:
+        counts = _rolled_up(queryset, facets)
+    return {name: _sorted_buckets(counts[name]) for name in facets}
+
+
+def get_facets(queryset, facets, cache_key: Optional[str] = None) -> Dict[str, List[dict]]:
+    """Facet counts for ``queryset``, cached under ``cache_key`` when given."""
+    if cache_key is None:
+        return compute_facets(queryset, facets)
+
+    result = cache.get(cache_key)
+    if result is None:
+        result = compute_facets(queryset, facets)
+        cache.set(cache_key, result, timeout=getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300))
+    return result
@@ -0,0 +1,188 @@
+"""
+Fast read path for the catalog list endpoints.
+
+List actions read plain ``values()`` rows and turn each row into the
+response dict with a mapper whose per-field work is resolved once, when
+the mapper is built: a column lookup, an optional conversion reused from
+the DRF field that would have rendered it, or a small computed value.
+This skips model instantiation and DRF's per-field serializer machinery
+while producing the same JSON as ``CourseSerializer`` and
+``CourseSectionSerializer``.
+
+Nested course details on sections are an expansion the caller opts into;
+the viewsets enable it by default so the response shape is unchanged.
+"""
+import re
+from collections import defaultdict
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from rest_framework import serializers
+
+from .models import Course
+
+_COURSE_NUMBER_RE = re.compile(r'\d+')
+
+_datetime = serializers.DateTimeField()
+_time = serializers.TimeField()
+
+
+def column(source: str, convert: Callable = None) -> Callable:
+    """Read ``source`` from a row, converting non-null values with ``convert``."""
+    get = itemgetter(source)
+    if convert is None:
+        return get
+
+    def read(row):
+        value = get(row)
+        return None if value is None else convert(value)
+    return read
+
+
+class RowMapper:
+    """
+    Map ``values()`` rows to response dicts.
+
+    ``fields`` is a sequence of ``(name, reader)`` pairs in output order,
+    where ``reader`` takes the row and returns the value.
+    """
+
+    def __init__(self, fields: Sequence[Tuple[str, Callable]]):
+        self.fields = tuple(fields)
+
+    def __call__(self, row: dict) -> dict:
+        return {name: read(row) for name, read in self.fields}
+
+    def map(self, rows: Iterable[dict]) -> List[dict]:
+        fields = self.fields
+        return [{name: read(row) for name, read in fields} for row in rows]
+
+
+def _course_number(code: str) -> str:
+    match = _COURSE_NUMBER_RE.search(code)
+    return match.group() if match else ''
+
+
+def course_mapper(prefix: str = '') -> RowMapper:
+    """Mapper matching ``CourseSerializer`` for columns named ``prefix + field``."""
+    prerequisites = itemgetter(prefix + 'prerequisite_details')
+    return RowMapper([
+        ('id', column(prefix + 'id')),
+        ('course_code', column(prefix + 'course_code')),
+        ('course_number', column(prefix + 'course_code', _course_number)),
+        ('title', column(prefix + 'title')),
+        ('description', column(prefix + 'description')),
+        ('credits', column(prefix + 'credits')),
+        ('department', column(prefix + 'department')),
+        ('level', column(prefix + 'level')),
+        ('prerequisites', lambda row: [prereq['id'] for prereq in prerequisites(row)]),
+        ('prerequisite_details', prerequisites),
+        ('is_active', column(prefix + 'is_active')),
+        ('created_at', column(prefix + 'created_at', _datetime.to_representation)),
+        ('updated_at', column(prefix + 'updated_at', _datetime.to_representation)),
+    ])
+
+
+def _instructor_name(row):
+    if row['instructor'] is None:
+        return None
+    return f"{row['instructor__first_name']} {row['instructor__last_name']}".strip()
+
+
+def section_mapper(expand_course: bool = True) -> RowMapper:
+    """
+    Mapper matching ``CourseSectionSerializer``.
+
+    With ``expand_course=False`` the nested ``course_details`` object is
+    left out and only the course id is returned.
+    """
+    fields = [
+        ('id', column('id')),
+        ('course', column('course')),
+    ]
+    if expand_course:
+        fields.append(('course_details', course_mapper(prefix='course__')))
+    fields += [
+        ('section_number', column('section_number')),
+        ('term', column('term')),
+        ('year', column('year')),
+        ('instructor', column('instructor')),
+        ('instructor_name', _instructor_name),
+        ('max_enrollment', column('max_enrollment')),
+        ('current_enrollment', column('current_enrollment')),
+        ('location', column('location')),
+        ('meeting_days', column('meeting_days')),
+        ('start_time', column('start_time', _time.to_representation)),
+        ('end_time', column('end_time', _time.to_representation)),
+        ('is_available', column('is_available')),
+        ('is_full', lambda row: row['current_enrollment'] >= row['max_enrollment']),
+        ('available_seats', lambda row: row['max_enrollment'] - row['current_enrollment']),
+        ('created_at', column('created_at', _datetime.to_representation)),
+        ('updated_at', column('updated_at', _datetime.to_representation)),
+    ]
+    return RowMapper(fields)
+
+
+COURSE_COLUMNS = (
+    'id', 'course_code', 'title', 'description', 'credits', 'department',
+    'level', 'is_active', 'created_at', 'updated_at',
+)
+
+SECTION_COLUMNS = (
+    'id', 'course', 'section_number', 'term', 'year', 'instructor',
+    'instructor__first_name', 'instructor__last_name', 'max_enrollment',
+    'current_enrollment', 'location', 'meeting_days', 'start_time', 'end_time',
+    'is_available', 'created_at', 'updated_at',
+)
+
+COURSE_MAPPER = course_mapper()
+SECTION_MAPPER = section_mapper()
+FLAT_SECTION_MAPPER = section_mapper(expand_course=False)
+
+
+def course_rows(queryset):
+    """Turn a course queryset into a ``values()`` queryset for ``serialize_courses``."""
+    return queryset.prefetch_related(None).values(*COURSE_COLUMNS)
+
+
+def section_rows(queryset, expand_course: bool = True):
+    """Turn a section queryset into a ``values()`` queryset for ``serialize_sections``."""
+    columns = SECTION_COLUMNS
+    if expand_course:
+        columns += tuple(f'course__{name}' for name in COURSE_COLUMNS)
+    return queryset.select_related(None).prefetch_related(None).values(*columns)
+
+
+def prerequisite_details(course_ids: Iterable[int]) -> Dict[int, List[dict]]:
+    """Prerequisite ``{id, course_code, title}`` lists for many courses in one query."""
+    details = defaultdict(list)
+    course_ids = set(course_ids)
+    if not course_ids:
+        return details
+
+    through = Course.prerequisites.through
+    rows = through.objects.filter(from_course_id__in=course_ids).order_by(
+        'to_course__course_code'
+    ).values_list('from_course_id', 'to_course_id', 'to_course__course_code', 'to_course__title')
+    for course_id, prereq_id, code, title in rows:
+        details[course_id].append({'id': prereq_id, 'course_code': code, 'title': title})
+    return details
+
+
+def serialize_courses(rows: List[dict]) -> List[dict]:
+    """Serialize rows from ``course_rows`` like ``CourseSerializer(many=True)``."""
+    details = prerequisite_details(row['id'] for row in rows)
+    for row in rows:
+        row['prerequisite_details'] = details.get(row['id'], [])
+    return COURSE_MAPPER.map(rows)
+
+
+def serialize_sections(rows: List[dict], expand_course: bool = True) -> List[dict]:
+    """Serialize rows from ``section_rows`` like ``CourseSectionSerializer(many=True)``."""
+    if not expand_course:
+        return FLAT_SECTION_MAPPER.map(rows)
+
+    details = prerequisite_details(row['course'] for row in rows)
+    for row in rows:
+        row['course__prerequisite_details'] = details.get(row['course'], [])
+    return SECTION_MAPPER.map(rows)
@@ -0,0 +1,114 @@
+"""
+Management command measuring seat-update fan-out through SeatAvailabilityConsumer.
+
+Connections are opened in-process against an in-memory channel layer, so
+no server or Redis is needed. Each connection watches a slice of the
+sections; a burst of seat updates is published and the command reports
+how long subscribers take to converge on the final counts and how many
+frames coalescing saved.
+"""
+import asyncio
+import statistics
+import time as clock
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from courses.routing import websocket_urlpatterns
+from courses.seats import seat_group
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark live seat-count fan-out over an in-memory channel layer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=500, help='WebSocket connections')
+        parser.add_argument('--sections', type=int, default=20, help='Distinct sections updated')
+        parser.add_argument('--watch', type=int, default=5, help='Sections watched per connection')
+        parser.add_argument('--updates', type=int, default=1000, help='Seat updates published')
+        parser.add_argument(
+            '--interval', type=float, default=0.5,
+            help='Per-section update interval in seconds (SEAT_UPDATE_INTERVAL)'
+        )
+
+    def handle(self, *args, **options):
+        layers = {
+            'default': {
+                'BACKEND': 'channels.layers.InMemoryChannelLayer',
+                'CONFIG': {'capacity': 10000},
+            }
+        }
+        with override_settings(CHANNEL_LAYERS=layers, SEAT_UPDATE_INTERVAL=options['interval']):
+            async_to_sync(self.run)(**options)
+
+    async def run(self, connections, sections, watch, updates, interval, **options):
+        application = URLRouter(websocket_urlpatterns)
+        # Unsaved users are authenticated, which is all the consumer checks
+        user = User(username='benchmark')
+
+        clients = []
+        for n in range(connections):
+            communicator = WebsocketCommunicator(application, '/ws/seats/')
+            communicator.scope['user'] = user
+            await communicator.connect()
+            watched = {(n + k) % sections + 1 for k in range(watch)}
+            await communicator.send_json_to({'action': 'subscribe', 'sections': sorted(watched)})
+            await communicator.receive_json_from(timeout=30)
+            clients.append((communicator, watched))
+
+        channel_layer = get_channel_layer()
+        final = {}
+        start = clock.perf_counter()
+        for n in range(updates):
+            section_id = n % sections + 1
+            final[section_id] = n + 1
+            await channel_layer.group_send(seat_group(section_id), {
+                'type': 'seats.update',
+                'section_id': section_id,
+                'current_enrollment': n + 1,
+                'max_enrollment': updates + 1,
+            })
+        publish_time = clock.perf_counter() - start
+
+        results = await asyncio.gather(*[
+            self.converge(communicator, watched, final, start, interval)
+            for communicator, watched in clients
+        ])
+        for communicator, _ in clients:
+            await communicator.disconnect()
+
+        latencies = sorted(latency for latency, _ in results)
+        frames = sum(count for _, count in results)
+        naive = sum(
+            sum(1 for n in range(updates) if n % sections + 1 in watched)
+            for _, watched in clients
+        )
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{connections} connections x {watch} sections, {updates} updates, interval {interval}s'
+        ))
+        self.stdout.write(f'  publish burst       {publish_time * 1000:10.1f} ms')
+        self.stdout.write(f'  converged p50       {statistics.median(latencies) * 1000:10.1f} ms')
+        self.stdout.write(f'  converged p95       {latencies[int(len(latencies) * 0.95) - 1] * 1000:10.1f} ms')
+        self.stdout.write(f'  converged max       {latencies[-1] * 1000:10.1f} ms')
+        self.stdout.write(f'  frames sent         {frames:10d}')
+        self.stdout.write(f'  uncoalesced frames  {naive:10d}')
+
+    async def converge(self, communicator, watched, final, start, interval):
+        """Read frames until every watched section shows its final count."""
+        remaining = {section_id for section_id in watched if section_id in final}
+        frames = 0
+        while remaining:
+            message = await communicator.receive_json_from(timeout=interval * 4 + 10)
+            frames += 1
+            for section_id, state in message['sections'].items():
+                if final.get(int(section_id)) == state['current_enrollment']:
+                    remaining.discard(int(section_id))
+        return clock.perf_counter() - start, frames
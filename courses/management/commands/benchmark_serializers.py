@@ -0,0 +1,111 @@
+"""
+Management command comparing the DRF serializers with the values() fast path.
+
+Synthetic courses and sections are created inside a transaction that is
+rolled back afterwards, so the command can be run against any database.
+"""
+import statistics
+import time as clock
+from datetime import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses.fast_serializers import (
+    course_rows, section_rows, serialize_courses, serialize_sections,
+)
+from courses.models import Course, CourseSection
+from courses.serializers import CourseSerializer, CourseSectionSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark catalog list serialization: DRF serializers vs values() fast path'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            nargs='+',
+            default=[1000, 10000],
+            help='Row counts to benchmark (default: 1000 10000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per measurement; the median is reported',
+        )
+
+    def handle(self, *args, **options):
+        for rows in options['rows']:
+            with transaction.atomic():
+                self._create_catalog(rows)
+                self._benchmark(rows, options['repeat'])
+                transaction.set_rollback(True)
+
+    def _create_catalog(self, rows):
+        instructor = User.objects.create_user(
+            username='benchmark.instructor', first_name='Bench', last_name='Mark'
+        )
+        courses = Course.objects.bulk_create([
+            Course(
+                course_code=f'BEN{n:05d}', title=f'Benchmark Course {n}', credits=3,
+                department=f'Department {n % 20}', description='Synthetic benchmark course'
+            )
+            for n in range(rows)
+        ])
+        through = Course.prerequisites.through
+        through.objects.bulk_create([
+            through(from_course_id=course.id, to_course_id=courses[n - 1].id)
+            for n, course in enumerate(courses) if n % 3 == 0 and n > 0
+        ])
+        CourseSection.objects.bulk_create([
+            CourseSection(
+                course=course, section_number='001', crn=f'9{n:06d}', term='Fall', year=2024,
+                instructor=instructor if n % 2 else None, location='Benchmark Hall',
+                meeting_days='MWF', start_time=time(9, 0), end_time=time(10, 0)
+            )
+            for n, course in enumerate(courses)
+        ])
+
+    def _benchmark(self, rows, repeat):
+        courses = Course.objects.filter(course_code__startswith='BEN').prefetch_related('prerequisites')
+        sections = CourseSection.objects.filter(crn__startswith='9').select_related('course', 'instructor')
+
+        cases = [
+            (
+                'courses',
+                lambda: CourseSerializer(courses.all(), many=True).data,
+                lambda: serialize_courses(list(course_rows(courses.all()))),
+            ),
+            (
+                'sections',
+                lambda: CourseSectionSerializer(
+                    sections.prefetch_related('course__prerequisites'), many=True
+                ).data,
+                lambda: serialize_sections(list(section_rows(sections.all()))),
+            ),
+        ]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{rows} rows'))
+        for name, drf, fast in cases:
+            if [dict(item) for item in drf()] != fast():
+                self.stdout.write(self.style.ERROR(f'  {name}: fast path output differs'))
+            drf_time = self._time(drf, repeat)
+            fast_time = self._time(fast, repeat)
+            self.stdout.write(
+                f'  {name:<9} DRF {drf_time * 1000:8.1f} ms   '
+                f'fast {fast_time * 1000:8.1f} ms   '
+                f'speedup {drf_time / fast_time:5.1f}x'
+            )
+
+    def _time(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = clock.perf_counter()
+            func()
+            timings.append(clock.perf_counter() - start)
+        return statistics.median(timings)
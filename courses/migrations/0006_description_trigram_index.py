@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def create_description_index(apps, schema_editor):
+    """Lets description matches use the same GIN trigram lookup as the other fields."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS courses_description_trgm ON courses USING gin (description gin_trgm_ops)"
+    )
+
+
+def drop_description_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS courses_description_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0005_trigram_search"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_description_index, drop_description_index),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from authentication.models import User
+from infrastructure.tracking import TrackedFieldsMixin
 
 
 class Course(models.Model):
@@ -79,9 +80,14 @@ class Course(models.Model):
         return match.group() if match else ''
 
 
-class CourseSection(models.Model):
+class CourseSection(TrackedFieldsMixin, models.Model):
     """Model representing a specific section of a course in a given term."""
     
+    # Stored values kept in memory for change detection: the term so moving
+    # a section invalidates both terms, and the schedule fields students are
+    # notified about
+    tracked_fields = ('term', 'meeting_days', 'start_time', 'end_time', 'location', 'instructor_id')
+    
     class DayOfWeek(models.TextChoices):
         MONDAY = 'MON', _('Monday')
         TUESDAY = 'TUE', _('Tuesday')
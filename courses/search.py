@@ -0,0 +1,205 @@
+"""
+Typo-tolerant catalog search.
+
+On PostgreSQL the ``pg_trgm`` extension does the fuzzy matching in the
+database, using GIN trigram indexes and ranking by field-weighted word
+similarity. Everywhere else (SQLite development setups) an in-process
+index is used: a trigram table maps every trigram to the vocabulary words
+containing it, so a misspelled query word is expanded to similar words
+without scanning the catalog, and the expanded words are scored against
+courses with BM25 using the same field weights.
+"""
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connection
+
+from .models import Course
+from .versioning import get_catalog_version
+
+# Relative importance of each course field when scoring a match
+FIELD_WEIGHTS = {
+    'course_code': 3.0,
+    'title': 2.0,
+    'department': 1.0,
+    'description': 0.5,
+}
+
+# Minimum trigram similarity for a vocabulary word to count as a match
+SIMILARITY_THRESHOLD = 0.3
+
+# BM25 tuning constants
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD_RE = re.compile(r'[a-z]+|[0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-case alphabetic and numeric words."""
+    return _WORD_RE.findall(text.lower())
+
+
+def trigrams(word: str) -> set:
+    """Return the trigram set of a word, padded the same way pg_trgm pads."""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FuzzySearchIndex:
+    """
+    BM25 index over course fields with a precomputed trigram vocabulary.
+
+    ``postings`` maps a word to ``{doc: weighted term frequency}`` and
+    ``vocabulary_trigrams`` maps a trigram to the words containing it, so
+    expanding a query word only touches words that share a trigram with it.
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.doc_ids: List[int] = []
+        self.doc_lengths: List[float] = []
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+
+        for doc, row in enumerate(rows):
+            self.doc_ids.append(row['id'])
+            length = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                words = tokenize(row[field] or '')
+                if field == 'course_code':
+                    # Also index the whole code so 'cs101' matches 'CS101'
+                    words.append(''.join(words))
+                for word in words:
+                    self.postings[word][doc] = self.postings[word].get(doc, 0.0) + weight
+                length += weight * len(words)
+            self.doc_lengths.append(length)
+
+        self.average_length = (
+            sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0.0
+        )
+
+        self.word_trigrams: Dict[str, set] = {}
+        self.vocabulary_trigrams: Dict[str, List[str]] = defaultdict(list)
+        for word in self.postings:
+            grams = trigrams(word)
+            self.word_trigrams[word] = grams
+            for gram in grams:
+                self.vocabulary_trigrams[gram].append(word)
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def expand(self, word: str) -> Dict[str, float]:
+        """Return vocabulary words similar to ``word`` mapped to their similarity."""
+        if word in self.postings:
+            return {word: 1.0}
+
+        query_grams = trigrams(word)
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for candidate in self.vocabulary_trigrams.get(gram, ()):
+                shared[candidate] += 1
+
+        expansions = {}
+        for candidate, count in shared.items():
+            union = len(query_grams) + len(self.word_trigrams[candidate]) - count
+            similarity = count / union
+            if similarity >= SIMILARITY_THRESHOLD:
+                expansions[candidate] = similarity
+        return expansions
+
+    def _idf(self, word: str) -> float:
+        df = len(self.postings[word])
+        n = len(self.doc_ids)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str) -> List[Tuple[int, float]]:
+        """Return ``(course_id, score)`` pairs for ``query``, best match first."""
+        scores: Dict[int, float] = defaultdict(float)
+
+        for word in tokenize(query):
+            best_for_word: Dict[int, float] = {}
+            for term, similarity in self.expand(word).items():
+                idf = self._idf(term)
+                for doc, tf in self.postings[term].items():
+                    norm = 1 - BM25_B + BM25_B * self.doc_lengths[doc] / self.average_length
+                    score = similarity * idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+                    # A query word contributes its best-matching expansion only
+                    if score > best_for_word.get(doc, 0.0):
+                        best_for_word[doc] = score
+            for doc, score in best_for_word.items():
+                scores[doc] += score
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.doc_ids[item[0]]))
+        return [(self.doc_ids[doc], score) for doc, score in ranked]
+
+
+def build_fuzzy_search_index(version=None) -> FuzzySearchIndex:
+    """Build an index from a snapshot of the active catalog."""
+    rows = Course.objects.filter(is_active=True).order_by('id').values(
+        'id', *FIELD_WEIGHTS.keys()
+    )
+    return FuzzySearchIndex(rows, version=version)
+
+
+_index: Optional[FuzzySearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_fuzzy_search_index() -> FuzzySearchIndex:
+    """Return this process's index, rebuilding it if the catalog has changed."""
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = build_fuzzy_search_index(version=version)
+        return _index
+
+
+def _pg_trgm_search(queryset, query: str) -> List[Tuple[int, float]]:
+    """Rank courses with pg_trgm word similarity, weighted per field."""
+    from django.contrib.postgres.search import TrigramWordSimilarity
+    from django.db.models import FloatField, Q, Value
+    from django.db.models.functions import Coalesce
+
+    # An empty field scores 0 rather than turning the whole sum NULL
+    score = sum(
+        Coalesce(TrigramWordSimilarity(query, field), Value(0.0), output_field=FloatField()) * weight
+        for field, weight in FIELD_WEIGHTS.items()
+    ) / sum(FIELD_WEIGHTS.values())
+
+    # The %> filters are served by the GIN trigram indexes
+    matches = queryset.filter(
+        Q(course_code__trigram_word_similar=query) |
+        Q(title__trigram_word_similar=query) |
+        Q(department__trigram_word_similar=query) |
+        Q(description__trigram_word_similar=query)
+    ).annotate(fuzzy_score=score).order_by('-fuzzy_score', 'course_code')
+
+    return list(matches.values_list('id', 'fuzzy_score'))
+
+
+def fuzzy_search(queryset, query: str) -> List[int]:
+    """
+    Return the ids of courses in ``queryset`` that fuzzily match ``query``,
+    ordered best match first.
+    """
+    if connection.vendor == 'postgresql':
+        return [course_id for course_id, _ in _pg_trgm_search(queryset, query)]
+
+    ranked = get_fuzzy_search_index().search(query)
+    if not ranked:
+        return []
+
+    # Honour any filters already applied to the queryset
+    allowed = set(queryset.filter(
+        id__in=[course_id for course_id, _ in ranked]
+    ).values_list('id', flat=True))
+    return [course_id for course_id, _ in ranked if course_id in allowed]
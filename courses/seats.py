@@ -0,0 +1,57 @@
+"""
+Live seat-count publishing.
+
+Every change to a section's enrollment count is published to a channel
+layer group for that section once the surrounding transaction commits.
+``SeatAvailabilityConsumer`` subscribes WebSocket clients to these groups
+and coalesces the updates it forwards.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+SEAT_GROUP = 'seats.section.{section_id}'
+
+
+def seat_group(section_id) -> str:
+    return SEAT_GROUP.format(section_id=int(section_id))
+
+
+def seat_state(current_enrollment: int, max_enrollment: int) -> dict:
+    """The seat fields sent to clients for one section."""
+    return {
+        'current_enrollment': current_enrollment,
+        'max_enrollment': max_enrollment,
+        'available_seats': max(0, max_enrollment - current_enrollment),
+        'is_full': current_enrollment >= max_enrollment,
+    }
+
+
+def publish_seat_counts(section):
+    """
+    Publish ``section``'s seat counts after the current transaction commits.
+
+    Rolled-back enrollments are never announced. Publishing problems are
+    logged rather than raised so registration does not depend on the
+    channel layer being reachable.
+    """
+    event = {
+        'type': 'seats.update',
+        'section_id': section.pk,
+        **seat_state(section.current_enrollment, section.max_enrollment),
+    }
+    transaction.on_commit(lambda: _send(event))
+
+
+def _send(event):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(seat_group(event['section_id']), event)
+    except Exception:
+        logger.warning('Could not publish seat counts for section %s', event['section_id'], exc_info=True)
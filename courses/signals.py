@@ -0,0 +1,38 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Course, CourseSection
+from .seats import publish_seat_counts
+from .versioning import bump_catalog_version
+
+# Saves limited to these fields only move seat counts; seat data is served
+# uncached, so they must not invalidate cached catalog responses.
+SEAT_FIELDS = frozenset({'current_enrollment', 'updated_at'})
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(m2m_changed, sender=Course.prerequisites.through)
+def invalidate_course_snapshots(sender, instance, action=None, **kwargs):
+    """Course data is shared by every term, so bump every version."""
+    if action is not None and not action.startswith('post_'):
+        # m2m_changed fires before and after; only react once
+        return
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=CourseSection)
+@receiver(post_delete, sender=CourseSection)
+def invalidate_section_snapshots(sender, instance, update_fields=None, **kwargs):
+    """Bump the versions of the term(s) the section belongs to."""
+    if update_fields and set(update_fields) <= SEAT_FIELDS:
+        return
+    bump_catalog_version(instance.term, instance.loaded_value('term'))
+
+
+@receiver(post_save, sender=CourseSection)
+def announce_seat_counts(sender, instance, created=False, update_fields=None, **kwargs):
+    """Push seat count changes to WebSocket subscribers once committed."""
+    if created or (update_fields and 'current_enrollment' not in update_fields):
+        return
+    publish_seat_counts(instance)
@@ -1,3 +1,645 @@
-from django.test import TestCase
+import json
+from datetime import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from . import facets
+from .autocomplete import get_autocomplete_index
+from .models import Course, CourseSection
+from .routing import websocket_urlpatterns
+from .seats import seat_group
+from .serializers import CourseSerializer, CourseSectionSerializer
+
+User = get_user_model()
+
+
+class AutocompleteIndexTestCase(TestCase):
+    """Test the in-process autocomplete index and endpoint."""
+
+    def setUp(self):
+        self.api_client = APIClient()
+        self.user = User.objects.create_user(
+            username='teststu',
+            password='testpass',
+            email='test@test.com'
+        )
+        self.api_client.force_authenticate(user=self.user)
+
+        self.cs101 = Course.objects.create(
+            course_code='CS101',
+            title='Introduction to Computer Science',
+            credits=3,
+            department='Computer Science',
+            description='Test course'
+        )
+        self.math201 = Course.objects.create(
+            course_code='MATH201',
+            title='Calculus II',
+            credits=4,
+            department='Mathematics',
+            description='Test course'
+        )
+        self.section = CourseSection.objects.create(
+            course=self.cs101,
+            section_number='001',
+            crn='40123',
+            term='Fall',
+            year=2024,
+            meeting_days='MWF',
+            start_time=time(9, 0),
+            end_time=time(10, 0)
+        )
+        CourseSection.objects.create(
+            course=self.math201,
+            section_number='001',
+            crn='50555',
+            term='Fall',
+            year=2024,
+            meeting_days='TTH',
+            start_time=time(11, 0),
+            end_time=time(12, 15)
+        )
+
+    def test_prefix_matches_code_crn_and_title(self):
+        """Course codes, CRNs and title words are all searchable by prefix."""
+        index = get_autocomplete_index()
+
+        self.assertEqual([s['course_code'] for s in index.search('cs 1')], ['CS101'])
+        self.assertEqual([s['crn'] for s in index.search('505')], ['50555'])
+        self.assertEqual([s['course_code'] for s in index.search('calc')], ['MATH201'])
+        self.assertEqual([s['course_code'] for s in index.search('computer sci')], ['CS101'])
+        self.assertEqual(index.search('zzz'), [])
+
+    def test_index_is_rebuilt_after_catalog_change(self):
+        """Saving a section invalidates the per-process snapshot."""
+        before = get_autocomplete_index()
+        self.assertEqual(len(before), 2)
+
+        CourseSection.objects.create(
+            course=self.cs101,
+            section_number='002',
+            crn='40124',
+            term='Spring',
+            year=2025,
+            meeting_days='TTH',
+            start_time=time(9, 0),
+            end_time=time(10, 15)
+        )
+
+        after = get_autocomplete_index()
+        self.assertIsNot(before, after)
+        self.assertEqual(len(after.search('cs101')), 2)
+
+    def test_autocomplete_endpoint_runs_no_queries_when_warm(self):
+        """A warm index answers without touching the database."""
+        get_autocomplete_index()
+
+        with self.assertNumQueries(0):
+            response = self.api_client.get('/api/sections/autocomplete/', {'q': 'intro'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['id'], self.section.id)
+
+
+class FuzzyCatalogSearchTestCase(TestCase):
+    """Test typo-tolerant, ranked catalog search."""
+
+    def setUp(self):
+        self.api_client = APIClient()
+        self.user = User.objects.create_user(
+            username='teststu',
+            password='testpass',
+            email='test@test.com'
+        )
+        self.api_client.force_authenticate(user=self.user)
+
+        self.database = Course.objects.create(
+            course_code='CS301',
+            title='Database Systems',
+            credits=3,
+            department='Computer Science',
+            description='Relational design, SQL and transactions.'
+        )
+        self.calculus = Course.objects.create(
+            course_code='MATH101',
+            title='Calculus I',
+            credits=4,
+            department='Mathematics',
+            description='Limits, derivatives and integrals.'
+        )
+        self.security = Course.objects.create(
+            course_code='CS410',
+            title='Computer Security',
+            credits=3,
+            department='Computer Science',
+            description='Threat models and applied cryptography; database hardening.'
+        )
+
+    def search(self, **params):
+        response = self.api_client.get('/api/courses/search_catalog/', params)
+        self.assertEqual(response.status_code, 200)
+        return [course['course_code'] for course in response.data['results']]
+
+    def test_misspelled_terms_find_courses(self):
+        """Misspellings that return nothing today are matched in fuzzy mode."""
+        self.assertEqual(self.search(q='databse'), [])
+        self.assertEqual(self.search(q='databse', fuzzy='true')[0], 'CS301')
+        self.assertEqual(self.search(q='calclus', fuzzy='true'), ['MATH101'])
+
+    def test_title_match_outranks_description_match(self):
+        """Field weights rank a title hit above a description hit."""
+        self.assertEqual(self.search(q='database', fuzzy='true'), ['CS301', 'CS410'])
+
+    def test_fuzzy_mode_honours_other_filters(self):
+        """Department and level filters still apply to fuzzy results."""
+        self.assertEqual(self.search(q='databse', fuzzy='true', department='Mathematics'), [])
+
+
+class CatalogPaginationTestCase(TestCase):
+    """Test server-side filtering and HTMX pagination of the catalog page."""
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(
+            username='teststu',
+            password='testpass',
+            email='test@test.com'
+        )
+        self.client.login(username='teststu', password='testpass')
+
+        cs = Course.objects.create(
+            course_code='CS101', title='Intro to CS', credits=3,
+            department='Computer Science', description='Test course'
+        )
+        math = Course.objects.create(
+            course_code='MATH101', title='Calculus I', credits=4,
+            department='Mathematics', description='Test course'
+        )
+        CourseSection.objects.bulk_create([
+            CourseSection(
+                course=cs, section_number=f'{n:03d}', crn=f'1{n:04d}', term='Fall', year=2024,
+                meeting_days='MWF', start_time=time(9, 0), end_time=time(10, 0)
+            )
+            for n in range(60)
+        ] + [
+            CourseSection(
+                course=math, section_number='001', crn='20001', term='Spring', year=2025,
+                meeting_days='TTH', start_time=time(9, 0), end_time=time(10, 15)
+            )
+        ])
+
+    def test_initial_page_renders_one_page_with_facets(self):
+        """Only the first page of rows is rendered, with a scroll sentinel."""
+        response = self.client.get(reverse('courses:catalog'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['sections']), 50)
+        self.assertEqual(list(response.context['departments']), ['Computer Science', 'Mathematics'])
+        self.assertEqual(list(response.context['terms']), ['Fall', 'Spring'])
+        self.assertEqual(response.context['total_sections'], 61)
+        self.assertContains(response, 'data-testid="catalog-next-page"')
+
+    def test_htmx_request_returns_rows_partial(self):
+        """HTMX requests receive the next page of rows without the page shell."""
+        response = self.client.get(
+            reverse('courses:catalog'), {'page': 2}, HTTP_HX_REQUEST='true'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['sections']), 11)
+        self.assertNotContains(response, '<html')
+        self.assertNotContains(response, 'data-testid="catalog-next-page"')
+
+    def test_history_restore_gets_the_full_page(self):
+        """Back-button restores of a pushed URL render the whole page."""
+        response = self.client.get(
+            reverse('courses:catalog'), {'subject': 'Mathematics'},
+            HTTP_HX_REQUEST='true', HTTP_HX_HISTORY_RESTORE_REQUEST='true'
+        )
+        self.assertContains(response, '<html')
+        self.assertEqual(list(response.context['departments']), ['Computer Science', 'Mathematics'])
+
+    def test_page_and_partial_vary_on_hx_request(self):
+        """Caches keep the page and the partial at the same URL apart."""
+        for headers in ({}, {'HTTP_HX_REQUEST': 'true'}):
+            response = self.client.get(reverse('courses:catalog'), **headers)
+            self.assertIn('HX-Request', response['Vary'])
+
+    def test_filters_are_applied_on_the_server(self):
+        """Subject and term filters narrow the rows returned."""
+        response = self.client.get(
+            reverse('courses:catalog'), {'subject': 'Mathematics'}, HTTP_HX_REQUEST='true'
+        )
+        self.assertEqual(
+            [section.course.course_code for section in response.context['sections']],
+            ['MATH101']
+        )
+
+        response = self.client.get(
+            reverse('courses:catalog'), {'term': 'Winter'}, HTTP_HX_REQUEST='true'
+        )
+        self.assertContains(response, 'No sections found')
+
+
+class CatalogResponseCacheTestCase(TestCase):
+    """Test versioned caching and conditional requests on catalog endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.api_client = APIClient()
+        self.user = User.objects.create_user(
+            username='teststu',
+            password='testpass',
+            email='test@test.com'
+        )
+        self.api_client.force_authenticate(user=self.user)
+
+        self.course = Course.objects.create(
+            course_code='CS101', title='Intro to CS', credits=3,
+            department='Computer Science', description='Test course'
+        )
+        self.fall = CourseSection.objects.create(
+            course=self.course, section_number='001', crn='10001', term='Fall', year=2024,
+            meeting_days='MWF', start_time=time(9, 0), end_time=time(10, 0), max_enrollment=30
+        )
+        self.spring = CourseSection.objects.create(
+            course=self.course, section_number='001', crn='20001', term='Spring', year=2025,
+            meeting_days='TTH', start_time=time(9, 0), end_time=time(10, 15)
+        )
+
+    def test_repeat_request_is_served_from_cache_with_etag(self):
+        """A warm response only reads seat counts and revalidates with 304."""
+        first = self.api_client.get('/api/sections/', {'term': 'Fall'})
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first)
+        # Seat counts are live, so only the ETag can validate the response
+        self.assertNotIn('Last-Modified', first)
+
+        with self.assertNumQueries(1):
+            second = self.api_client.get('/api/sections/', {'term': 'Fall'})
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        with self.assertNumQueries(1):
+            revalidated = self.api_client.get(
+                '/api/sections/', {'term': 'Fall'}, HTTP_IF_NONE_MATCH=first['ETag']
+            )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_seat_count_changes_do_not_invalidate(self):
+        """Seat count changes keep the cache but are shown at once."""
+        etag = self.api_client.get('/api/courses/')['ETag']
+        sections = self.api_client.get('/api/sections/', {'term': 'Fall'})
+        detail = self.api_client.get(f'/api/sections/{self.fall.id}/')
+        search = self.api_client.get('/api/sections/search_sections/', {'term': 'Fall'})
+
+        self.fall.current_enrollment = 30
+        self.fall.save(update_fields=['current_enrollment', 'updated_at'])
+
+        self.assertEqual(self.api_client.get('/api/courses/')['ETag'], etag)
+
+        for url, params, cached in (
+            ('/api/sections/', {'term': 'Fall'}, sections),
+            (f'/api/sections/{self.fall.id}/', {}, detail),
+            ('/api/sections/search_sections/', {'term': 'Fall'}, search),
+        ):
+            # A client holding the old counts is not told they are current
+            response = self.api_client.get(url, params, HTTP_IF_NONE_MATCH=cached['ETag'])
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], cached['ETag'])
+            section = response.data if 'id' in response.data else response.data['results'][0]
+            self.assertEqual(section['current_enrollment'], 30)
+            self.assertEqual(section['available_seats'], 0)
+            self.assertTrue(section['is_full'])
+
+        seats = self.api_client.get('/api/sections/seats/', {'ids': f'{self.fall.id}'})
+        self.assertEqual(seats.data[str(self.fall.id)]['available_seats'], 0)
+
+    def test_section_change_only_invalidates_its_term(self):
+        """Editing a Spring section leaves Fall-scoped responses cached."""
+        fall_etag = self.api_client.get('/api/sections/', {'term': 'Fall'})['ETag']
+        spring_etag = self.api_client.get('/api/sections/', {'term': 'Spring'})['ETag']
+
+        self.spring.location = 'B200'
+        self.spring.save()
+
+        self.assertEqual(self.api_client.get('/api/sections/', {'term': 'Fall'})['ETag'], fall_etag)
+        self.assertNotEqual(
+            self.api_client.get('/api/sections/', {'term': 'Spring'})['ETag'], spring_etag
+        )
+
+    def test_course_change_invalidates_every_term(self):
+        """Course edits appear in every term's cached sections."""
+        etag = self.api_client.get('/api/sections/', {'term': 'Fall'})['ETag']
+
+        self.course.title = 'Introduction to Computer Science'
+        self.course.save()
+
+        response = self.api_client.get('/api/sections/', {'term': 'Fall'})
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class CoursesByDepartmentTestCase(TestCase):
+    """Test the grouped, streamed by_department endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.api_client = APIClient()
+        self.user = User.objects.create_user(
+            username='teststu',
+            password='testpass',
+            email='test@test.com'
+        )
+        self.api_client.force_authenticate(user=self.user)
+
+        cs101 = Course.objects.create(
+            course_code='CS101', title='Intro to CS', credits=3,
+            department='Computer Science', description='Test course'
+        )
+        cs201 = Course.objects.create(
+            course_code='CS201', title='Data Structures', credits=3,
+            department='Computer Science', description='Test course'
+        )
+        cs201.prerequisites.add(cs101)
+        Course.objects.create(
+            course_code='MATH101', title='Calculus I', credits=4,
+            department='Mathematics', description='Test course'
+        )
+        for n in range(5):
+            Course.objects.create(
+                course_code=f'HIST{n}00', title=f'History {n}', credits=3,
+                department=f'History {n}', description='Test course'
+            )
+
+    def get_grouped(self):
+        response = self.api_client.get('/api/courses/by_department/')
+        self.assertEqual(response.status_code, 200)
+        return response, json.loads(b''.join(response.streaming_content))
+
+    def test_grouping_uses_constant_queries(self):
+        """Courses and prerequisites load in two queries regardless of departments."""
+        with self.assertNumQueries(2):
+            response, data = self.get_grouped()
+
+        self.assertEqual(list(data)[:2], ['Computer Science', 'History 0'])
+        self.assertEqual(len(data), 7)
+        self.assertEqual(
+            [course['course_code'] for course in data['Computer Science']], ['CS101', 'CS201']
+        )
+        self.assertEqual(
+            data['Computer Science'][1]['prerequisite_details'][0]['course_code'], 'CS101'
+        )
+        self.assertIn('ETag', response)
+
+    def test_cached_payload_is_reused_until_catalog_changes(self):
+        """Repeat requests run no queries; a course change rebuilds the payload."""
+        self.get_grouped()
+        with self.assertNumQueries(0):
+            self.get_grouped()
+
+        Course.objects.filter(course_code='MATH101').get().delete()
+        response, data = self.get_grouped()
+        self.assertNotIn('Mathematics', data)
+
+    def test_section_edits_keep_payload_cached(self):
+        """Sections are not part of the payload, so editing one in any term keeps it."""
+        etag = self.get_grouped()[0]['ETag']
+        section = CourseSection.objects.create(
+            course=Course.objects.get(course_code='CS101'), section_number='001', crn='10001',
+            term='Fall', year=2024, meeting_days='MWF', start_time=time(9, 0), end_time=time(10, 0)
+        )
+        section.location = 'CS 202'
+        section.save()
+
+        with self.assertNumQueries(0):
+            response, _ = self.get_grouped()
+        self.assertEqual(response['ETag'], etag)
+
+
+class FastListSerializationTestCase(TestCase):
+    """Test that the values() list path matches the DRF serializers."""
+
+    def setUp(self):
+        cache.clear()
+        self.api_client = APIClient()
+        self.user = User.objects.create_user(
+            username='teststu',
+            password='testpass',
+            email='test@test.com'
+        )
+        self.api_client.force_authenticate(user=self.user)
+        instructor = User.objects.create_user(
+            username='prof', password='testpass', first_name='Ada', last_name='Lovelace'
+        )
+
+        cs101 = Course.objects.create(
+            course_code='CS101', title='Intro to CS', credits=3,
+            department='Computer Science', description='Test course'
+        )
+        cs201 = Course.objects.create(
+            course_code='CS201', title='Data Structures', credits=3,
+            department='Computer Science', description='Test course', level='SOPHOMORE'
+        )
+        cs201.prerequisites.add(cs101)
+        CourseSection.objects.create(
+            course=cs101, section_number='001', crn='10001', term='Fall', year=2024,
+            instructor=instructor, meeting_days='MWF', start_time=time(9, 0), end_time=time(10, 0)
+        )
+        CourseSection.objects.create(
+            course=cs201, section_number='001', crn='10002', term='Fall', year=2024,
+            location='Hall 2', meeting_days='TTH', start_time=time(13, 30), end_time=time(14, 45),
+            current_enrollment=30
+        )
+
+    def test_section_list_matches_serializer(self):
+        """The default section list output is identical to CourseSectionSerializer."""
+        response = self.api_client.get('/api/sections/')
+        expected = CourseSectionSerializer(
+            CourseSection.objects.order_by('course__course_code', 'section_number'), many=True
+        ).data
+
+        self.assertEqual(response.data['results'], [dict(item) for item in expected])
+        self.assertEqual(response.data['results'][0]['instructor_name'], 'Ada Lovelace')
+
+    def test_course_list_matches_serializer(self):
+        """Course list and search output is identical to CourseSerializer."""
+        expected = [dict(item) for item in CourseSerializer(Course.objects.all(), many=True).data]
+
+        self.assertEqual(self.api_client.get('/api/courses/').data['results'], expected)
+        self.assertEqual(
+            self.api_client.get('/api/courses/search_catalog/', {'q': 'CS'}).data['results'],
+            expected
+        )
+
+    def test_flat_sections_skip_nested_course(self):
+        """flat=true drops course_details and the prerequisite query."""
+        with self.assertNumQueries(2):
+            response = self.api_client.get('/api/sections/', {'flat': 'true'})
+
+        self.assertNotIn('course_details', response.data['results'][0])
+        self.assertEqual(response.data['results'][1]['available_seats'], 0)
+
+
+class SearchFacetsTestCase(TestCase):
+    """Test facet counts on the search endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.api_client = APIClient()
+        self.user = User.objects.create_user(
+            username='teststu',
+            password='testpass',
+            email='test@test.com'
+        )
+        self.api_client.force_authenticate(user=self.user)
+
+        cs = Course.objects.create(
+            course_code='CS101', title='Intro to CS', credits=3,
+            department='Computer Science', description='Test course'
+        )
+        math = Course.objects.create(
+            course_code='MATH201', title='Calculus II', credits=4,
+            department='Mathematics', description='Test course', level='SOPHOMORE'
+        )
+        CourseSection.objects.bulk_create([
+            CourseSection(
+                course=cs, section_number=f'{n:03d}', crn=f'1{n:04d}', term='Fall', year=2024,
+                campus='Main', meeting_days='MWF', start_time=time(9, 0), end_time=time(10, 0)
+            )
+            for n in range(3)
+        ] + [
+            CourseSection(
+                course=math, section_number='001', crn='20001', term='Spring', year=2025,
+                campus='North', meeting_days='TTH', start_time=time(9, 0), end_time=time(10, 15),
+                max_enrollment=10, current_enrollment=10
+            )
+        ])
+
+    def test_section_facets_count_the_filtered_results(self):
+        """Every facet is counted over the current filter."""
+        response = self.api_client.get('/api/sections/search_sections/')
+        self.assertEqual(response.data['facets']['department'], [
+            {'value': 'Computer Science', 'count': 3},
+            {'value': 'Mathematics', 'count': 1},
+        ])
+        self.assertEqual(response.data['facets']['credits'], [
+            {'value': 3, 'count': 3},
+            {'value': 4, 'count': 1},
+        ])
+        self.assertEqual(
+            [bucket['value'] for bucket in response.data['facets']['campus']], ['Main', 'North']
+        )
+
+        response = self.api_client.get('/api/sections/search_sections/', {'term': 'Spring'})
+        self.assertEqual(response.data['facets']['term'], [{'value': 'Spring', 'count': 1}])
+        self.assertEqual(response.data['facets']['level'], [{'value': 'SOPHOMORE', 'count': 1}])
+
+        response = self.api_client.get('/api/sections/search_sections/', {'available_only': 'true'})
+        self.assertEqual(response.data['facets']['term'], [{'value': 'Fall', 'count': 3}])
+
+    def test_facets_are_computed_once_per_filter(self):
+        """Re-ordering or paging the same results reuses the cached facet counts."""
+        with mock.patch.object(facets, 'compute_facets', wraps=facets.compute_facets) as compute:
+            self.api_client.get('/api/sections/search_sections/')
+            response = self.api_client.get(
+                '/api/sections/search_sections/', {'ordering': 'start_time', 'page': 1}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(compute.call_count, 1)
+
+            self.api_client.get('/api/sections/search_sections/', {'term': 'Fall'})
+            self.assertEqual(compute.call_count, 2)
+
+    def test_course_search_includes_facets(self):
+        """search_catalog returns course-level facets."""
+        response = self.api_client.get('/api/courses/search_catalog/', {'q': 'calc'})
+        self.assertEqual(response.data['facets']['department'], [{'value': 'Mathematics', 'count': 1}])
+        self.assertEqual(set(response.data['facets']), {'department', 'level', 'credits'})
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    SEAT_UPDATE_INTERVAL=0.2
+)
+class SeatAvailabilityConsumerTestCase(TransactionTestCase):
+    """Test live seat count pushes over WebSockets."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='teststu', password='testpass')
+        course = Course.objects.create(
+            course_code='CS101', title='Intro to CS', credits=3,
+            department='Computer Science', description='Test course'
+        )
+        self.section = CourseSection.objects.create(
+            course=course, section_number='001', crn='10001', term='Fall', year=2024,
+            meeting_days='MWF', start_time=time(9, 0), end_time=time(10, 0), max_enrollment=30
+        )
+
+    async def connect(self, user):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), '/ws/seats/')
+        communicator.scope['user'] = user
+        connected, _ = await communicator.connect()
+        return communicator, connected
+
+    async def test_anonymous_connections_are_rejected(self):
+        _, connected = await self.connect(AnonymousUser())
+        self.assertFalse(connected)
+
+    async def test_enrollment_changes_are_pushed_to_subscribers(self):
+        """Subscribing returns current counts; committed saves are pushed."""
+        communicator, connected = await self.connect(self.user)
+        self.assertTrue(connected)
+
+        await communicator.send_json_to({'action': 'subscribe', 'sections': [self.section.id]})
+        snapshot = await communicator.receive_json_from()
+        self.assertEqual(snapshot['sections'][str(self.section.id)]['available_seats'], 30)
+
+        def enroll():
+            self.section.current_enrollment = 1
+            self.section.save(update_fields=['current_enrollment', 'updated_at'])
+        await sync_to_async(enroll)()
+
+        update = await communicator.receive_json_from(timeout=2)
+        self.assertEqual(update['sections'][str(self.section.id)]['current_enrollment'], 1)
+        await communicator.disconnect()
+
+    async def test_malformed_messages_get_an_error(self):
+        """Non-object frames are answered with an error and the socket stays open."""
+        communicator, _ = await self.connect(self.user)
+        for content in ([self.section.id], 'subscribe', 1, None):
+            await communicator.send_json_to(content)
+            self.assertEqual((await communicator.receive_json_from())['type'], 'error')
+
+        await communicator.send_json_to({'action': 'subscribe', 'sections': [self.section.id]})
+        self.assertEqual((await communicator.receive_json_from())['type'], 'seats')
+        await communicator.disconnect()
+
+    async def test_rapid_changes_are_coalesced(self):
+        """Bursts within the interval collapse into one frame with the latest counts."""
+        communicator, _ = await self.connect(self.user)
+        await communicator.send_json_to({'action': 'subscribe', 'sections': [self.section.id]})
+        await communicator.receive_json_from()
+
+        channel_layer = get_channel_layer()
+        for current in (1, 2, 3):
+            await channel_layer.group_send(seat_group(self.section.id), {
+                'type': 'seats.update',
+                'section_id': self.section.id,
+                'current_enrollment': current,
+                'max_enrollment': 30,
+            })
+
+        update = await communicator.receive_json_from(timeout=2)
+        self.assertEqual(update['sections'][str(self.section.id)]['current_enrollment'], 3)
+        self.assertTrue(await communicator.receive_nothing(timeout=0.4))
+        await communicator.disconnect()
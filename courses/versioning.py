@@ -0,0 +1,125 @@
+"""
+Catalog version counters shared by every process.
+
+The versions live in the Django cache so that a change made in one worker
+(admin edit, sample data load, registrar update) is visible to all others.
+In-process structures built from a catalog snapshot, and cached API
+responses, remember the version they were built from and are discarded
+when it moves.
+
+Three counters are kept:
+
+- the global catalog version, bumped by any course or section change;
+- the course version, bumped when course data shared by every term changes;
+- one version per term, bumped when a section in that term changes.
+
+A response scoped to a single term only depends on the course version and
+that term's version, so edits to other terms leave it cached.
+
+Versions are counters, not times, so the course and term versions each
+keep a millisecond timestamp of their last bump alongside them for
+responses that also send Last-Modified.
+"""
+import time
+
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = 'courses:catalog_version'
+COURSE_VERSION_KEY = 'courses:course_version'
+TERM_VERSION_KEY = 'courses:term_version:{term}'
+CHANGED_AT_SUFFIX = ':changed_at'
+
+
+def _term_key(term):
+    return TERM_VERSION_KEY.format(term=term.strip().lower())
+
+
+def get_catalog_version(term=None):
+    """
+    Return the current catalog version.
+
+    With ``term`` the version only covers course data and that term's
+    sections and is returned as a string such as ``'1712.1730'``.
+    """
+    if term is None:
+        version = cache.get(CATALOG_VERSION_KEY)
+        if version is None:
+            version = _initialise_version(CATALOG_VERSION_KEY)
+        return version
+
+    keys = [COURSE_VERSION_KEY, _term_key(term)]
+    versions = cache.get_many(keys)
+    parts = []
+    for key in keys:
+        value = versions.get(key)
+        if value is None:
+            value = _initialise_version(key)
+        parts.append(str(value))
+    return '.'.join(parts)
+
+
+def get_course_version():
+    """Return the course version, which only moves when course data shared by every term changes."""
+    version = cache.get(COURSE_VERSION_KEY)
+    if version is None:
+        version = _initialise_version(COURSE_VERSION_KEY)
+    return version
+
+
+def get_catalog_changed_at(term) -> int:
+    """
+    Millisecond timestamp of the last change to course data or to
+    ``term``'s sections (or of the first time it was asked for).
+    """
+    keys = [COURSE_VERSION_KEY + CHANGED_AT_SUFFIX, _term_key(term) + CHANGED_AT_SUFFIX]
+    changed = cache.get_many(keys)
+    return max(
+        changed[key] if changed.get(key) is not None else _initialise_version(key)
+        for key in keys
+    )
+
+
+def bump_catalog_version(*terms):
+    """
+    Invalidate every snapshot built from the current catalog.
+
+    Pass the terms of the sections that changed; with no terms the change
+    is treated as course-level and invalidates every term.
+    """
+    keys = [CATALOG_VERSION_KEY]
+    if terms:
+        keys.extend(_term_key(term) for term in set(terms) if term)
+    else:
+        keys.append(COURSE_VERSION_KEY)
+
+    for key in keys:
+        _incr(key)
+
+    changed_keys = [key + CHANGED_AT_SUFFIX for key in keys if key != CATALOG_VERSION_KEY]
+    now = int(time.time() * 1000)
+    current = cache.get_many(changed_keys)
+    # Always move on to a later second, so a Last-Modified derived from it
+    # changes too, even if two changes land in the same second
+    cache.set_many(
+        {key: max(now, (current.get(key, 0) // 1000 + 1) * 1000) for key in changed_keys},
+        timeout=None
+    )
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key was evicted or never set; start a fresh sequence
+        _initialise_version(key)
+        return cache.incr(key)
+
+
+def _initialise_version(key):
+    """
+    Seed a version from the clock so a sequence restarted after eviction
+    never repeats a value an older snapshot may still be holding.
+    """
+    # add() is a no-op if another process initialised it first
+    cache.add(key, int(time.time() * 1000), timeout=None)
+    return cache.get(key)
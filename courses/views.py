@@ -1,39 +1,125 @@
+from itertools import groupby
+
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from django.db import models as django_models
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django_filters.rest_framework import DjangoFilterBackend
 from django.views.generic import TemplateView
 from django.shortcuts import render, get_object_or_404
+from django.utils.cache import patch_vary_headers
+from django.utils.http import urlencode
 from django.contrib.auth.decorators import login_required
 from .models import Course, CourseSection
 from .serializers import CourseSerializer, CourseSectionSerializer
+from .autocomplete import get_autocomplete_index
+from .search import fuzzy_search
+from .versioning import get_catalog_version
+from .caching import cache_catalog_response, filter_cache_key, stream_catalog_json
+from .facets import COURSE_FACETS, SECTION_FACETS, get_facets
+from .fast_serializers import course_rows, section_rows, serialize_courses, serialize_sections
 
 
 class CourseListView(TemplateView):
-    """Course Catalog page view."""
+    """
+    Course Catalog page view.
+    
+    Filtering and pagination happen on the server. HTMX requests (filter
+    changes and infinite scroll) receive only the rows partial, and each
+    request loads a single page of sections regardless of catalog size.
+    History restores get the whole page, since htmx swaps it in as one.
+    """
     template_name = 'courses/catalog.html'
+    partial_template_name = 'courses/partials/section_rows.html'
+    page_size = 50
+    
+    def is_partial(self):
+        htmx = self.request.htmx
+        return bool(htmx) and not htmx.history_restore_request
+    
+    def get_template_names(self):
+        if self.is_partial():
+            return [self.partial_template_name]
+        return [self.template_name]
+    
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        # The page and the partial share a URL; caches must keep them apart
+        patch_vary_headers(response, ('HX-Request',))
+        return response
+    
+    def get_filters(self):
+        """Read catalog filters from the query string."""
+        params = self.request.GET
+        return {
+            'q': params.get('q', '').strip(),
+            'subject': params.get('subject', '').strip(),
+            'term': params.get('term', '').strip(),
+            'instructor': params.get('instructor', '').strip(),
+        }
+    
+    def filter_sections(self, queryset, filters):
+        if filters['q']:
+            queryset = queryset.filter(
+                Q(course__course_code__icontains=filters['q']) |
+                Q(course__title__icontains=filters['q'])
+            )
+        if filters['subject']:
+            queryset = queryset.filter(course__department=filters['subject'])
+        if filters['term']:
+            queryset = queryset.filter(term=filters['term'])
+        if filters['instructor']:
+            for part in filters['instructor'].split():
+                queryset = queryset.filter(
+                    Q(instructor__first_name__icontains=part) |
+                    Q(instructor__last_name__icontains=part)
+                )
+        return queryset
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # Get all available course sections
-        sections = CourseSection.objects.filter(
-            is_available=True,
-            course__is_active=True
-        ).select_related('course', 'instructor').prefetch_related('course__prerequisites').order_by('course__course_code', 'section_number')
-        
-        # Get available departments for filtering
-        departments = Course.objects.filter(is_active=True).values_list('department', flat=True).distinct().order_by('department')
-        
-        # Get available terms
-        terms = CourseSection.objects.filter(is_available=True).values_list('term', flat=True).distinct().order_by('term')
-        
-        context['sections'] = sections
-        context['departments'] = departments
-        context['terms'] = terms
-        context['total_sections'] = sections.count()
+        filters = self.get_filters()
+        
+        try:
+            page = max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        
+        sections = self.filter_sections(
+            CourseSection.objects.filter(
+                is_available=True,
+                course__is_active=True
+            ).select_related('course', 'instructor'),
+            filters
+        ).order_by('course__course_code', 'section_number', 'id')
+        
+        # Fetch one extra row to detect a next page without a COUNT(*)
+        offset = (page - 1) * self.page_size
+        rows = list(sections[offset:offset + self.page_size + 1])
+        has_next = len(rows) > self.page_size
+        
+        context['sections'] = rows[:self.page_size]
+        context['filters'] = filters
+        context['has_filters'] = any(filters.values())
+        context['page'] = page
+        context['is_first_page'] = page == 1
+        if has_next:
+            next_params = {key: value for key, value in filters.items() if value}
+            next_params['page'] = page + 1
+            context['next_page_query'] = urlencode(next_params)
+        
+        if not self.is_partial():
+            # Facet values come from one grouped aggregate, cached per catalog version
+            facets = get_facets(
+                CourseSection.objects.filter(is_available=True, course__is_active=True),
+                SECTION_FACETS,
+                cache_key=f'courses:facets:catalog:{get_catalog_version()}'
+            )
+            context['departments'] = [bucket['value'] for bucket in facets['department']]
+            context['terms'] = [bucket['value'] for bucket in facets['term']]
+            context['total_sections'] = sum(bucket['count'] for bucket in facets['department'])
         
         return context
 
@@ -54,6 +140,19 @@ def course_details_modal(request, section_id):
     })
 
 
+def add_facets(request, response, queryset, facets, cacheable=True):
+    """
+    Attach facet counts for ``queryset`` to a paginated response.
+    
+    Counts are cached per catalog version and filter (not per page) unless
+    ``cacheable`` is False, e.g. when the filter depends on seat counts.
+    """
+    if isinstance(response.data, dict):
+        cache_key = filter_cache_key(request, 'facets') if cacheable else None
+        response.data['facets'] = get_facets(queryset, facets, cache_key=cache_key)
+    return response
+
+
 class CourseViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing and searching courses.
@@ -74,6 +173,22 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['course_code', 'title', 'department', 'credits']
     ordering = ['course_code']
     
+    @cache_catalog_response()
+    def list(self, request, *args, **kwargs):
+        return self._list_response(self.filter_queryset(self.get_queryset()))
+    
+    @cache_catalog_response()
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
+    def _list_response(self, queryset):
+        """Paginate and serialize courses through the values() fast path."""
+        rows = course_rows(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serialize_courses(page))
+        return Response(serialize_courses(list(rows)))
+    
     def get_queryset(self):
         queryset = super().get_queryset()
         
@@ -85,12 +200,14 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
     
     @action(detail=False, methods=['get'])
+    @cache_catalog_response()
     def search_catalog(self, request):
         """
         Advanced search endpoint for course catalog.
         
         Query parameters:
         - q: General search term (searches title, description, code, department)
+        - fuzzy: Typo-tolerant search for q, results ranked by relevance (true/false)
         - department: Filter by department (also accepts 'subject' parameter)
         - course_number: Filter by course number
         - level: Filter by course level
@@ -98,9 +215,10 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
         """
         queryset = self.get_queryset()
         
-        # General search
+        # General search (fuzzy matching is applied after the other filters)
         search_query = request.query_params.get('q', '')
-        if search_query:
+        fuzzy = request.query_params.get('fuzzy', '').lower() == 'true'
+        if search_query and not fuzzy:
             queryset = queryset.filter(
                 Q(course_code__icontains=search_query) |
                 Q(title__icontains=search_query) |
@@ -130,26 +248,53 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
             except ValueError:
                 pass
         
-        # Paginate and return
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        if search_query and fuzzy:
+            ranked_ids = fuzzy_search(queryset, search_query)
+            response = self._fuzzy_search_response(queryset, ranked_ids)
+            queryset = queryset.filter(id__in=ranked_ids)
+        else:
+            response = self._list_response(queryset)
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return add_facets(request, response, queryset, COURSE_FACETS)
+    
+    def _fuzzy_search_response(self, queryset, ranked_ids):
+        """Paginate ranked fuzzy matches, loading only the courses on the page."""
+        page_ids = self.paginate_queryset(ranked_ids)
+        ids = ranked_ids if page_ids is None else page_ids
+        rows = {row['id']: row for row in course_rows(queryset.filter(id__in=ids))}
+        results = serialize_courses([rows[course_id] for course_id in ids])
+        
+        if page_ids is not None:
+            return self.get_paginated_response(results)
+        return Response(results)
     
     @action(detail=False, methods=['get'])
     def by_department(self, request):
-        """Get all courses grouped by department."""
-        departments = Course.objects.filter(is_active=True).values_list('department', flat=True).distinct().order_by('department')
-        
-        result = {}
-        for dept in departments:
-            courses = Course.objects.filter(department=dept, is_active=True)
-            result[dept] = CourseSerializer(courses, many=True).data
+        """
+        Get all courses grouped by department.
         
-        return Response(result)
+        All courses and their prerequisites are loaded in two queries and
+        grouped in Python. The encoded document is cached per course
+        version, so section edits leave it cached, and streamed one
+        department at a time.
+        """
+        return stream_catalog_json(request, self._encode_by_department, courses_only=True)
+    
+    def _encode_by_department(self):
+        courses = Course.objects.filter(is_active=True).prefetch_related(
+            Prefetch('prerequisites', queryset=Course.objects.only('id', 'course_code', 'title'))
+        ).order_by('department', 'course_code')
+        
+        renderer = JSONRenderer()
+        chunks = []
+        for department, group in groupby(courses, key=lambda course: course.department):
+            separator = b'{' if not chunks else b','
+            chunks.append(
+                separator + renderer.render(department) + b':' +
+                renderer.render(CourseSerializer(list(group), many=True).data)
+            )
+        chunks.append(b'}' if chunks else b'{}')
+        return chunks
 
 
 class CourseSectionViewSet(viewsets.ReadOnlyModelViewSet):
@@ -172,6 +317,28 @@ class CourseSectionViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['course__course_code', 'section_number', 'start_time']
     ordering = ['course__course_code', 'section_number']
     
+    @cache_catalog_response(live_seats=True)
+    def list(self, request, *args, **kwargs):
+        return self._list_response(self.filter_queryset(self.get_queryset()))
+    
+    @cache_catalog_response(live_seats=True)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
+    def _list_response(self, queryset):
+        """
+        Paginate and serialize sections through the values() fast path.
+        
+        Nested course details are included unless the request passes
+        ?flat=true.
+        """
+        expand_course = self.request.query_params.get('flat', '').lower() != 'true'
+        rows = section_rows(queryset, expand_course=expand_course)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serialize_sections(page, expand_course=expand_course))
+        return Response(serialize_sections(list(rows), expand_course=expand_course))
+    
     def get_queryset(self):
         queryset = super().get_queryset()
         
@@ -204,15 +371,70 @@ class CourseSectionViewSet(viewsets.ReadOnlyModelViewSet):
             current_enrollment__lt=django_models.F('max_enrollment')
         )
         
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        return self._list_response(queryset)
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Lightweight suggestions for partial search input.
+        
+        Served from the in-process prefix index rather than the database.
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        Query parameters:
+        - q: Prefix of a course code, CRN or title word
+        - limit: Maximum number of suggestions (default 10, max 50)
+        """
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        
+        return Response({
+            'query': query,
+            'results': get_autocomplete_index().search(query, limit=limit)
+        })
     
     @action(detail=False, methods=['get'])
+    def seats(self, request):
+        """
+        Live seat counts for a set of sections.
+        
+        Cached catalog responses are given current seat counts on every
+        request; clients that only need availability poll this uncached
+        endpoint instead.
+        
+        Query parameters:
+        - ids: Comma-separated section ids (at most 200)
+        """
+        try:
+            ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value]
+        except ValueError:
+            return Response(
+                {'error': 'ids must be a comma-separated list of integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ids) > 200:
+            return Response(
+                {'error': 'At most 200 ids may be requested at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        rows = CourseSection.objects.filter(id__in=ids).values_list(
+            'id', 'current_enrollment', 'max_enrollment'
+        )
+        return Response({
+            str(section_id): {
+                'current_enrollment': current,
+                'max_enrollment': maximum,
+                'available_seats': max(0, maximum - current),
+                'is_full': current >= maximum,
+            }
+            for section_id, current, maximum in rows
+        })
+    
+    @action(detail=False, methods=['get'])
+    @cache_catalog_response(skip_params=('available_only',), live_seats=True)
     def search_sections(self, request):
         """
         Advanced search for course sections.
@@ -256,18 +478,13 @@ class CourseSectionViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(course__course_code__icontains=course_number)
         
         # Filter by availability
-        available_only = request.query_params.get('available_only', '').lower()
-        if available_only == 'true':
+        available_only = request.query_params.get('available_only', '').lower() == 'true'
+        if available_only:
             queryset = queryset.filter(
                 current_enrollment__lt=django_models.F('max_enrollment')
             )
         
         # Paginate and return
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        response = self._list_response(queryset)
+        return add_facets(request, response, queryset, SECTION_FACETS, cacheable=not available_only)
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SystemLog, APIMetrics
+from .models import SystemLog, APIMetrics, UserCounters, OutboxEvent
 
 
 @admin.register(SystemLog)
@@ -21,3 +21,17 @@ class APIMetricsAdmin(admin.ModelAdmin):
     search_fields = ('endpoint', 'user__username')
     raw_id_fields = ('user',)
 
+
+
+@admin.register(UserCounters)
+class UserCountersAdmin(admin.ModelAdmin):
+    list_display = ('user', 'unread_notifications', 'total_notifications', 'plans', 'enrolled_courses', 'updated_at')
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('topic', 'attempts', 'available_at', 'created_at', 'processed_at')
+    list_filter = ('topic', 'processed_at')
+    search_fields = ('topic', 'last_error')
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class InfrastructureConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'infrastructure'
+
+    def ready(self):
+        # Import signal handlers to ensure they're registered
+        from . import signals  # noqa: F401
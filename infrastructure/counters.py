@@ -0,0 +1,180 @@
+"""
+Denormalized per-user counters for the dashboard and notifications page.
+
+Counting a user's unread notifications, plans and enrollments on every page
+view is several ``COUNT(*)`` queries. Instead each user has a
+``UserCounters`` row that the write paths adjust with a relative
+``UPDATE`` inside their own transaction (see ``infrastructure.signals``,
+and the bulk notification paths that call ``adjust`` directly). Each
+counter is also cached under its own key, so reading all of them is one
+``get_many``:
+
+- a single user's keys are incremented once the change commits;
+- a bulk change drops the affected users' keys, and their next read
+  reloads the row.
+
+A user without a row gets one computed from the source tables the first
+time their counters are read. ``reconcile`` recomputes rows from the
+source tables and is run periodically (``reconcile_user_counters``) to
+repair drift from writes that bypass the model layer.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import UserCounters
+
+COUNTERS = ('unread_notifications', 'total_notifications', 'plans', 'enrolled_courses')
+COUNTER_KEY = 'infrastructure:counters:{user_id}:{name}'
+
+# Users recomputed per query by reconcile
+RECONCILE_BATCH_SIZE = 500
+
+
+def _key(user_id, name):
+    return COUNTER_KEY.format(user_id=user_id, name=name)
+
+
+def _timeout():
+    return getattr(settings, 'USER_COUNTERS_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _cache_counters(rows):
+    cache.set_many({
+        _key(user_id, name): row[name]
+        for user_id, row in rows.items() for name in COUNTERS
+    }, timeout=_timeout())
+
+
+def get_counters(user_id) -> dict:
+    """Return ``{counter: value}`` for ``user_id``, from the cache when possible."""
+    keys = {_key(user_id, name): name for name in COUNTERS}
+    cached = cache.get_many(keys)
+    if len(cached) == len(keys):
+        # Increments racing a reload can overshoot below zero; never show it
+        return {keys[key]: max(value, 0) for key, value in cached.items()}
+
+    row = UserCounters.objects.filter(user_id=user_id).values(*COUNTERS).first()
+    if row is None:
+        # A missing row always counts as changed
+        row = reconcile([user_id])[user_id]
+    _cache_counters({user_id: row})
+    return row
+
+
+def adjust(user_ids, **deltas):
+    """
+    Add ``deltas`` (counter name to signed amount) to the counters of
+    ``user_ids`` in the current transaction.
+
+    Users without a row are skipped; their row is computed when first read.
+    """
+    user_ids = list(set(user_ids))
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not user_ids or not deltas:
+        return
+
+    UserCounters.objects.filter(user_id__in=user_ids).update(
+        updated_at=timezone.now(),
+        **{name: Greatest(F(name) + delta, 0) for name, delta in deltas.items()}
+    )
+    transaction.on_commit(lambda: _adjust_cache(user_ids, deltas))
+
+
+def _adjust_cache(user_ids, deltas):
+    if len(user_ids) > 1:
+        cache.delete_many([_key(user_id, name) for user_id in user_ids for name in deltas])
+        return
+    for name, delta in deltas.items():
+        try:
+            cache.incr(_key(user_ids[0], name), delta)
+        except ValueError:
+            # Not cached; the next read loads the row
+            pass
+
+
+def _count(queryset, user_field, user_ids, **aggregates):
+    return {
+        row.pop(user_field): row
+        for row in queryset.filter(**{f'{user_field}__in': user_ids}).order_by().values(
+            user_field
+        ).annotate(**aggregates)
+    }
+
+
+def compute(user_ids) -> dict:
+    """Count each of ``user_ids``'s counters from the source tables."""
+    from notifications.models import Notification
+    from planning.models import StudentPlan
+    from registration.models import Enrollment
+
+    notifications = _count(
+        Notification.objects.all(), 'recipient_id', user_ids,
+        total=Count('id'), unread=Count('id', filter=Q(is_read=False))
+    )
+    plans = _count(StudentPlan.objects.all(), 'student_id', user_ids, plans=Count('id'))
+    enrolled = _count(
+        Enrollment.objects.filter(status=Enrollment.Status.ENROLLED), 'student_id', user_ids,
+        enrolled=Count('id')
+    )
+
+    empty = {'total': 0, 'unread': 0}
+    return {
+        user_id: {
+            'unread_notifications': notifications.get(user_id, empty)['unread'],
+            'total_notifications': notifications.get(user_id, empty)['total'],
+            'plans': plans.get(user_id, {}).get('plans', 0),
+            'enrolled_courses': enrolled.get(user_id, {}).get('enrolled', 0),
+        }
+        for user_id in user_ids
+    }
+
+
+def reconcile(user_ids) -> dict:
+    """
+    Recompute and store the counters of ``user_ids``.
+
+    The existing rows are locked while counting, so a write adjusting them
+    concurrently applies its delta after the recount rather than being
+    overwritten. Returns ``{user_id: counters}`` for the users whose stored
+    counters were wrong or missing; only their cached values are replaced.
+    """
+    with transaction.atomic():
+        stored = {
+            row['user_id']: row
+            for row in UserCounters.objects.select_for_update().filter(
+                user_id__in=user_ids
+            ).values('user_id', *COUNTERS)
+        }
+        counts = compute(user_ids)
+        changed = {
+            user_id: counters for user_id, counters in counts.items()
+            if user_id not in stored or any(stored[user_id][name] != counters[name] for name in COUNTERS)
+        }
+
+        now = timezone.now()
+        UserCounters.objects.bulk_create([
+            UserCounters(user_id=user_id, updated_at=now, **changed[user_id])
+            for user_id in changed if user_id not in stored
+        ], ignore_conflicts=True)
+        UserCounters.objects.bulk_update([
+            UserCounters(user_id=user_id, updated_at=now, **changed[user_id])
+            for user_id in changed if user_id in stored
+        ], [*COUNTERS, 'updated_at'])
+
+        transaction.on_commit(lambda: _cache_counters(changed))
+    return changed
+
+
+def reconcile_all(batch_size=RECONCILE_BATCH_SIZE) -> int:
+    """Reconcile every user's counters in batches; returns how many were fixed."""
+    from authentication.models import User
+
+    fixed = 0
+    user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(user_ids), batch_size):
+        fixed += len(reconcile(user_ids[start:start + batch_size]))
+    return fixed
@@ -0,0 +1,351 @@
+"""
+Management command measuring how many WebSocket clients one ASGI worker holds.
+
+The project's ASGI ``application`` is driven in-process over an in-memory
+channel layer, so no server or Redis is needed, and clients authenticate
+with session cookies through the same middleware as browsers. Simulated
+clients join chat conversations in pairs, watch sections' seat counts and
+listen for notifications; once they are all connected, messages, seat
+updates and notifications are published to them at a steady rate.
+
+The command reports connect latency, fan-out latency percentiles per
+consumer, memory allocated per connection (traced while connecting; it
+includes the simulated client's own buffers) and how late the event loop
+woke up during each phase, which is the delay every other connection on
+the worker would have seen.
+
+Users, conversations and sessions are created for the run and deleted
+afterwards, so run it against a development database.
+"""
+import asyncio
+import math
+import time as clock
+import tracemalloc
+from importlib import import_module
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from advisor.models import AdvisorAssignment, ChatMessage, Conversation
+from courses.seats import seat_group
+from notifications.push import notification_group
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'wsbench.'
+
+
+def percentile(values, pct):
+    """The ``pct``th percentile of ``values`` (nearest rank)."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def allowed_host() -> str:
+    """A host the WebSocket origin check accepts."""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+class Client:
+    """One simulated WebSocket client and what it expects to receive."""
+
+    def __init__(self, kind, path, user, session_key, sections=()):
+        self.kind = kind
+        self.path = path
+        self.user = user
+        self.sections = set(sections)
+        self.headers = [
+            (b'cookie', f'{settings.SESSION_COOKIE_NAME}={session_key}'.encode()),
+            # The origin check only admits pages served from ALLOWED_HOSTS
+            (b'origin', f'http://{allowed_host()}'.encode()),
+        ]
+        self.communicator = None
+        self.connected = False
+
+
+class LoopLag:
+    """Samples how much later than asked the event loop wakes a sleeping task."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = []
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    def take(self):
+        """The samples since the last call."""
+        samples, self.samples = self.samples, []
+        return samples or [0.0]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark WebSocket connections and fan-out per ASGI worker over an in-memory channel layer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=500, help='Chat conversations, two connections each')
+        parser.add_argument('--seat-clients', type=int, default=1000, help='Seat availability connections')
+        parser.add_argument('--notification-clients', type=int, default=1000, help='Notification connections')
+        parser.add_argument('--sections', type=int, default=50, help='Distinct sections updated')
+        parser.add_argument('--watch', type=int, default=5, help='Sections watched per seat connection')
+        parser.add_argument('--rounds', type=int, default=10, help='Messages per room, updates per section and notifications per user')
+        parser.add_argument('--round-interval', type=float, default=0.1, help='Seconds between publishing rounds')
+        parser.add_argument('--concurrency', type=int, default=100, help='Connections opened at once')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds to wait for any one frame')
+        parser.add_argument('--lag-interval', type=float, default=0.01, help='Seconds between event loop lag samples')
+        parser.add_argument(
+            '--seat-interval', type=float, default=None,
+            help='Override SEAT_UPDATE_INTERVAL (coalescing delay is part of the measured latency)'
+        )
+        parser.add_argument(
+            '--push-delay', type=float, default=None,
+            help='Override NOTIFICATION_PUSH_DELAY (batching delay is part of the measured latency)'
+        )
+        parser.add_argument('--no-memory', action='store_true', help='Do not trace memory while connecting')
+
+    def handle(self, *args, **options):
+        overrides = {
+            'CHANNEL_LAYERS': {
+                'default': {
+                    'BACKEND': 'channels.layers.InMemoryChannelLayer',
+                    'CONFIG': {'capacity': 100000},
+                }
+            }
+        }
+        if options['seat_interval'] is not None:
+            overrides['SEAT_UPDATE_INTERVAL'] = options['seat_interval']
+        if options['push_delay'] is not None:
+            overrides['NOTIFICATION_PUSH_DELAY'] = options['push_delay']
+
+        self._delete_users()
+        clients, session_keys = self._create_clients(**options)
+        try:
+            with override_settings(**overrides):
+                async_to_sync(self.run)(clients, **options)
+            saved = ChatMessage.objects.filter(sender__username__startswith=USERNAME_PREFIX).count()
+            self.stdout.write(f"  chat messages saved     {saved:10d} of {options['rooms'] * options['rounds']}")
+        finally:
+            session_store = import_module(settings.SESSION_ENGINE).SessionStore
+            for session_key in session_keys:
+                session_store(session_key).delete()
+            self._delete_users()
+
+    def _delete_users(self):
+        # Cascades to their assignments, conversations and messages
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+    def _create_clients(self, rooms, seat_clients, notification_clients, sections, watch, **options):
+        """Create the users, conversations and sessions the clients connect with."""
+        student_count = max(rooms, seat_clients, notification_clients)
+        advisor_count = math.ceil(rooms / 25)
+        users = [
+            User(username=f'{USERNAME_PREFIX}student.{n}', role=User.Role.STUDENT)
+            for n in range(student_count)
+        ] + [
+            User(username=f'{USERNAME_PREFIX}advisor.{n}', role=User.Role.ADVISOR)
+            for n in range(advisor_count)
+        ]
+        for user in users:
+            user.set_unusable_password()
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id'))
+        students = [user for user in users if user.role == User.Role.STUDENT]
+        advisors = [user for user in users if user.role == User.Role.ADVISOR]
+
+        pairs = [(students[n], advisors[n % advisor_count]) for n in range(rooms)]
+        AdvisorAssignment.objects.bulk_create([
+            AdvisorAssignment(student=student, advisor=advisor) for student, advisor in pairs
+        ])
+        Conversation.objects.bulk_create([
+            Conversation(student=student, advisor=advisor) for student, advisor in pairs
+        ])
+        conversations = dict(
+            Conversation.objects.filter(student__in=students[:rooms]).values_list('student_id', 'id')
+        )
+
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+        sessions = {}
+
+        def session_for(user):
+            if user.pk not in sessions:
+                session = session_store()
+                session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+                session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+                session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+                session.create()
+                sessions[user.pk] = session.session_key
+            return sessions[user.pk]
+
+        clients = []
+        for student, advisor in pairs:
+            path = f'/ws/chat/{conversations[student.pk]}/'
+            clients.append(Client('chat', path, student, session_for(student)))
+            clients.append(Client('chat', path, advisor, session_for(advisor)))
+        for n in range(seat_clients):
+            # Negative ids cannot match a real section, whose counts would be sent on subscribing
+            watched = {-((n + k) % sections + 1) for k in range(min(watch, sections))}
+            clients.append(Client('seats', '/ws/seats/', students[n], session_for(students[n]), watched))
+        for n in range(notification_clients):
+            clients.append(Client('notifications', '/ws/notifications/', students[n], session_for(students[n])))
+        return clients, list(sessions.values())
+
+    async def run(self, clients, rooms, sections, rounds, round_interval, concurrency,
+                  timeout, lag_interval, no_memory, **options):
+        from smart_registration.asgi import application
+
+        self.timeout = timeout
+        for client in clients:
+            client.communicator = WebsocketCommunicator(application, client.path, headers=client.headers)
+
+        lag = LoopLag(lag_interval)
+        lag_task = asyncio.ensure_future(lag.run())
+        try:
+            # Connect
+            if not no_memory:
+                tracemalloc.start()
+                before = tracemalloc.get_traced_memory()[0]
+            connect_times = []
+            for start in range(0, len(clients), concurrency):
+                connect_times.extend(await asyncio.gather(*[
+                    self.open(client) for client in clients[start:start + concurrency]
+                ]))
+            if not no_memory:
+                allocated = tracemalloc.get_traced_memory()[0] - before
+                tracemalloc.stop()
+            connect_lag = lag.take()
+            connected = [client for client in clients if client.connected]
+
+            # Fan out
+            latencies = {'chat': [], 'seats': [], 'notifications': []}
+            stamps = {}
+            start = clock.perf_counter()
+            readers = asyncio.gather(*[
+                self.read(client, rounds, stamps, latencies[client.kind]) for client in connected
+            ], return_exceptions=True)
+            await self.publish(connected, sections, rounds, round_interval, stamps)
+            incomplete = sum(1 for result in await readers if isinstance(result, Exception))
+            fanout_time = clock.perf_counter() - start
+            fanout_lag = lag.take()
+
+            # Closing flushes the chat messages still waiting to be saved
+            await asyncio.gather(*[client.communicator.disconnect() for client in connected])
+        finally:
+            lag_task.cancel()
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+        kinds = {kind: sum(1 for client in clients if client.kind == kind) for kind in latencies}
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{len(clients)} connections: {kinds['chat']} chat ({rooms} rooms), "
+            f"{kinds['seats']} seats, {kinds['notifications']} notifications"
+        ))
+        self.write_percentiles('connect', connect_times)
+        self.stdout.write(f'  failed connects         {len(clients) - len(connected):10d}')
+        if not no_memory and connected:
+            self.stdout.write(f'  memory per connection   {allocated / len(connected) / 1024:10.1f} KiB')
+        self.write_percentiles('loop lag (connect)', connect_lag)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Fan-out: {rounds} rounds every {round_interval}s, {fanout_time:.1f}s in total'
+        ))
+        for kind, values in latencies.items():
+            if values:
+                self.stdout.write(f'  {kind:<23} {len(values):10d} deliveries')
+                self.write_percentiles(f'{kind} latency', values)
+        self.stdout.write(f'  incomplete clients      {incomplete:10d}')
+        self.write_percentiles('loop lag (fan-out)', fanout_lag)
+
+    def write_percentiles(self, label, values):
+        self.stdout.write(
+            f'  {label:<23} p50 {percentile(values, 50) * 1000:8.1f}   '
+            f'p95 {percentile(values, 95) * 1000:8.1f}   '
+            f'p99 {percentile(values, 99) * 1000:8.1f}   '
+            f'max {max(values) * 1000:8.1f} ms'
+        )
+
+    async def open(self, client):
+        """Connect ``client`` (and subscribe it to its sections); returns the handshake time."""
+        start = clock.perf_counter()
+        try:
+            client.connected, _ = await client.communicator.connect(timeout=self.timeout)
+        except asyncio.TimeoutError:
+            client.connected = False
+        elapsed = clock.perf_counter() - start
+        if client.connected and client.sections:
+            await client.communicator.send_json_to({'action': 'subscribe', 'sections': sorted(client.sections)})
+            await client.communicator.receive_json_from(timeout=self.timeout)
+        return elapsed
+
+    async def publish(self, clients, sections, rounds, round_interval, stamps):
+        """Send every round of chat messages, seat updates and notifications."""
+        channel_layer = get_channel_layer()
+        # A room's student and advisor take turns to write
+        senders = {}
+        for client in clients:
+            if client.kind == 'chat':
+                senders.setdefault(client.path, []).append(client)
+        notified = {client.user.pk for client in clients if client.kind == 'notifications'}
+        watched = set().union(*(client.sections for client in clients))
+
+        for n in range(1, rounds + 1):
+            for pair in senders.values():
+                sender = pair[n % len(pair)]
+                await sender.communicator.send_json_to({'message': repr(clock.perf_counter())})
+            for section_id in range(-1, -sections - 1, -1):
+                if section_id not in watched:
+                    continue
+                stamps[('seats', section_id, n)] = clock.perf_counter()
+                await channel_layer.group_send(seat_group(section_id), {
+                    'type': 'seats.update',
+                    'section_id': section_id,
+                    'current_enrollment': n,
+                    'max_enrollment': rounds + 1,
+                })
+            for user_id in notified:
+                stamps[('notifications', user_id, n)] = clock.perf_counter()
+                await channel_layer.group_send(notification_group(user_id), {
+                    'type': 'notifications.created',
+                    'notifications': [{
+                        'id': n, 'notification_type': 'GENERAL', 'title': 'Benchmark',
+                        'message': '', 'link': '', 'is_read': False, 'created_at': None,
+                    }],
+                })
+            await asyncio.sleep(round_interval)
+
+    async def read(self, client, rounds, stamps, latencies):
+        """Read ``client``'s frames until it has seen every round, noting each delivery's latency."""
+        communicator = client.communicator
+        if client.kind == 'chat':
+            for _ in range(rounds):
+                frame = await communicator.receive_json_from(timeout=self.timeout)
+                latencies.append(clock.perf_counter() - float(frame['message']))
+        elif client.kind == 'seats':
+            remaining = set(client.sections)
+            while remaining:
+                frame = await communicator.receive_json_from(timeout=self.timeout)
+                now = clock.perf_counter()
+                for section_id, state in frame['sections'].items():
+                    section_id, n = int(section_id), state['current_enrollment']
+                    latencies.append(now - stamps[('seats', section_id, n)])
+                    if n == rounds:
+                        remaining.discard(section_id)
+        else:
+            cursor = 0
+            while cursor < rounds:
+                frame = await communicator.receive_json_from(timeout=self.timeout)
+                now = clock.perf_counter()
+                for notification in frame['notifications']:
+                    latencies.append(now - stamps[('notifications', client.user.pk, notification['id'])])
+                cursor = frame['cursor']
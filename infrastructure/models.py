@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from authentication.models import User
 
@@ -109,3 +110,77 @@ class APIMetrics(models.Model):
     def __str__(self):
         return f"{self.method} {self.endpoint} - {self.status_code} ({self.response_time}ms)"
 
+
+
+class UserCounters(models.Model):
+    """Denormalized per-user counts shown on the dashboard and notifications page."""
+    
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters'
+    )
+    
+    unread_notifications = models.PositiveIntegerField(default=0)
+    
+    total_notifications = models.PositiveIntegerField(default=0)
+    
+    plans = models.PositiveIntegerField(default=0)
+    
+    enrolled_courses = models.PositiveIntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'user_counters'
+        verbose_name = _('User Counters')
+        verbose_name_plural = _('User Counters')
+    
+    def __str__(self):
+        return f"Counters for {self.user_id}"
+
+
+class OutboxEvent(models.Model):
+    """A side effect recorded in the same transaction as the change causing it."""
+    
+    topic = models.CharField(
+        max_length=100,
+        help_text=_('Name of the event, which selects its handler')
+    )
+    
+    payload = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text=_('Arguments passed to the handler')
+    )
+    
+    attempts = models.PositiveSmallIntegerField(default=0)
+    
+    last_error = models.TextField(blank=True)
+    
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        help_text=_('Earliest time the event is next dispatched')
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'outbox_events'
+        verbose_name = _('Outbox Event')
+        verbose_name_plural = _('Outbox Events')
+        ordering = ['id']
+        indexes = [
+            # Only undelivered events are scanned by the dispatcher
+            models.Index(
+                fields=['available_at', 'id'],
+                condition=models.Q(processed_at__isnull=True),
+                name='outbox_pending_idx'
+            ),
+            models.Index(fields=['processed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.topic} #{self.pk}"
@@ -0,0 +1,129 @@
+"""
+Transactional outbox for side effects of domain changes.
+
+Write paths used to queue Celery tasks, create notifications and push to
+Channels inline, so requests paid for that work and anything that failed
+after the change committed (a broker outage during ``.delay``) was lost.
+Instead they ``record`` an ``OutboxEvent`` row in the same transaction as
+the change: it exists exactly when the change does.
+
+``dispatch`` drains pending events in batches, locking them with
+``SKIP LOCKED`` so several dispatchers can run at once, and calls the
+handler registered for each event's topic with ``@handles``. A handler's
+own database writes commit together with the event being marked
+processed. A handler that raises is retried with a doubling delay, up to
+``OUTBOX_MAX_ATTEMPTS`` times, so delivery is at least once and handlers
+must tolerate repeats. Events are not ordered across failures: a failing
+event does not hold back later ones.
+
+Each ``record`` asks a worker to dispatch once the transaction commits;
+the periodic ``dispatch_outbox`` run picks up anything that request was
+lost for.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def handles(topic):
+    """Register the decorated function as the handler of ``topic`` events."""
+    def register(handler):
+        if HANDLERS.setdefault(topic, handler) is not handler:
+            raise ValueError(f'Outbox topic {topic!r} already has a handler')
+        return handler
+    return register
+
+
+def record(topic, **payload):
+    """
+    Store a ``topic`` event with JSON ``payload`` in the current
+    transaction, and request a dispatch once it commits.
+    """
+    event = OutboxEvent.objects.create(topic=topic, payload=payload)
+    transaction.on_commit(_request_dispatch)
+    return event
+
+
+def _request_dispatch():
+    from .tasks import dispatch_outbox
+
+    try:
+        dispatch_outbox.delay()
+    except Exception:
+        # The events are stored; the periodic dispatch delivers them
+        logger.warning('Could not queue an outbox dispatch', exc_info=True)
+
+
+def retry_delay(attempts) -> timedelta:
+    """How long to wait before retrying an event that has failed ``attempts`` times."""
+    return timedelta(seconds=_setting('OUTBOX_RETRY_BACKOFF', 30) * 2 ** (attempts - 1))
+
+
+def dispatch(batch_size=None) -> int:
+    """Handle pending events in batches until none are due; returns how many were handled."""
+    batch_size = batch_size or _setting('OUTBOX_BATCH_SIZE', 100)
+    handled = 0
+    while True:
+        processed, due = _dispatch_batch(batch_size)
+        handled += processed
+        if due < batch_size:
+            return handled
+
+
+def _dispatch_batch(batch_size):
+    """Handle one batch; returns ``(processed, due)`` event counts."""
+    max_attempts = _setting('OUTBOX_MAX_ATTEMPTS', 8)
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True).filter(
+                processed_at__isnull=True,
+                available_at__lte=timezone.now(),
+                attempts__lt=max_attempts,
+            ).order_by('available_at', 'id')[:batch_size]
+        )
+
+        processed, failed = [], []
+        for event in events:
+            try:
+                handler = HANDLERS[event.topic]
+                # A failing handler's writes are rolled back on their own
+                with transaction.atomic():
+                    handler(**event.payload)
+            except Exception as exc:
+                event.attempts += 1
+                event.last_error = f'{type(exc).__name__}: {exc}'
+                event.available_at = timezone.now() + retry_delay(event.attempts)
+                failed.append(event)
+                log = logger.error if event.attempts >= max_attempts else logger.warning
+                log('Outbox event %s (%s) failed, attempt %s', event.pk, event.topic, event.attempts, exc_info=True)
+            else:
+                event.processed_at = timezone.now()
+                processed.append(event)
+
+        if processed:
+            OutboxEvent.objects.bulk_update(processed, ['processed_at'])
+        if failed:
+            OutboxEvent.objects.bulk_update(failed, ['attempts', 'last_error', 'available_at'])
+    return len(processed), len(events)
+
+
+def purge(days=None) -> int:
+    """Delete events processed more than ``days`` ago; returns how many were deleted."""
+    if days is None:
+        days = _setting('OUTBOX_RETENTION_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = OutboxEvent.objects.filter(processed_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,52 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from notifications.models import Notification
+from planning.models import StudentPlan
+from registration.models import Enrollment
+from .counters import adjust
+
+
+@receiver(post_save, sender=Notification)
+def count_notification_save(sender, instance, created, **kwargs):
+    """Keep the recipient's notification counters in step with creates and reads."""
+    if created:
+        adjust([instance.recipient_id], total_notifications=1, unread_notifications=0 if instance.is_read else 1)
+    elif instance.changed_fields(('is_read',)):
+        adjust([instance.recipient_id], unread_notifications=-1 if instance.is_read else 1)
+
+
+@receiver(post_delete, sender=Notification)
+def count_notification_delete(sender, instance, **kwargs):
+    was_read = instance.loaded_value('is_read', instance.is_read)
+    adjust([instance.recipient_id], total_notifications=-1, unread_notifications=0 if was_read else -1)
+
+
+@receiver(post_save, sender=StudentPlan)
+def count_plan_save(sender, instance, created, **kwargs):
+    if created:
+        adjust([instance.student_id], plans=1)
+
+
+@receiver(post_delete, sender=StudentPlan)
+def count_plan_delete(sender, instance, **kwargs):
+    adjust([instance.student_id], plans=-1)
+
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment_save(sender, instance, created, **kwargs):
+    """Count ENROLLED enrollments, including moves in and out of that status."""
+    enrolled = Enrollment.Status.ENROLLED
+    if created:
+        was_enrolled = False
+    elif instance.changed_fields(('status',)):
+        was_enrolled = instance.loaded_value('status') == enrolled
+    else:
+        return
+    adjust([instance.student_id], enrolled_courses=(instance.status == enrolled) - was_enrolled)
+
+
+@receiver(post_delete, sender=Enrollment)
+def count_enrollment_delete(sender, instance, **kwargs):
+    if instance.loaded_value('status', instance.status) == Enrollment.Status.ENROLLED:
+        adjust([instance.student_id], enrolled_courses=-1)
@@ -0,0 +1,22 @@
+from celery import shared_task
+
+from . import outbox
+from .counters import reconcile_all
+
+
+@shared_task
+def reconcile_user_counters():
+    """Recount every user's dashboard counters and fix any that drifted."""
+    return f"Fixed counters for {reconcile_all()} users"
+
+
+@shared_task
+def dispatch_outbox():
+    """Hand pending outbox events to their handlers."""
+    return f"Dispatched {outbox.dispatch()} outbox events"
+
+
+@shared_task
+def purge_outbox():
+    """Delete outbox events processed before the retention period."""
+    return f"Purged {outbox.purge()} outbox events"
@@ -1,3 +1,276 @@
-from django.test import TestCase
+from datetime import time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from authentication.models import User
+from courses.models import Course, CourseSection
+from notifications.models import Notification
+from planning.models import StudentPlan
+from registration.models import Enrollment
+from . import counters, outbox
+from .models import OutboxEvent, UserCounters
+
+
+class TrackedFieldsMixinTestCase(TestCase):
+    """Test in-memory change tracking on CourseSection."""
+
+    def setUp(self):
+        course = Course.objects.create(
+            course_code='CS101', title='Intro to CS', credits=3, department='CS', description='Test'
+        )
+        self.section = CourseSection.objects.create(
+            course=course, section_number='001', crn='10001', term='Fall', year=2024,
+            meeting_days='MWF', start_time='09:00', end_time='10:00', location='Room 1'
+        )
+
+    def test_loaded_instances_report_changes_without_queries(self):
+        section = CourseSection.objects.get(pk=self.section.pk)
+        section.location = 'Room 2'
+        section.current_enrollment = 5
+
+        with self.assertNumQueries(0):
+            changes = section.changed_fields()
+        self.assertEqual(changes, {'location': ('Room 1', 'Room 2')})
+
+    def test_values_are_normalized(self):
+        """Assigning the string form of the stored value is not a change."""
+        section = CourseSection.objects.get(pk=self.section.pk)
+        section.start_time = '09:00'
+        self.assertEqual(section.changed_fields(), {})
+
+        section.start_time = '09:30'
+        self.assertEqual(section.changed_fields(), {'start_time': (time(9, 0), time(9, 30))})
+
+    def test_snapshot_follows_saves(self):
+        self.section.location = 'Room 2'
+        self.assertEqual(self.section.changed_fields(), {'location': ('Room 1', 'Room 2')})
+
+        self.section.save(update_fields=['location'])
+        self.assertEqual(self.section.changed_fields(), {})
+        self.assertEqual(self.section.loaded_value('location'), 'Room 2')
+
+    def test_deferred_fields_are_not_tracked(self):
+        section = CourseSection.objects.only('id', 'term').get(pk=self.section.pk)
+        self.assertEqual(section.loaded_value('term'), 'Fall')
+        self.assertIsNone(section.loaded_value('location'))
+        self.assertEqual(section.changed_fields(), {})
+
+
+# Enrolling publishes seat counts on commit; keep that off Redis
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class UserCountersTestCase(TestCase):
+    """Test the denormalized dashboard counters."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='teststu', password='testpass', role=User.Role.STUDENT)
+        course = Course.objects.create(
+            course_code='CS101', title='Intro to CS', credits=3, department='CS', description='Test'
+        )
+        self.section = CourseSection.objects.create(
+            course=course, section_number='001', crn='10001', term='Fall', year=2024,
+            meeting_days='MWF', start_time='09:00', end_time='10:00'
+        )
+        self.client.login(username='teststu', password='testpass')
+
+    def notify(self, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                recipient=self.user, notification_type=Notification.Type.GENERAL,
+                title='Hello', message='Body', **extra
+            )
+
+    def test_first_read_computes_and_stores_counters(self):
+        Notification.objects.bulk_create([
+            Notification(recipient=self.user, notification_type='GENERAL', title='A', message='A'),
+            Notification(recipient=self.user, notification_type='GENERAL', title='B', message='B', is_read=True),
+        ])
+        StudentPlan.objects.create(student=self.user, term='Fall', year=2024, name='Plan')
+        UserCounters.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            values = counters.get_counters(self.user.pk)
+        self.assertEqual(values, {
+            'unread_notifications': 1, 'total_notifications': 2, 'plans': 1, 'enrolled_courses': 0
+        })
+        self.assertTrue(UserCounters.objects.filter(user=self.user, total_notifications=2).exists())
+
+        with self.assertNumQueries(0):
+            self.assertEqual(counters.get_counters(self.user.pk), values)
+
+    def test_write_paths_keep_cache_and_row_in_step(self):
+        counters.get_counters(self.user.pk)
+
+        notification = self.notify()
+        self.notify(is_read=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.is_read = True
+            notification.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            plan = StudentPlan.objects.create(student=self.user, term='Fall', year=2024, name='Plan')
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment = Enrollment.objects.create(student=self.user, section=self.section)
+
+        expected = {'unread_notifications': 0, 'total_notifications': 2, 'plans': 1, 'enrolled_courses': 1}
+        with self.assertNumQueries(0):
+            self.assertEqual(counters.get_counters(self.user.pk), expected)
+        stored = UserCounters.objects.values(*counters.COUNTERS).get(user=self.user)
+        self.assertEqual(stored, expected)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enrollment.status = Enrollment.Status.DROPPED
+            enrollment.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            plan.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.delete()
+
+        self.assertEqual(counters.get_counters(self.user.pk), {
+            'unread_notifications': 0, 'total_notifications': 1, 'plans': 0, 'enrolled_courses': 0
+        })
+
+    def test_reconcile_fixes_drift(self):
+        counters.get_counters(self.user.pk)
+        # Writes that bypass the model layer are not counted
+        Notification.objects.bulk_create([
+            Notification(recipient=self.user, notification_type='GENERAL', title='A', message='A'),
+        ])
+        self.assertEqual(counters.get_counters(self.user.pk)['unread_notifications'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(counters.reconcile_all(), 1)
+        self.assertEqual(counters.get_counters(self.user.pk)['unread_notifications'], 1)
+        self.assertEqual(counters.reconcile_all(), 0)
+
+    def test_dashboard_and_notifications_page_read_counters(self):
+        self.notify()
+        counters.get_counters(self.user.pk)
+
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['unread_notifications'], 1)
+        self.assertEqual(response.context['active_plans'], 0)
+
+        response = self.client.get(reverse('notifications:notifications'))
+        self.assertEqual(response.context['unread_count'], 1)
+        self.assertEqual(response.context['total_notifications'], 1)
+
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    OUTBOX_MAX_ATTEMPTS=2,
+    OUTBOX_RETRY_BACKOFF=10
+)
+class OutboxTestCase(TestCase):
+    """Test recording and dispatching outbox events."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='pass', role=User.Role.STUDENT)
+        self.handled = []
+        handlers = mock.patch.dict(outbox.HANDLERS, {
+            'test.ok': lambda **payload: self.handled.append(payload),
+            'test.fail': self.fail_after_writing,
+        })
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def fail_after_writing(self, **payload):
+        Notification.objects.create(recipient=self.user, notification_type='GENERAL', title='A', message='A')
+        raise RuntimeError('broker down')
+
+    @mock.patch('infrastructure.tasks.dispatch_outbox')
+    def test_events_are_written_with_the_transaction(self, mock_dispatch):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                outbox.record('test.ok', value=1)
+            mock_dispatch.delay.assert_not_called()
+        mock_dispatch.delay.assert_called_once_with()
+
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                outbox.record('test.ok', value=2)
+                raise ValueError
+        self.assertEqual(list(OutboxEvent.objects.values_list('payload', flat=True)), [{'value': 1}])
+
+    @mock.patch('infrastructure.tasks.dispatch_outbox')
+    def test_unreachable_broker_keeps_event(self, mock_dispatch):
+        mock_dispatch.delay.side_effect = OSError('connection refused')
+        with self.assertLogs('infrastructure.outbox', 'WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                outbox.record('test.ok', value=1)
+        self.assertEqual(outbox.dispatch(), 1)
+        self.assertEqual(self.handled, [{'value': 1}])
+
+    def test_dispatch_in_batches(self):
+        OutboxEvent.objects.bulk_create([OutboxEvent(topic='test.ok', payload={'n': n}) for n in range(5)])
+
+        # Per batch, a select and an update; per event, a savepoint around its handler
+        with self.assertNumQueries(3 * 4 + 5 * 2):
+            self.assertEqual(outbox.dispatch(batch_size=2), 5)
+        self.assertEqual([payload['n'] for payload in self.handled], list(range(5)))
+        self.assertFalse(OutboxEvent.objects.filter(processed_at__isnull=True).exists())
+        self.assertEqual(outbox.dispatch(), 0)
+
+    def test_failed_events_are_retried_with_backoff(self):
+        failing = OutboxEvent.objects.create(topic='test.fail')
+        unknown = OutboxEvent.objects.create(topic='test.unknown')
+        OutboxEvent.objects.create(topic='test.ok')
+
+        with self.assertLogs('infrastructure.outbox', 'WARNING'):
+            self.assertEqual(outbox.dispatch(), 1)
+        failing.refresh_from_db()
+        self.assertEqual(failing.attempts, 1)
+        self.assertIn('broker down', failing.last_error)
+        self.assertGreater(failing.available_at, timezone.now() + timedelta(seconds=5))
+        self.assertIn('KeyError', OutboxEvent.objects.get(pk=unknown.pk).last_error)
+        # The failing handler's writes were rolled back
+        self.assertFalse(Notification.objects.exists())
+
+        # Not due yet, then retried until OUTBOX_MAX_ATTEMPTS
+        self.assertEqual(outbox.dispatch(), 0)
+        OutboxEvent.objects.update(available_at=timezone.now())
+        with self.assertLogs('infrastructure.outbox', 'ERROR'):
+            outbox.dispatch()
+        OutboxEvent.objects.update(available_at=timezone.now())
+        self.assertEqual(outbox.dispatch(), 0)
+        failing.refresh_from_db()
+        self.assertEqual(failing.attempts, 2)
+        self.assertIsNone(failing.processed_at)
+
+    def test_enrollment_confirmation_is_created_by_dispatcher(self):
+        outbox.record('enrollment.confirmed', student_id=self.user.pk, registered=2)
+        self.assertFalse(Notification.objects.exists())
+
+        outbox.dispatch()
+        notification = Notification.objects.get(recipient=self.user)
+        self.assertEqual(notification.notification_type, Notification.Type.ENROLLMENT_CONFIRMED)
+        self.assertIn('2 course(s)', notification.message)
+
+    @mock.patch('notifications.tasks.send_notification_emails')
+    def test_emails_that_could_not_be_queued_are_retried(self, mock_send_emails):
+        from notifications import delivery
+
+        eta = timezone.now() + timedelta(minutes=5)
+        mock_send_emails.apply_async.side_effect = OSError('connection refused')
+        with mock.patch('infrastructure.tasks.dispatch_outbox'), self.assertLogs('notifications.delivery'):
+            delivery.queue_emails([1, 2], 'a test', eta=eta)
+        self.assertEqual(OutboxEvent.objects.get().topic, 'notifications.emails')
+
+        mock_send_emails.apply_async.side_effect = None
+        self.assertEqual(outbox.dispatch(), 1)
+        mock_send_emails.apply_async.assert_called_with(([1, 2],), eta=eta)
+
+    def test_purge_processed_events(self):
+        now = timezone.now()
+        OutboxEvent.objects.bulk_create([
+            OutboxEvent(topic='test.ok', processed_at=now - timedelta(days=30)),
+            OutboxEvent(topic='test.ok', processed_at=now),
+            OutboxEvent(topic='test.ok'),
+        ])
+        self.assertEqual(outbox.purge(days=7), 1)
+        self.assertEqual(OutboxEvent.objects.count(), 2)
@@ -0,0 +1,71 @@
+"""
+In-memory change tracking for model fields.
+
+Signal handlers that react to particular field changes used to reload the
+row in ``pre_save`` to see what it looked like before. ``TrackedFieldsMixin``
+instead snapshots the fields a model lists in ``tracked_fields`` when an
+instance is loaded (``from_db``) or saved, so handlers can compare against
+the stored values without a query.
+
+Values are normalized with each field's ``to_python`` so assigning
+``'09:00'`` to a ``TimeField`` that holds ``time(9, 0)`` is not a change.
+Instances built in memory with a primary key, rather than loaded or saved,
+have no snapshot and report no changes.
+"""
+
+
+class TrackedFieldsMixin:
+    """Remember ``tracked_fields`` (attnames) as they are stored in the database."""
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Handlers connected to post_save have compared against the old values
+        self._snapshot_tracked_fields(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_tracked_fields(kwargs.get('fields'))
+
+    def _tracked_value(self, name):
+        return self._meta.get_field(name).to_python(self.__dict__[name])
+
+    def _snapshot_tracked_fields(self, only=None):
+        snapshot = getattr(self, '_loaded_values', None)
+        if snapshot is None or only is None:
+            snapshot = self._loaded_values = {}
+        for name in self.tracked_fields:
+            if only is not None and name not in only and self._meta.get_field(name).name not in only:
+                continue
+            # Deferred fields are not in __dict__ and stay untracked
+            if name in self.__dict__:
+                snapshot[name] = self._tracked_value(name)
+
+    def loaded_value(self, name, default=None):
+        """The stored value of a tracked field, or ``default`` if unknown."""
+        return getattr(self, '_loaded_values', {}).get(name, default)
+
+    def changed_fields(self, names=None):
+        """
+        Map each changed tracked field in ``names`` (default: all) to its
+        ``(stored, current)`` values.
+        """
+        snapshot = getattr(self, '_loaded_values', None)
+        if not snapshot:
+            return {}
+
+        changes = {}
+        for name in names or self.tracked_fields:
+            if name not in snapshot or name not in self.__dict__:
+                continue
+            current = self._tracked_value(name)
+            if current != snapshot[name]:
+                changes[name] = (snapshot[name], current)
+        return changes
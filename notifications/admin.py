@@ -12,8 +12,8 @@ class NotificationAdmin(admin.ModelAdmin):
 
 @admin.register(NotificationPreference)
 class NotificationPreferenceAdmin(admin.ModelAdmin):
-    list_display = ('user', 'email_notifications', 'push_notifications', 'updated_at')
-    list_filter = ('email_notifications', 'push_notifications')
+    list_display = ('user', 'email_notifications', 'daily_digest', 'push_notifications', 'updated_at')
+    list_filter = ('email_notifications', 'daily_digest', 'push_notifications')
     search_fields = ('user__username',)
     raw_id_fields = ('user',)
 
@@ -6,9 +6,5 @@ class NotificationsConfig(AppConfig):
     name = 'notifications'
 
     def ready(self):
-        # Import signal handlers to ensure they're registered
-        try:
-            from . import signals  # noqa: F401
-        except Exception:
-            # Avoid hard failure during migrations or when signals import fails
-            pass
+        # Import signal and outbox handlers to ensure they're registered
+        from . import handlers, signals  # noqa: F401
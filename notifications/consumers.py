@@ -0,0 +1,127 @@
+import asyncio
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from .push import notification_group, notification_payload
+
+# Most missed notifications replayed on resume; beyond this the client refetches
+RESUME_LIMIT = 100
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    WebSocket consumer pushing the current user's notifications.
+
+    New notifications arrive as ``{"type": "notifications", "notifications":
+    [...], "cursor": 42, "unread_count": 3}``. Notifications published
+    within ``NOTIFICATION_PUSH_DELAY`` seconds of each other share one
+    frame, and one published again (a coalesced update) is sent once with
+    its latest contents. ``cursor`` is the newest notification id the
+    connection has delivered.
+
+    After reconnecting, clients send ``{"action": "resume", "cursor": 42}``
+    and receive the notifications created since in the same frame format,
+    or ``{"type": "resync"}`` if they missed more than ``RESUME_LIMIT`` and
+    should reload the list. Without a cursor only ``{"type": "unread",
+    "unread_count": 3}`` is sent. Notifications read on another page arrive as
+    ``{"type": "read", "ids": [...], "unread_count": 0}`` (``ids`` is null
+    when all were read).
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        self.user_id = user.pk
+        self.group_name = notification_group(self.user_id)
+        self.delay = getattr(settings, 'NOTIFICATION_PUSH_DELAY', 0.25)
+        self.pending = {}
+        self.cursor = 0
+        self.flush_task = None
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if getattr(self, 'flush_task', None) is not None:
+            self.flush_task.cancel()
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get('action') != 'resume':
+            await self.send_json({'type': 'error', 'error': 'Unknown action'})
+            return
+        if content.get('cursor') is None:
+            # Nothing delivered yet to resume from; just bring the badge up to date
+            await self.send_json({'type': 'unread', 'unread_count': await self.get_unread_count()})
+            return
+        try:
+            cursor = int(content['cursor'])
+        except (TypeError, ValueError):
+            await self.send_json({'type': 'error', 'error': 'cursor must be a notification id'})
+            return
+
+        missed = await self.get_missed(cursor)
+        if len(missed) > RESUME_LIMIT:
+            await self.send_json({'type': 'resync', 'unread_count': await self.get_unread_count()})
+            return
+        self.cursor = max(self.cursor, cursor)
+        for payload in missed:
+            self.pending.setdefault(payload['id'], payload)
+        await self.flush(0)
+
+    async def notifications_created(self, event):
+        """Receive new or updated notifications from the user's group."""
+        for payload in event['notifications']:
+            self.pending[payload['id']] = payload
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush(self.delay))
+
+    async def notifications_read(self, event):
+        """Receive notifications marked read elsewhere and pass them on."""
+        read = event['ids']
+        for payload in self.pending.values():
+            if read is None or payload['id'] in read:
+                payload['is_read'] = True
+        await self.send_json({
+            'type': 'read',
+            'ids': read,
+            'unread_count': await self.get_unread_count(),
+        })
+
+    async def flush(self, delay):
+        """Send every pending notification in one frame."""
+        if delay:
+            await asyncio.sleep(delay)
+        self.flush_task = None
+        if not self.pending:
+            return
+
+        notifications = sorted(self.pending.values(), key=lambda payload: payload['id'])
+        self.pending = {}
+        self.cursor = max(self.cursor, notifications[-1]['id'])
+        await self.send_json({
+            'type': 'notifications',
+            'notifications': notifications,
+            'cursor': self.cursor,
+            'unread_count': await self.get_unread_count(),
+        })
+
+    @database_sync_to_async
+    def get_missed(self, cursor):
+        from .models import Notification
+
+        missed = Notification.objects.filter(
+            recipient_id=self.user_id, id__gt=cursor
+        ).order_by('id')[:RESUME_LIMIT + 1]
+        return [notification_payload(notification) for notification in missed]
+
+    @database_sync_to_async
+    def get_unread_count(self):
+        from infrastructure.counters import get_counters
+
+        return get_counters(self.user_id)['unread_notifications']
@@ -0,0 +1,87 @@
+"""
+Creating notifications in bulk.
+
+Fan-out tasks (schedule changes, bulk announcements, registration and
+meeting reminders) build unsaved ``Notification`` rows and hand them to
+``create_many``, which inserts them with one ``bulk_create`` and does what
+the per-row signals would have done: it keeps the counters, pushes to open
+pages and queues the emails once the transaction commits.
+"""
+import logging
+from collections import Counter
+from functools import partial
+
+from django.db import transaction
+
+from infrastructure import outbox
+from infrastructure.counters import adjust
+from .models import Notification, NotificationPreference
+from .push import publish_notifications
+
+logger = logging.getLogger(__name__)
+
+# Users without a preference row get the defaults: notify and email, no digest
+DEFAULT_PREFERENCES = (True, True, False)
+
+
+def load_preferences(user_ids, notice_field) -> dict:
+    """
+    ``{user_id: (notify, email, digest)}`` for every id in ``user_ids``,
+    where ``notify`` is the ``notice_field`` preference (``schedule_changes``,
+    ``meeting_reminders``...). One query.
+    """
+    preferences = dict.fromkeys(user_ids, DEFAULT_PREFERENCES)
+    for user_id, *row in NotificationPreference.objects.filter(user_id__in=preferences).values_list(
+        'user_id', notice_field, 'email_notifications', 'daily_digest'
+    ):
+        preferences[user_id] = tuple(row)
+    return preferences
+
+
+def queue_emails(notification_ids, context, eta=None):
+    """Hand notifications to ``send_notification_emails`` in a worker, at ``eta`` if given."""
+    from .tasks import send_notification_emails
+
+    if not notification_ids:
+        return
+    try:
+        if eta is None:
+            send_notification_emails.delay(notification_ids)
+        else:
+            send_notification_emails.apply_async((notification_ids,), eta=eta)
+    except Exception:
+        # Broker unavailable; the outbox retries queueing them
+        logger.warning('Could not queue emails for %s', context, exc_info=True)
+        outbox.record(
+            'notifications.emails',
+            notification_ids=list(notification_ids),
+            eta=eta.isoformat() if eta is not None else None
+        )
+
+
+def create_many(notifications, digest_ids=(), context='notifications', eta=None):
+    """
+    Insert ``notifications`` (unsaved) and return them.
+
+    ``bulk_create`` skips the signals that keep the counters and push, so
+    both happen here, with one counter update per distinct number of
+    notifications a recipient got. Those with ``send_email`` are emailed
+    (at ``eta``, if given) after the transaction commits, except to
+    ``digest_ids``: digest subscribers are emailed by ``send_daily_digests``.
+    """
+    created = Notification.objects.bulk_create(notifications)
+
+    by_count = {}
+    for recipient_id, count in Counter(notification.recipient_id for notification in created).items():
+        by_count.setdefault(count, []).append(recipient_id)
+    for count, recipient_ids in by_count.items():
+        adjust(recipient_ids, total_notifications=count, unread_notifications=count)
+    publish_notifications(created)
+
+    digest_ids = set(digest_ids)
+    to_email = [
+        notification.id for notification in created
+        if notification.send_email and notification.recipient_id not in digest_ids
+    ]
+    transaction.on_commit(partial(queue_emails, to_email, context, eta))
+    return created
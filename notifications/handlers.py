@@ -0,0 +1,42 @@
+"""
+Outbox handlers for notification side effects.
+
+Registered with ``infrastructure.outbox`` when the app is ready. They run
+in the outbox dispatcher, after the change that recorded them committed,
+and may run more than once for the same event.
+"""
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from infrastructure.outbox import handles
+from . import tasks
+from .models import Notification
+
+
+@handles('section.schedule_changed')
+def schedule_changed(section_id, title, message, changes):
+    """Notify the section's enrolled students from a worker."""
+    tasks.fan_out_schedule_change.delay(section_id, title, message, changes)
+
+
+@handles('enrollment.confirmed')
+def enrollment_confirmed(student_id, registered):
+    """Tell a student how many courses their cart registered them for."""
+    Notification.objects.create(
+        recipient_id=student_id,
+        notification_type=Notification.Type.ENROLLMENT_CONFIRMED,
+        title='Enrollment Confirmed',
+        message=f'You have successfully registered for {registered} course(s).',
+        link='/registration/register/',
+        is_sent=True,
+        sent_at=timezone.now()
+    )
+
+
+@handles('notifications.emails')
+def queue_emails(notification_ids, eta=None):
+    """Queue emails whose task could not be queued when they were created."""
+    if eta is None:
+        tasks.send_notification_emails.delay(notification_ids)
+    else:
+        tasks.send_notification_emails.apply_async((notification_ids,), eta=parse_datetime(eta))
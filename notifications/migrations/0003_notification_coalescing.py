@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notification_notificatio_recipie_1609ca_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='coalesce_key',
+            field=models.CharField(blank=True, help_text='Subject that later notifications are merged on', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='coalesce_until',
+            field=models.DateTimeField(blank=True, help_text='End of the window in which events are merged into this notification', null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationpreference',
+            name='daily_digest',
+            field=models.BooleanField(default=False, help_text='Receive one email a day instead of one per notification'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'coalesce_key', 'coalesce_until'], name='notificatio_recipie_44a91e_idx'),
+        ),
+    ]
@@ -1,11 +1,15 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from authentication.models import User
+from infrastructure.tracking import TrackedFieldsMixin
 
 
-class Notification(models.Model):
+class Notification(TrackedFieldsMixin, models.Model):
     """Model for system notifications to users."""
     
+    # Stored read state, so the unread counter sees notifications being read
+    tracked_fields = ('is_read',)
+    
     class Type(models.TextChoices):
         REGISTRATION_DEADLINE = 'REGISTRATION_DEADLINE', _('Registration Deadline')
         MEETING_REMINDER = 'MEETING_REMINDER', _('Meeting Reminder')
@@ -67,15 +71,32 @@ class Notification(models.Model):
         help_text=_('Additional notification metadata')
     )
     
+    coalesce_key = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text=_('Subject that later notifications are merged on')
+    )
+
+    coalesce_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_('End of the window in which events are merged into this notification')
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     read_at = models.DateTimeField(null=True, blank=True)
     sent_at = models.DateTimeField(null=True, blank=True)
-    
+
     class Meta:
         db_table = 'notifications'
         verbose_name = _('Notification')
         verbose_name_plural = _('Notifications')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'created_at', 'id']),
+            models.Index(fields=['recipient', 'coalesce_key', 'coalesce_until']),
+            models.Index(fields=['recipient', 'is_read', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.notification_type} for {self.recipient.username}: {self.title}"
@@ -95,6 +116,11 @@ class NotificationPreference(models.Model):
         help_text=_('Receive notifications via email')
     )
     
+    daily_digest = models.BooleanField(
+        default=False,
+        help_text=_('Receive one email a day instead of one per notification')
+    )
+
     push_notifications = models.BooleanField(
         default=True,
         help_text=_('Receive push notifications')
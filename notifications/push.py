@@ -0,0 +1,80 @@
+"""
+Real-time notification push.
+
+Every new (or coalesced) notification is published to a channel layer
+group for its recipient once the surrounding transaction commits, and
+notifications being marked read are announced the same way.
+``NotificationConsumer`` forwards both to the user's open pages, so the
+unread badge never has to poll.
+
+Clients keep the id of the newest notification they have seen as a
+resume cursor; on reconnect they send it and receive what they missed.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_GROUP = 'notifications.user.{user_id}'
+
+
+def notification_group(user_id) -> str:
+    return NOTIFICATION_GROUP.format(user_id=int(user_id))
+
+
+def notification_payload(notification) -> dict:
+    """The fields sent to clients for one notification."""
+    return {
+        'id': notification.pk,
+        'notification_type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'link': notification.link,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def publish_notifications(notifications):
+    """
+    Push ``notifications`` to their recipients after the current
+    transaction commits, one event per recipient.
+
+    Publishing problems are logged rather than raised so creating
+    notifications does not depend on the channel layer being reachable.
+    """
+    by_recipient = {}
+    for notification in notifications:
+        by_recipient.setdefault(notification.recipient_id, []).append(notification_payload(notification))
+    if not by_recipient:
+        return
+
+    events = [
+        (recipient_id, {'type': 'notifications.created', 'notifications': payloads})
+        for recipient_id, payloads in by_recipient.items()
+    ]
+    transaction.on_commit(lambda: _send(events))
+
+
+def publish_read(recipient_id, ids=None):
+    """Tell ``recipient_id``'s pages that ``ids`` (default: all) were read, after commit."""
+    event = {'type': 'notifications.read', 'ids': list(ids) if ids is not None else None}
+    transaction.on_commit(lambda: _send([(recipient_id, event)]))
+
+
+def _send(events):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(_group_send_all)(channel_layer, events)
+
+
+async def _group_send_all(channel_layer, events):
+    for recipient_id, event in events:
+        try:
+            await channel_layer.group_send(notification_group(recipient_id), event)
+        except Exception:
+            logger.warning('Could not push notifications to user %s', recipient_id, exc_info=True)
@@ -0,0 +1,28 @@
+"""
+Serializers for notification models.
+"""
+from rest_framework import serializers
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """Serializer for a user's notifications."""
+    
+    class Meta:
+        model = Notification
+        fields = [
+            'id', 'notification_type', 'title', 'message', 'link',
+            'is_read', 'metadata', 'created_at', 'read_at'
+        ]
+        read_only_fields = fields
+
+
+class MarkReadSerializer(serializers.Serializer):
+    """Serializer for marking notifications read; without ``ids``, all of them."""
+    
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        max_length=1000
+    )
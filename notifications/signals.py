@@ -1,121 +1,81 @@
-﻿from django.db.models.signals import pre_save, post_save
+﻿from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.utils import timezone
 import datetime
 
+from authentication.models import User
 from courses.models import CourseSection
-from registration.models import Enrollment
-from .models import Notification, NotificationPreference
-from . import tasks
+from infrastructure import outbox
+from .coalescing import change_message
+from .models import Notification
+from .push import publish_notifications
 
 
-@receiver(pre_save, sender=CourseSection)
-def cache_old_course_section(sender, instance, **kwargs):
-    """Cache the old CourseSection on the instance before save so we can compare in post_save."""
-    if not instance.pk:
-        instance._old_course_section = None
-        return
-
-    try:
-        old = CourseSection.objects.get(pk=instance.pk)
-        instance._old_course_section = old
-    except CourseSection.DoesNotExist:
-        instance._old_course_section = None
+# Fields whose changes students are notified about
+WATCHED_FIELDS = ('meeting_days', 'start_time', 'end_time', 'location', 'instructor_id')
 
 
 @receiver(post_save, sender=CourseSection)
-def handle_course_section_update(sender, instance, created, **kwargs):
+def handle_course_section_update(sender, instance, created, update_fields=None, **kwargs):
     """Detect schedule-related changes and create notifications for enrolled students."""
     # Only care about updates
     if created:
         return
 
-    old = getattr(instance, '_old_course_section', None)
-    if not old:
-        # Could not determine previous state; skip
+    # Saves limited to other fields, such as seat counts, cannot change the schedule
+    if update_fields and not {
+        sender._meta.get_field(name).attname for name in update_fields
+    } & set(WATCHED_FIELDS):
         return
 
-    changed_fields = []
-    # fields to watch
-    watched = ['meeting_days', 'start_time', 'end_time', 'location', 'instructor_id']
-
-    for field in watched:
-        old_val = getattr(old, field, None)
-        new_val = getattr(instance, field, None)
-        if old_val != new_val:
-            changed_fields.append((field, old_val, new_val))
+    # Compared against the values the instance was loaded with; no query
+    changed_fields = [
+        (field, old_val, new_val)
+        for field, (old_val, new_val) in instance.changed_fields(WATCHED_FIELDS).items()
+    ]
 
     if not changed_fields:
         return
 
-    # Format a message summarizing changes
-    changes_text = []
+    # Serialize change values for JSON storage
+    def _serialize(val):
+        if val is None:
+            return None
+        if isinstance(val, (datetime.datetime, datetime.date, datetime.time)):
+            return val.isoformat()
+        # For model instances like User, prefer username
+        if hasattr(val, 'username'):
+            return getattr(val, 'username')
+        try:
+            return str(val)
+        except Exception:
+            return None
+
+    changes = []
     for field, old_val, new_val in changed_fields:
-        # For instructor_id, try to show username if possible
+        change = {
+            'field': field,
+            'old': _serialize(old_val),
+            'new': _serialize(new_val)
+        }
+        # For instructor_id, show the username if possible
         if field == 'instructor_id':
-            old_disp = getattr(old.instructor, 'username', None) if old.instructor else None
-            new_disp = getattr(instance.instructor, 'username', None) if instance.instructor else None
-        else:
-            old_disp = old_val
-            new_disp = new_val
-
-        changes_text.append(f"{field.replace('_', ' ').title()}: {old_disp}  {new_disp}")
+            change['old_display'] = User.objects.filter(pk=old_val).values_list('username', flat=True).first() if old_val else None
+            change['new_display'] = getattr(instance.instructor, 'username', None) if instance.instructor else None
+        changes.append(change)
 
     title = f"Schedule change: {instance.course.course_code} {instance.section_number}"
-    message = "The following changes were made to your course section:\n" + "\n".join(changes_text)
+    message = change_message(changes)
 
-    # Notify all enrolled students (status ENROLLED)
-    enrollments = Enrollment.objects.filter(section=instance, status=Enrollment.Status.ENROLLED).select_related('student')
+    # Notify enrolled students from a worker once the change is committed,
+    # so the save itself does not wait on a query and insert per student
+    outbox.record(
+        'section.schedule_changed',
+        section_id=instance.id, title=title, message=message, changes=changes
+    )
 
-    for enrollment in enrollments:
-        user = enrollment.student
 
-        # Check user preferences (NotificationPreference)  default to allow
-        try:
-            pref = user.notification_preference
-        except NotificationPreference.DoesNotExist:
-            pref = None
-
-        if pref and not pref.schedule_changes:
-            continue
-
-        send_email = True if (pref is None or pref.email_notifications) else False
-
-        # Serialize change values for JSON storage
-        def _serialize(val):
-            if val is None:
-                return None
-            if isinstance(val, (datetime.datetime, datetime.date, datetime.time)):
-                return val.isoformat()
-            # For model instances like User, prefer username
-            if hasattr(val, 'username'):
-                return getattr(val, 'username')
-            try:
-                return str(val)
-            except Exception:
-                return None
-
-        notif = Notification.objects.create(
-            recipient=user,
-            notification_type=Notification.Type.SCHEDULE_CHANGE,
-            title=title,
-            message=message,
-            link='',
-            send_email=send_email,
-            metadata={
-                'section_id': instance.id,
-                'changes': [{
-                    'field': f,
-                    'old': _serialize(o),
-                    'new': _serialize(n)
-                } for f, o, n in changed_fields]
-            }
-        )
-
-        # Queue email send if requested
-        if send_email:
-            try:
-                tasks.send_notification_email.delay(notif.id)
-            except Exception:
-                # If Celery not configured in test environment, ignore
-                pass
+@receiver(post_save, sender=Notification)
+def push_new_notification(sender, instance, created, **kwargs):
+    """Push a new notification to the recipient's open pages once committed."""
+    if created:
+        publish_notifications([instance])
@@ -1,75 +1,386 @@
 ﻿from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
+from functools import partial
+import logging
+
+from . import coalescing, delivery
 from .models import Notification
 
+logger = logging.getLogger(__name__)
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _email_message(notification, connection):
+    return EmailMessage(
+        subject=notification.title,
+        body=notification.message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[notification.recipient.email],
+        connection=connection,
+    )
+
+
+def _digest_message(notifications, connection):
+    recipient = notifications[0].recipient
+    count = len(notifications)
+    return EmailMessage(
+        subject=f"Your daily summary: {count} notification{'s' if count != 1 else ''}",
+        body=f"Hello {recipient.first_name or recipient.email},\n\n" + "\n\n".join(
+            f"{notification.title}\n{notification.message}" for notification in notifications
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[recipient.email],
+        connection=connection,
+    )
+
+
+def _deliver(messages):
+    """
+    Send ``(key, build)`` pairs over one mail connection, where ``build``
+    returns the message for a connection. Returns ``(sent_keys, failed_keys)``.
+    """
+    sent, failed = [], []
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception:
+        logger.warning('Could not open a mail connection', exc_info=True)
+        return sent, [key for key, build in messages]
+
+    try:
+        for key, build in messages:
+            try:
+                build(connection).send()
+                sent.append(key)
+            except Exception:
+                logger.warning('Could not send email %s', key, exc_info=True)
+                failed.append(key)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def deliver_emails(notifications):
+    """
+    Send ``notifications`` over one mail connection.
+
+    Returns ``(sent_ids, failed_ids)``. Recipients without an address are
+    in neither list; they cannot be emailed and are not retried.
+    """
+    return _deliver([
+        (notification.id, partial(_email_message, notification))
+        for notification in notifications if notification.recipient.email
+    ])
+
 
 @shared_task
 def send_notification_email(notification_id):
     """Send email notification to user."""
-    try:
-        notification = Notification.objects.get(id=notification_id)
-
-        if notification.send_email and not notification.email_sent:
-            send_mail(
-                subject=notification.title,
-                message=notification.message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[notification.recipient.email],
-                fail_silently=False,
+    return send_notification_emails([notification_id])
+
+
+@shared_task
+def send_notification_emails(notification_ids, attempt=0):
+    """
+    Email a list of notifications.
+
+    Notifications are sent in chunks of ``EMAIL_BATCH_SIZE``. Each chunk is
+    one query for the notifications and their recipients, one reused mail
+    connection, and one ``UPDATE`` marking the sent ones. Messages that
+    fail are retried on their own, up to ``EMAIL_MAX_RETRIES`` times, with
+    an exponential backoff starting at ``EMAIL_RETRY_BACKOFF`` seconds.
+    """
+    chunk_size = getattr(settings, 'EMAIL_BATCH_SIZE', 100)
+
+    sent_total, failed = 0, []
+    for chunk in _batches(list(notification_ids), chunk_size):
+        notifications = list(Notification.objects.filter(
+            id__in=chunk, send_email=True, email_sent=False
+        ).select_related('recipient').only(
+            'id', 'title', 'message', 'recipient__email'
+        ))
+
+        sent, chunk_failed = deliver_emails(notifications)
+        if sent:
+            now = timezone.now()
+            Notification.objects.filter(id__in=sent).update(
+                email_sent=True, is_sent=True, sent_at=now
             )
+        sent_total += len(sent)
+        failed.extend(chunk_failed)
 
-            notification.email_sent = True
-            notification.sent_at = timezone.now()
-            notification.save()
+    if failed:
+        if attempt < getattr(settings, 'EMAIL_MAX_RETRIES', 3):
+            countdown = getattr(settings, 'EMAIL_RETRY_BACKOFF', 30) * 2 ** attempt
+            try:
+                send_notification_emails.apply_async((failed, attempt + 1), countdown=countdown)
+            except Exception:
+                logger.error('Could not schedule retry of %d emails', len(failed), exc_info=True)
+        else:
+            logger.error('Giving up on %d emails after %d attempts', len(failed), attempt + 1)
 
-            return f"Email sent to {notification.recipient.email}"
-    except Notification.DoesNotExist:
-        return f"Notification {notification_id} not found"
-    except Exception as e:
-        return f"Error sending email: {str(e)}"
+    return f"Sent {sent_total} of {len(notification_ids)} emails"
 
 
 @shared_task
-def send_bulk_notifications(user_ids, notification_type, title, message, send_email=False):
-    """Send notifications to multiple users."""
-    from authentication.models import User
+def fan_out_schedule_change(section_id, title, message, changes):
+    """
+    Notify every student enrolled in a section about a schedule change.
 
-    notifications_created = 0
+    Students are handled in batches of ``NOTIFICATION_FANOUT_BATCH_SIZE``:
+    one query loads the batch's preferences, one finds the notifications
+    about this section still open for coalescing (see ``coalescing``), one
+    ``bulk_create`` inserts the rest and a single task emails them when
+    their window closes. Students who take a daily digest are emailed by
+    ``send_daily_digests`` instead.
+    """
+    from registration.models import Enrollment
+
+    batch_size = getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', 500)
+    student_ids = list(Enrollment.objects.filter(
+        section_id=section_id, status=Enrollment.Status.ENROLLED
+    ).values_list('student_id', flat=True).distinct())
+    metadata = {'section_id': section_id, 'changes': changes}
+    key = f'section:{section_id}'
 
-    for user_id in user_ids:
-        try:
-            user = User.objects.get(id=user_id)
-            notification = Notification.objects.create(
-                recipient=user,
-                notification_type=notification_type,
+    created = merged = 0
+    for batch in _batches(student_ids, batch_size):
+        preferences = delivery.load_preferences(batch, 'schedule_changes')
+        notifications = [
+            Notification(
+                recipient_id=student_id,
+                notification_type=Notification.Type.SCHEDULE_CHANGE,
                 title=title,
                 message=message,
-                send_email=send_email
+                link='',
+                send_email=wants_email,
+                metadata=metadata,
             )
+            for student_id, (wants_notice, wants_email, _) in preferences.items() if wants_notice
+        ]
+
+        # Merged notifications already have their email queued
+        fresh, updated = coalescing.merge_open(notifications, key)
+        new = delivery.create_many(
+            fresh,
+            [student_id for student_id, (_, _, wants_digest) in preferences.items() if wants_digest],
+            f'section {section_id} notifications',
+            eta=fresh[0].coalesce_until if fresh else None
+        )
+        created += len(new)
+        merged += len(updated)
+
+    return f"Created {created} notifications, merged {merged}"
+
+
+@shared_task
+def send_bulk_notifications(user_ids, notification_type, title, message, send_email=False):
+    """
+    Send notifications to multiple users.
 
-            if send_email:
-                send_notification_email.delay(notification.id)
+    Users are handled in chunks of ``NOTIFICATION_FANOUT_BATCH_SIZE``: one
+    query keeps the ids that exist, one ``bulk_create`` inserts their
+    notifications and one task emails the chunk, leaving out users who
+    take a daily digest.
+    """
+    from authentication.models import User
+
+    batch_size = getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', 500)
+    notifications_created = 0
 
-            notifications_created += 1
-        except User.DoesNotExist:
-            continue
+    for batch in _batches(list(dict.fromkeys(user_ids)), batch_size):
+        existing = dict(User.objects.filter(id__in=batch).values_list(
+            'id', 'notification_preference__daily_digest'
+        ))
+        notifications = delivery.create_many(
+            [
+                Notification(
+                    recipient_id=user_id,
+                    notification_type=notification_type,
+                    title=title,
+                    message=message,
+                    send_email=send_email
+                )
+                for user_id in existing
+            ],
+            [user_id for user_id, wants_digest in existing.items() if wants_digest],
+            'bulk notifications'
+        )
+        notifications_created += len(notifications)
 
     return f"Created {notifications_created} notifications"
 
 
+@shared_task
+def send_daily_digests():
+    """
+    Email each daily digest subscriber one summary of their unsent notifications.
+
+    Recipients are handled in chunks of ``EMAIL_BATCH_SIZE``: one query
+    loads the chunk's pending notifications, the digests go out over one
+    mail connection and one ``UPDATE`` marks what was sent. Digests that
+    fail stay pending for the next run.
+    """
+    pending = Notification.objects.filter(
+        send_email=True,
+        email_sent=False,
+        recipient__notification_preference__daily_digest=True,
+        recipient__notification_preference__email_notifications=True,
+    )
+    recipient_ids = list(pending.values_list('recipient_id', flat=True).distinct().order_by())
+    chunk_size = getattr(settings, 'EMAIL_BATCH_SIZE', 100)
+
+    sent_total = 0
+    for chunk in _batches(recipient_ids, chunk_size):
+        by_recipient = {}
+        for notification in pending.filter(recipient_id__in=chunk).select_related('recipient').only(
+            'id', 'title', 'message', 'created_at', 'recipient__email', 'recipient__first_name'
+        ).order_by('recipient_id', 'created_at'):
+            by_recipient.setdefault(notification.recipient_id, []).append(notification)
+
+        sent, failed = _deliver([
+            (recipient_id, partial(_digest_message, notifications))
+            for recipient_id, notifications in by_recipient.items() if notifications[0].recipient.email
+        ])
+        sent_ids = [notification.id for recipient_id in sent for notification in by_recipient[recipient_id]]
+        if sent_ids:
+            Notification.objects.filter(id__in=sent_ids).update(
+                email_sent=True, is_sent=True, sent_at=timezone.now()
+            )
+        sent_total += len(sent)
+
+    return f"Sent {sent_total} digests"
+
+
+@shared_task
+def purge_read_notifications():
+    """
+    Delete read notifications older than ``NOTIFICATION_RETENTION_DAYS``.
+
+    Rows go in chunks of ``NOTIFICATION_PURGE_BATCH_SIZE``, each its own
+    short transaction, so the table is never locked for long. Each chunk is
+    an ordinary ``delete()``, so related rows are collected and
+    ``count_notification_delete`` lowers the recipients' counters.
+    """
+    retention = timedelta(days=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90))
+    batch_size = getattr(settings, 'NOTIFICATION_PURGE_BATCH_SIZE', 1000)
+    cutoff = timezone.now() - retention
+    expired = Notification.objects.filter(is_read=True).filter(
+        Q(read_at__lt=cutoff) | Q(read_at__isnull=True, created_at__lt=cutoff)
+    )
+
+    purged = 0
+    while True:
+        with transaction.atomic():
+            ids = list(expired.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            Notification.objects.filter(id__in=ids).delete()
+        purged += len(ids)
+
+    return f"Purged {purged} notifications"
+
+
 @shared_task
 def check_registration_deadlines():
-    """Check for upcoming registration deadlines and send reminders."""
-    # This would check for deadlines and create notifications
-    # Implementation depends on how deadlines are stored
-    pass
+    """
+    Remind students who have not registered that their window is closing.
+
+    Windows whose ``remind_at`` has passed and that are still open are
+    found through the partial "reminders due" index. Each window's
+    unregistered students are one anti-join query against enrollments,
+    read in keyset chunks of ``NOTIFICATION_FANOUT_BATCH_SIZE`` so memory
+    stays flat however large the cohort is.
+    """
+    from registration.models import RegistrationWindow
+
+    now = timezone.now()
+    window_ids = list(RegistrationWindow.objects.filter(
+        reminders_sent_at__isnull=True, remind_at__lte=now, closes_at__gt=now
+    ).order_by('remind_at').values_list('id', flat=True))
+
+    reminded = sum(_remind_unregistered(window_id) for window_id in window_ids)
+    return f"Sent {reminded} registration reminders for {len(window_ids)} windows"
+
+
+def _remind_unregistered(window_id):
+    """
+    Notify one window's unregistered students, a chunk per transaction.
+
+    Each chunk locks the window, continues after its ``reminder_cursor`` and
+    advances it together with the inserted notifications, so a run that
+    stops part way (or overlaps another) resumes without repeats.
+    """
+    from registration.models import RegistrationWindow
+
+    batch_size = getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', 500)
+    reminded = 0
+    while True:
+        with transaction.atomic():
+            window = RegistrationWindow.objects.select_for_update().get(pk=window_id)
+            if window.reminders_sent_at is not None:
+                return reminded
+
+            student_ids = list(window.unregistered_students().exclude(
+                notification_preference__registration_deadlines=False
+            ).filter(id__gt=window.reminder_cursor).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not student_ids:
+                window.reminders_sent_at = timezone.now()
+                window.save(update_fields=['reminders_sent_at'])
+                return reminded
+
+            preferences = delivery.load_preferences(student_ids, 'registration_deadlines')
+            closes = timezone.localtime(window.closes_at)
+            delivery.create_many(
+                [
+                    Notification(
+                        recipient_id=student_id,
+                        notification_type=Notification.Type.REGISTRATION_DEADLINE,
+                        title=f'Registration for {window.term} {window.year} closes soon',
+                        message=(
+                            f'Registration for {window.term} {window.year} closes on '
+                            f'{closes:%B %d at %I:%M %p}. You have not registered for any courses yet.'
+                        ),
+                        link='/registration/register/',
+                        send_email=wants_email,
+                        metadata={'registration_window_id': window.pk},
+                    )
+                    for student_id, (_, wants_email, _) in preferences.items()
+                ],
+                [student_id for student_id, (_, _, wants_digest) in preferences.items() if wants_digest],
+                f'registration window {window_id} reminders'
+            )
+
+            window.reminder_cursor = student_ids[-1]
+            window.save(update_fields=['reminder_cursor'])
+        reminded += len(student_ids)
 
 
 @shared_task
 def check_meeting_reminders():
-    """Check for upcoming advisor meetings and send reminders."""
-    # This would check for scheduled meetings and create reminders
-    # Implementation depends on how meetings are stored
-    pass
+    """
+    Queue the advisor meeting reminders due during this tick, each bucket
+    of the timing wheel as a task due at its time (see ``advisor.reminders``).
+    """
+    from advisor.reminders import run_tick
+
+    return f"Queued reminders for {run_tick()} meetings"
+
+
+@shared_task
+def send_meeting_reminders(items):
+    """Send one bucket of meeting reminders, ``(meeting_id, remind_at)`` pairs with ISO times."""
+    from advisor.reminders import send_reminders
+
+    sent = send_reminders([(meeting_id, parse_datetime(remind_at)) for meeting_id, remind_at in items])
+    return f"Sent reminders for {sent} meetings"
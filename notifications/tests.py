@@ -40,15 +40,38 @@ class ScheduleChangeSignalTests(TestCase):
 
         # Enroll student
         Enrollment.objects.create(student=self.student, section=self.section, status=Enrollment.Status.ENROLLED)
-from django.test import TestCase
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
 from unittest.mock import patch
 
 from authentication.models import User
 from courses.models import Course, CourseSection
-from registration.models import Enrollment
+from infrastructure.counters import get_counters
+from infrastructure.models import OutboxEvent
+from infrastructure.tasks import dispatch_outbox
+from registration.models import Enrollment, RegistrationWindow
+from . import tasks
 from .models import Notification, NotificationPreference
+from .routing import websocket_urlpatterns
+from .utils import mark_read
 
 
+def dispatch_in_process():
+	"""Run the outbox dispatch requested on commit here instead of in a worker."""
+	return patch('infrastructure.tasks.dispatch_outbox.delay', side_effect=dispatch_outbox)
+
+
+# Saving a section publishes seat counts on commit; keep that off Redis
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
 class ScheduleChangeSignalTests(TestCase):
 	def setUp(self):
 		# Create a student user and an instructor
@@ -83,12 +106,27 @@ class ScheduleChangeSignalTests(TestCase):
 		# Enroll student
 		Enrollment.objects.create(student=self.student, section=self.section, status=Enrollment.Status.ENROLLED)
 
-	@patch('notifications.signals.tasks.send_notification_email')
-	def test_schedule_change_creates_notifications(self, mock_send_email_task):
-		# Update the section start_time and location to trigger the signal
-		self.section.start_time = '10:00'
-		self.section.location = 'Room 2'
-		self.section.save()
+	def save_section_change(self):
+		"""Move the section and run the fan-out the commit would queue."""
+		with dispatch_in_process(), patch(
+			'notifications.handlers.tasks.fan_out_schedule_change.delay',
+			side_effect=tasks.fan_out_schedule_change
+		) as mock_fan_out:
+			with self.captureOnCommitCallbacks(execute=True) as callbacks:
+				self.section.start_time = '10:00'
+				self.section.location = 'Room 2'
+				self.section.save()
+				# Only the outbox event is written in the registrar's transaction
+				self.assertFalse(Notification.objects.exists())
+				self.assertEqual(OutboxEvent.objects.get().topic, 'section.schedule_changed')
+		self.assertTrue(callbacks)
+		self.assertFalse(OutboxEvent.objects.filter(processed_at__isnull=True).exists())
+		return mock_fan_out
+
+	@patch('notifications.tasks.send_notification_emails')
+	def test_schedule_change_creates_notifications(self, mock_send_emails_task):
+		mock_fan_out = self.save_section_change()
+		mock_fan_out.assert_called_once()
 
 		# Check that a notification was created for the student
 		notifs = Notification.objects.filter(
@@ -98,12 +136,488 @@ class ScheduleChangeSignalTests(TestCase):
 
 		notif = notifs.first()
 		# message should mention changed fields
-		self.assertIn('Location', notif.message) or self.assertIn('location', notif.message.lower())
-
-		# If the task was queued via .delay on the Celery task, the patched object should have been called
-		try:
-			mock_send_email_task.delay.assert_called()
-		except Exception:
-			# Fallback: ensure email_sent is still False initially
-			self.assertFalse(notif.email_sent)
-		self.section.location = 'Room 2'
+		self.assertIn('location', notif.message.lower())
+		self.assertLessEqual(
+			{'start_time', 'location'}, {change['field'] for change in notif.metadata['changes']}
+		)
+
+		# One email task is queued for the batch, to go out when the window closes
+		mock_send_emails_task.apply_async.assert_called_once_with(([notif.id],), eta=notif.coalesce_until)
+		self.assertFalse(notif.email_sent)
+
+	@patch('notifications.tasks.send_notification_emails')
+	def test_fan_out_is_batched(self, mock_send_emails_task):
+		students = User.objects.bulk_create([
+			User(username=f'student{n}', email=f'student{n}@example.com', role=User.Role.STUDENT)
+			for n in range(2, 12)
+		])
+		Enrollment.objects.bulk_create([
+			Enrollment(student=student, section=self.section, status=Enrollment.Status.ENROLLED)
+			for student in students
+		])
+		# One student opts out, another only wants in-app notices
+		NotificationPreference.objects.create(user=students[0], schedule_changes=False)
+		NotificationPreference.objects.create(user=students[1], email_notifications=False)
+
+		with self.settings(NOTIFICATION_FANOUT_BATCH_SIZE=5), self.captureOnCommitCallbacks(execute=True):
+			# Students, then per batch of 5: preferences, open notifications,
+			# one insert and one counters update
+			with self.assertNumQueries(1 + 3 * 4):
+				tasks.fan_out_schedule_change(self.section.id, 'Schedule change', 'Moved', [])
+
+		self.assertEqual(Notification.objects.count(), 10)
+		self.assertFalse(Notification.objects.filter(recipient=students[0]).exists())
+		self.assertFalse(Notification.objects.get(recipient=students[1]).send_email)
+		self.assertEqual(mock_send_emails_task.apply_async.call_count, 3)
+		queued = [i for call in mock_send_emails_task.apply_async.call_args_list for i in call.args[0][0]]
+		self.assertEqual(len(queued), 9)
+
+	@patch('notifications.tasks.send_notification_emails')
+	def test_merging_loads_notifications_once(self, mock_send_emails_task):
+		students = User.objects.bulk_create([
+			User(username=f'student{n}', email=f'student{n}@example.com', role=User.Role.STUDENT)
+			for n in range(2, 12)
+		])
+		Enrollment.objects.bulk_create([
+			Enrollment(student=student, section=self.section, status=Enrollment.Status.ENROLLED)
+			for student in students
+		])
+		change = {'field': 'location', 'old': 'Room 1', 'new': 'Room 2'}
+		tasks.fan_out_schedule_change(self.section.id, 'Schedule change', 'Moved', [change])
+
+		with self.settings(NOTIFICATION_FANOUT_BATCH_SIZE=5), self.captureOnCommitCallbacks():
+			# Students, then per batch of 5 (11 students): preferences, open
+			# notifications and one update; publishing reads nothing
+			with self.assertNumQueries(1 + 3 * 3):
+				tasks.fan_out_schedule_change(
+					self.section.id, 'Schedule change', 'Moved',
+					[{'field': 'location', 'old': 'Room 2', 'new': 'Room 3'}]
+				)
+
+		self.assertEqual(Notification.objects.count(), 11)
+		self.assertIn('Room 3', Notification.objects.get(recipient=students[0]).message)
+
+	def edit_section(self, **values):
+		with dispatch_in_process(), patch(
+			'notifications.handlers.tasks.fan_out_schedule_change.delay',
+			side_effect=tasks.fan_out_schedule_change
+		):
+			with self.captureOnCommitCallbacks(execute=True):
+				section = CourseSection.objects.get(pk=self.section.pk)
+				for field, value in values.items():
+					setattr(section, field, value)
+				section.save()
+
+	@patch('notifications.tasks.send_notification_emails')
+	def test_quick_edits_coalesce_into_one_notification(self, mock_send_emails_task):
+		other = User.objects.create_user(username='instructor2', password='pass', role=User.Role.ADVISOR)
+		self.edit_section(start_time='10:00', end_time='11:00')
+		self.edit_section(location='Room 2')
+		self.edit_section(instructor=other, start_time='11:00', end_time='12:00')
+
+		notif = Notification.objects.get(recipient=self.student)
+		changes = {change['field']: change for change in notif.metadata['changes']}
+		self.assertEqual(set(changes), {'start_time', 'end_time', 'location', 'instructor_id'})
+		# The first old value and the latest new value
+		self.assertEqual((changes['start_time']['old'], changes['start_time']['new']), ('09:00:00', '11:00:00'))
+		self.assertIn('instructor1', notif.message)
+		self.assertIn('instructor2', notif.message)
+		self.assertIn('Room 2', notif.message)
+		# One email, held until the window closes
+		mock_send_emails_task.apply_async.assert_called_once_with(([notif.id],), eta=notif.coalesce_until)
+
+		# An edit undone within the window drops out
+		self.edit_section(location='Room 1')
+		notif.refresh_from_db()
+		self.assertNotIn('location', {change['field'] for change in notif.metadata['changes']})
+
+	@patch('notifications.tasks.send_notification_emails')
+	def test_read_or_expired_notifications_are_not_merged(self, mock_send_emails_task):
+		self.edit_section(location='Room 2')
+		Notification.objects.update(is_read=True)
+		self.edit_section(location='Room 3')
+
+		with self.settings(NOTIFICATION_COALESCE_WINDOW=0):
+			self.edit_section(location='Room 4')
+			self.edit_section(location='Room 5')
+
+		self.assertEqual(Notification.objects.filter(recipient=self.student).count(), 4)
+
+	@patch('notifications.tasks.send_notification_emails')
+	def test_digest_subscribers_are_not_emailed_per_change(self, mock_send_emails_task):
+		NotificationPreference.objects.filter(user=self.student).update(daily_digest=True)
+		self.edit_section(location='Room 2')
+
+		notif = Notification.objects.get(recipient=self.student)
+		self.assertTrue(notif.send_email)
+		mock_send_emails_task.apply_async.assert_not_called()
+		mock_send_emails_task.delay.assert_not_called()
+
+	def test_seat_count_saves_skip_change_detection(self):
+		"""Enrollment count updates cost only their UPDATE."""
+		section = CourseSection.objects.get(pk=self.section.pk)
+		section.current_enrollment += 1
+		with self.captureOnCommitCallbacks() as callbacks:
+			with self.assertNumQueries(1):
+				section.save(update_fields=['current_enrollment', 'updated_at'])
+		# Only the seat count push is queued
+		self.assertEqual(len(callbacks), 1)
+
+	def test_unchanged_schedule_does_not_notify(self):
+		"""Re-saving equal values, even as strings, is not a schedule change."""
+		section = CourseSection.objects.get(pk=self.section.pk)
+		section.start_time = '09:00'
+		section.save()
+		self.assertFalse(OutboxEvent.objects.exists())
+
+
+@override_settings(
+	CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+	EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+	EMAIL_BATCH_SIZE=2,
+	EMAIL_MAX_RETRIES=2,
+	EMAIL_RETRY_BACKOFF=10
+)
+class BulkEmailDeliveryTests(TestCase):
+	def setUp(self):
+		self.users = User.objects.bulk_create([
+			User(username=f'user{n}', email=f'user{n}@example.com', role=User.Role.STUDENT)
+			for n in range(5)
+		])
+		self.notifications = Notification.objects.bulk_create([
+			Notification(
+				recipient=user, notification_type=Notification.Type.GENERAL,
+				title='Hello', message='Body', send_email=True
+			)
+			for user in self.users
+		])
+		self.ids = [notification.id for notification in self.notifications]
+
+	def test_chunks_share_one_connection_and_one_update(self):
+		with patch('notifications.tasks.get_connection', wraps=mail.get_connection) as connections:
+			# Per chunk of 2: one select with recipients and one update
+			with self.assertNumQueries(3 * 2):
+				tasks.send_notification_emails(self.ids)
+
+		self.assertEqual(connections.call_count, 3)
+		self.assertEqual(len(mail.outbox), 5)
+		self.assertEqual(sorted(message.to[0] for message in mail.outbox), sorted(u.email for u in self.users))
+		self.assertEqual(Notification.objects.filter(email_sent=True, sent_at__isnull=False).count(), 5)
+
+		# Already sent notifications are not emailed again
+		tasks.send_notification_emails(self.ids)
+		self.assertEqual(len(mail.outbox), 5)
+
+	def test_failed_messages_are_retried_with_backoff(self):
+		real_send = EmailBackend.send_messages
+
+		def flaky(backend, messages):
+			if messages[0].to == ['user3@example.com']:
+				raise ConnectionError('mailbox unavailable')
+			return real_send(backend, messages)
+
+		with patch.object(EmailBackend, 'send_messages', flaky), self.assertLogs('notifications.tasks'):
+			with patch.object(tasks.send_notification_emails, 'apply_async') as retry:
+				tasks.send_notification_emails(self.ids)
+				retry.assert_called_once_with(([self.ids[3]], 1), countdown=10)
+
+				retry.reset_mock()
+				tasks.send_notification_emails([self.ids[3]], attempt=1)
+				retry.assert_called_once_with(([self.ids[3]], 2), countdown=20)
+
+				# Out of retries
+				retry.reset_mock()
+				tasks.send_notification_emails([self.ids[3]], attempt=2)
+				retry.assert_not_called()
+
+		self.assertEqual(len(mail.outbox), 4)
+		self.assertFalse(Notification.objects.get(id=self.ids[3]).email_sent)
+
+	@override_settings(NOTIFICATION_FANOUT_BATCH_SIZE=2)
+	def test_bulk_notifications_batch_users(self):
+		user_ids = [user.id for user in self.users] + [999999]
+		with patch('notifications.tasks.send_notification_emails') as send_task, self.captureOnCommitCallbacks(execute=True):
+			# Per chunk of 2 ids: one user lookup, one insert and one counters update
+			with self.assertNumQueries(3 * 3):
+				result = tasks.send_bulk_notifications(
+					user_ids, Notification.Type.GENERAL, 'Heads up', 'Body', send_email=True
+				)
+
+		self.assertEqual(result, 'Created 5 notifications')
+		self.assertEqual(send_task.delay.call_count, 3)
+		self.assertEqual(Notification.objects.filter(title='Heads up').count(), 5)
+
+	def test_daily_digest_groups_pending_notifications(self):
+		NotificationPreference.objects.bulk_create([
+			NotificationPreference(user=user, daily_digest=True) for user in self.users[:3]
+		])
+		NotificationPreference.objects.filter(user=self.users[2]).update(email_notifications=False)
+
+		with patch('notifications.tasks.get_connection', wraps=mail.get_connection) as connections:
+			result = tasks.send_daily_digests()
+
+		self.assertEqual(result, 'Sent 2 digests')
+		# One chunk of 2 recipients, one connection
+		self.assertEqual(connections.call_count, 1)
+		self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['user0@example.com', 'user1@example.com'])
+		self.assertIn('Hello', mail.outbox[0].body)
+		self.assertEqual(
+			set(Notification.objects.filter(email_sent=True).values_list('recipient_id', flat=True)),
+			{self.users[0].id, self.users[1].id}
+		)
+
+		# Nothing is pending the next day
+		self.assertEqual(tasks.send_daily_digests(), 'Sent 0 digests')
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class RegistrationDeadlineTests(TestCase):
+	def setUp(self):
+		now = timezone.now()
+		self.window = RegistrationWindow.objects.create(
+			term='Fall', year=2024, cohort=2,
+			opens_at=now - timedelta(days=7), closes_at=now + timedelta(hours=24)
+		)
+		course = Course.objects.create(
+			course_code='CS101', title='Intro', description='Desc', credits=3, department='CS', level='FRESHMAN'
+		)
+		self.section = CourseSection.objects.create(
+			course=course, section_number='001', crn='20001', term='Fall', year=2024,
+			meeting_days='MWF', start_time='09:00', end_time='10:00'
+		)
+		other_term = CourseSection.objects.create(
+			course=course, section_number='001', crn='20002', term='Spring', year=2025,
+			meeting_days='MWF', start_time='09:00', end_time='10:00'
+		)
+
+		def student(name, **extra):
+			return User.objects.create_user(
+				username=name, email=f'{name}@example.com', role=User.Role.STUDENT,
+				year_of_study=extra.pop('year_of_study', 2), **extra
+			)
+
+		self.enrolled = student('enrolled')
+		self.waitlisted = student('waitlisted')
+		self.dropped = student('dropped')
+		self.other_term = student('otherterm')
+		self.no_preference = student('nopref')
+		self.digest = student('digest')
+		opted_out = student('optedout')
+		student('freshman', year_of_study=1)
+		student('inactive', is_active=False)
+		User.objects.create_user(username='advisor', role=User.Role.ADVISOR, year_of_study=2)
+
+		Enrollment.objects.create(student=self.enrolled, section=self.section)
+		Enrollment.objects.create(student=self.waitlisted, section=self.section, status=Enrollment.Status.WAITLISTED)
+		Enrollment.objects.create(student=self.dropped, section=self.section, status=Enrollment.Status.DROPPED)
+		Enrollment.objects.create(student=self.other_term, section=other_term)
+		NotificationPreference.objects.create(user=self.digest, daily_digest=True)
+		NotificationPreference.objects.create(user=opted_out, registration_deadlines=False)
+		self.expected = {self.dropped.id, self.other_term.id, self.no_preference.id, self.digest.id}
+
+	def test_reminder_time_defaults_to_lead_before_closing(self):
+		self.assertEqual(self.window.remind_at, self.window.closes_at - timedelta(hours=48))
+
+	def test_unregistered_students_is_a_set_difference(self):
+		with self.assertNumQueries(1):
+			students = set(self.window.unregistered_students().values_list('id', flat=True))
+		self.assertEqual(students, self.expected | {
+			user.id for user in User.objects.filter(username='optedout')
+		})
+
+	@patch('notifications.tasks.send_notification_emails')
+	def test_reminds_only_unregistered_students_in_chunks(self, mock_send_emails_task):
+		with self.settings(NOTIFICATION_FANOUT_BATCH_SIZE=2):
+			with self.captureOnCommitCallbacks(execute=True):
+				# Due windows, then per chunk: lock the window, read the chunk, its
+				# preferences, insert, counters and cursor (plus the savepoints);
+				# the last chunk is empty and marks the window done
+				with self.assertNumQueries(1 + 2 * 8 + 5):
+					result = tasks.check_registration_deadlines()
+		self.assertEqual(result, 'Sent 4 registration reminders for 1 windows')
+
+		notifications = Notification.objects.filter(notification_type=Notification.Type.REGISTRATION_DEADLINE)
+		self.assertEqual(set(notifications.values_list('recipient_id', flat=True)), self.expected)
+		self.assertIn('Fall 2024', notifications.first().title)
+		# Digest subscribers are left to the daily digest
+		queued = {i for call in mock_send_emails_task.delay.call_args_list for i in call.args[0]}
+		self.assertEqual(queued, set(notifications.exclude(recipient=self.digest).values_list('id', flat=True)))
+
+		self.window.refresh_from_db()
+		self.assertIsNotNone(self.window.reminders_sent_at)
+		self.assertEqual(tasks.check_registration_deadlines(), 'Sent 0 registration reminders for 0 windows')
+
+	@patch('notifications.tasks.send_notification_emails')
+	def test_resumes_after_cursor(self, mock_send_emails_task):
+		RegistrationWindow.objects.filter(pk=self.window.pk).update(reminder_cursor=self.other_term.id)
+		tasks.check_registration_deadlines()
+		self.assertEqual(
+			set(Notification.objects.values_list('recipient_id', flat=True)),
+			{self.no_preference.id, self.digest.id}
+		)
+
+	def test_windows_not_yet_due_or_closed_are_skipped(self):
+		now = timezone.now()
+		RegistrationWindow.objects.filter(pk=self.window.pk).update(remind_at=now + timedelta(hours=1))
+		self.assertEqual(tasks.check_registration_deadlines(), 'Sent 0 registration reminders for 0 windows')
+		RegistrationWindow.objects.filter(pk=self.window.pk).update(
+			remind_at=now - timedelta(hours=2), closes_at=now - timedelta(hours=1)
+		)
+		self.assertEqual(tasks.check_registration_deadlines(), 'Sent 0 registration reminders for 0 windows')
+		self.assertFalse(Notification.objects.exists())
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class NotificationInboxTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user(username='student1', password='pass', role=User.Role.STUDENT)
+		self.other = User.objects.create_user(username='student2', password='pass', role=User.Role.STUDENT)
+		self.notifications = Notification.objects.bulk_create([
+			Notification(
+				recipient=self.user, notification_type=Notification.Type.GENERAL,
+				title=f'Notice {n}', message='Body', is_read=n < 2
+			)
+			for n in range(5)
+		])
+		self.foreign = Notification.objects.create(
+			recipient=self.other, notification_type=Notification.Type.GENERAL, title='Theirs', message='Body'
+		)
+		self.client.login(username='student1', password='pass')
+
+	def test_inbox_is_keyset_paginated(self):
+		response = self.client.get('/api/notifications/', {'page_size': 2, 'count': 'true'})
+		self.assertEqual(response.status_code, 200)
+		data = response.json()
+		self.assertEqual(data['count'], 5)
+		self.assertEqual([n['title'] for n in data['results']], ['Notice 4', 'Notice 3'])
+
+		titles = [n['title'] for n in data['results']]
+		while data['next']:
+			data = self.client.get(data['next']).json()
+			titles += [n['title'] for n in data['results']]
+		self.assertEqual(titles, [f'Notice {n}' for n in reversed(range(5))])
+
+		unread = self.client.get('/api/notifications/', {'is_read': 'false'}).json()
+		self.assertEqual(len(unread['results']), 3)
+
+	def test_mark_all_read_is_one_update(self):
+		self.assertEqual(get_counters(self.user.pk)['unread_notifications'], 3)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			# One update for the notifications and one for the counters, in a savepoint
+			with self.assertNumQueries(4):
+				self.assertEqual(mark_read(self.user, ids=[self.notifications[2].id]), 1)
+
+			response = self.client.post(
+				'/api/notifications/mark_all_read/',
+				{'ids': [self.notifications[3].id, self.foreign.id]}, content_type='application/json'
+			)
+		self.assertEqual(response.json()['updated'], 1)
+		self.assertFalse(Notification.objects.get(pk=self.foreign.pk).is_read)
+		self.assertEqual(get_counters(self.user.pk)['unread_notifications'], 1)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			response = self.client.post('/api/notifications/mark_all_read/', {}, content_type='application/json')
+		self.assertEqual(response.json()['updated'], 1)
+		self.assertEqual(get_counters(self.user.pk)['unread_notifications'], 0)
+		self.assertFalse(Notification.objects.filter(recipient=self.user, is_read=False).exists())
+		self.assertFalse(Notification.objects.filter(recipient=self.user, is_read=True, read_at__isnull=True).exclude(
+			id__in=[n.id for n in self.notifications[:2]]
+		).exists())
+
+	def test_mark_single_notification_read(self):
+		notification = self.notifications[4]
+		response = self.client.post(f'/notifications/{notification.id}/mark-read/')
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(Notification.objects.get(pk=notification.pk).is_read)
+
+		# Marking it again is harmless; another user's notification is not found
+		self.assertEqual(self.client.post(f'/notifications/{notification.id}/mark-read/').status_code, 200)
+		self.assertEqual(self.client.post(f'/notifications/{self.foreign.id}/mark-read/').status_code, 404)
+		self.assertEqual(self.client.post(f'/api/notifications/{self.foreign.id}/mark_read/').status_code, 404)
+
+	@override_settings(NOTIFICATION_RETENTION_DAYS=30, NOTIFICATION_PURGE_BATCH_SIZE=2)
+	def test_purge_removes_old_read_notifications_in_chunks(self):
+		old = timezone.now() - timedelta(days=31)
+		Notification.objects.filter(id__in=[n.id for n in self.notifications[:2]]).update(read_at=old)
+		# Old but unread, and read recently, are both kept
+		Notification.objects.filter(id=self.notifications[2].id).update(created_at=old)
+		Notification.objects.filter(id=self.notifications[3].id).update(is_read=True, read_at=timezone.now())
+		counters = get_counters(self.user.pk)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			self.assertEqual(tasks.purge_read_notifications(), 'Purged 2 notifications')
+		self.assertEqual(Notification.objects.filter(recipient=self.user).count(), 3)
+		self.assertEqual(get_counters(self.user.pk)['total_notifications'], counters['total_notifications'] - 2)
+
+
+@override_settings(
+	CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+	NOTIFICATION_PUSH_DELAY=0.1
+)
+class NotificationConsumerTests(TransactionTestCase):
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user(username='student1', password='pass', role=User.Role.STUDENT)
+
+	async def connect(self, user):
+		communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), '/ws/notifications/')
+		communicator.scope['user'] = user
+		connected, _ = await communicator.connect()
+		return communicator, connected
+
+	def notify(self, count=1):
+		return [
+			Notification.objects.create(
+				recipient=self.user, notification_type=Notification.Type.GENERAL,
+				title=f'Notice {n}', message='Body'
+			)
+			for n in range(count)
+		]
+
+	async def test_anonymous_connections_are_rejected(self):
+		_, connected = await self.connect(AnonymousUser())
+		self.assertFalse(connected)
+
+	async def test_bursts_are_pushed_in_one_frame(self):
+		communicator, connected = await self.connect(self.user)
+		self.assertTrue(connected)
+
+		created = await sync_to_async(self.notify)(3)
+		frame = await communicator.receive_json_from(timeout=2)
+		self.assertEqual(frame['type'], 'notifications')
+		self.assertEqual([n['id'] for n in frame['notifications']], [n.id for n in created])
+		self.assertEqual(frame['cursor'], created[-1].id)
+		self.assertEqual(frame['unread_count'], 3)
+		self.assertTrue(await communicator.receive_nothing(timeout=0.3))
+
+		await sync_to_async(mark_read)(self.user, [created[0].id])
+		frame = await communicator.receive_json_from(timeout=2)
+		self.assertEqual(frame, {'type': 'read', 'ids': [created[0].id], 'unread_count': 2})
+		await communicator.disconnect()
+
+	async def test_resume_replays_missed_notifications(self):
+		seen = await sync_to_async(self.notify)()
+		missed = await sync_to_async(self.notify)(2)
+
+		communicator, _ = await self.connect(self.user)
+		await communicator.send_json_to({'action': 'resume', 'cursor': seen[0].id})
+		frame = await communicator.receive_json_from(timeout=2)
+		self.assertEqual([n['id'] for n in frame['notifications']], [n.id for n in missed])
+		self.assertEqual(frame['cursor'], missed[-1].id)
+
+		await communicator.send_json_to({'action': 'resume', 'cursor': None})
+		self.assertEqual(await communicator.receive_json_from(timeout=2), {'type': 'unread', 'unread_count': 3})
+		await communicator.disconnect()
+
+	async def test_resume_after_long_gap_asks_for_resync(self):
+		await sync_to_async(Notification.objects.bulk_create)([
+			Notification(recipient=self.user, notification_type='GENERAL', title='Old', message='Body')
+			for _ in range(101)
+		])
+		communicator, _ = await self.connect(self.user)
+		await communicator.send_json_to({'action': 'resume', 'cursor': 0})
+		frame = await communicator.receive_json_from(timeout=2)
+		self.assertEqual(frame['type'], 'resync')
+		await communicator.disconnect()
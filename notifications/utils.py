@@ -0,0 +1,29 @@
+"""
+Helpers shared by the notifications page and API.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from infrastructure.counters import adjust
+from .models import Notification
+from .push import publish_read
+
+
+def mark_read(recipient, ids=None) -> int:
+    """
+    Mark ``recipient``'s unread notifications read, or only those in ``ids``.
+
+    One ``UPDATE`` covers every notification, the unread counter drops by
+    the number of rows it changed and the user's open pages are told.
+    Returns that number.
+    """
+    notifications = Notification.objects.filter(recipient=recipient, is_read=False)
+    if ids is not None:
+        notifications = notifications.filter(id__in=ids)
+
+    with transaction.atomic():
+        updated = notifications.update(is_read=True, read_at=timezone.now())
+        adjust([recipient.pk], unread_notifications=-updated)
+        if updated:
+            publish_read(recipient.pk, ids)
+    return updated
@@ -1,7 +1,11 @@
 from django.shortcuts import render
 from django.views.generic import TemplateView
+from infrastructure.counters import get_counters
 from .models import Notification
 
+# Notifications of each kind shown on the page
+PAGE_LIMIT = 50
+
 
 class NotificationsView(TemplateView):
     """Notifications page view."""
@@ -12,16 +16,17 @@ class NotificationsView(TemplateView):
         
         # Get notifications for the current user if authenticated
         if self.request.user.is_authenticated:
-            # Get all notifications for the user
-            all_notifications = Notification.objects.filter(
+            # Only the latest of each; the rest are paged through the API
+            notifications = Notification.objects.filter(
                 recipient=self.request.user
-            ).order_by('-created_at')
+            ).order_by('-created_at', '-id')
             
             # Separate unread and read notifications
-            context['unread_notifications'] = all_notifications.filter(is_read=False)
-            context['read_notifications'] = all_notifications.filter(is_read=True)
-            context['total_notifications'] = all_notifications.count()
-            context['unread_count'] = all_notifications.filter(is_read=False).count()
+            context['unread_notifications'] = notifications.filter(is_read=False)[:PAGE_LIMIT]
+            context['read_notifications'] = notifications.filter(is_read=True)[:PAGE_LIMIT]
+            counters = get_counters(self.request.user.pk)
+            context['total_notifications'] = counters['total_notifications']
+            context['unread_count'] = counters['unread_notifications']
         else:
             context['unread_notifications'] = []
             context['read_notifications'] = []
@@ -38,6 +43,13 @@ from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.utils import timezone
 import json
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from smart_registration.pagination import KeysetPagination
+from .serializers import MarkReadSerializer, NotificationSerializer
+from .utils import mark_read
 
 
 @login_required
@@ -102,20 +114,64 @@ def mark_notification_read(request, notification_id):
     if request.method != 'POST':
         return JsonResponse({'error': 'Method not allowed'}, status=405)
     
-    try:
-        notification = Notification.objects.get(
-            id=notification_id,
-            recipient=request.user
-        )
-        notification.is_read = True
-        notification.read_at = timezone.now()
-        notification.save()
+    if not mark_read(request.user, ids=[notification_id]):
+        # Already read is fine; someone else's or missing is not
+        if not Notification.objects.filter(id=notification_id, recipient=request.user).exists():
+            return JsonResponse({
+                'error': 'Notification not found'
+            }, status=404)
+    
+    return JsonResponse({
+        'success': True,
+        'message': 'Notification marked as read'
+    })
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for the current user's notification inbox.
+    
+    Endpoints:
+    - list: Newest first, keyset paginated; filter with ``is_read`` and ``notification_type``
+    - retrieve: A single notification
+    - mark_read: Mark one notification read
+    - mark_all_read: Mark all, or the listed ``ids``, read in one update
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
+    
+    def get_queryset(self):
+        """Return the current user's notifications, filtered by query params."""
+        queryset = Notification.objects.filter(recipient=self.request.user)
+        
+        is_read = self.request.query_params.get('is_read')
+        if is_read is not None:
+            queryset = queryset.filter(is_read=is_read.lower() == 'true')
+        
+        notification_type = self.request.query_params.get('notification_type')
+        if notification_type:
+            queryset = queryset.filter(notification_type=notification_type)
+        
+        return queryset
+    
+    @action(detail=True, methods=['post'])
+    def mark_read(self, request, pk=None):
+        """Mark one notification as read."""
+        notification = self.get_object()
+        mark_read(request.user, ids=[notification.pk])
+        notification.refresh_from_db()
+        return Response(self.get_serializer(notification).data)
+    
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """Mark every unread notification read, or only those listed in ``ids``."""
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        return JsonResponse({
-            'success': True,
-            'message': 'Notification marked as read'
+        updated = mark_read(request.user, ids=serializer.validated_data.get('ids'))
+        return Response({
+            'updated': updated,
+            'unread_count': get_counters(request.user.pk)['unread_notifications']
         })
-    except Notification.DoesNotExist:
-        return JsonResponse({
-            'error': 'Notification not found'
-        }, status=404)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PlanningConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'planning'
+
+    def ready(self):
+        # Import signal handlers to ensure they're registered
+        from . import signals  # noqa: F401
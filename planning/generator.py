@@ -0,0 +1,248 @@
+"""
+Conflict-free schedule generation.
+
+Given the courses a student wants and their constraints, enumerate section
+combinations and return the best few. Each section's meeting times are
+encoded as a bitmask over (day, 5-minute slot), so checking a section
+against everything already chosen is a single ``&``. The search is a
+depth-first branch-and-bound:
+
+- hard constraints (earliest start, latest end, free days, full sections)
+  remove sections before the search starts;
+- courses with the fewest candidate sections are placed first;
+- a branch is abandoned when it cannot include as many courses as the
+  best schedule found so far, or when the worst schedule kept already
+  includes as many with a lower penalty.
+
+Only schedules with the largest number of requested courses are returned.
+They are ranked by a penalty for sections away from the preferred campus
+and for each extra day on campus, then by the idle time between classes.
+The search stops when its time budget runs out and returns what it has
+found, flagged as incomplete.
+"""
+import bisect
+import time as clock
+from typing import Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+
+from .utils import DAYS, parse_meeting_days
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# Penalty per section away from the preferred campus
+CAMPUS_PENALTY = 10
+# Penalty per day of the week with at least one class
+DAY_PENALTY = 2
+
+# Nodes visited between checks of the time budget
+BUDGET_CHECK_INTERVAL = 256
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def section_mask(meeting_days: str, start_time, end_time) -> int:
+    """
+    Bitmask of the 5-minute slots a section occupies across the week.
+
+    Start times are rounded down and end times up, so sections that meet
+    within the same 5 minutes always overlap.
+    """
+    first = _minutes(start_time) // SLOT_MINUTES
+    last = -(-_minutes(end_time) // SLOT_MINUTES)
+    if last <= first:
+        return 0
+    day_mask = ((1 << (last - first)) - 1) << first
+
+    mask = 0
+    for day in parse_meeting_days(meeting_days):
+        mask |= day_mask << (DAYS.index(day) * SLOTS_PER_DAY)
+    return mask
+
+
+def _day_bits(mask):
+    """Bitmask of the days (bit 0 = MON) on which ``mask`` has any slot."""
+    full_day = (1 << SLOTS_PER_DAY) - 1
+    return sum(
+        1 << day for day in range(len(DAYS))
+        if (mask >> (day * SLOTS_PER_DAY)) & full_day
+    )
+
+
+def _idle_minutes(mask):
+    """Minutes between the first and last class of each day not spent in class."""
+    full_day = (1 << SLOTS_PER_DAY) - 1
+    idle = 0
+    for day in range(len(DAYS)):
+        slots = (mask >> (day * SLOTS_PER_DAY)) & full_day
+        if slots:
+            span = slots.bit_length() - ((slots & -slots).bit_length() - 1)
+            idle += span - bin(slots).count('1')
+    return idle * SLOT_MINUTES
+
+
+class Candidate(NamedTuple):
+    section: object
+    course_id: int
+    mask: int
+    days: int
+    credits: int
+    penalty: int
+
+
+class Constraints(NamedTuple):
+    earliest_start: Optional[object] = None
+    latest_end: Optional[object] = None
+    free_days: tuple = ()
+    campus: str = ''
+    max_credits: Optional[int] = None
+    include_full: bool = False
+
+
+def eligible(section, constraints: Constraints) -> bool:
+    """Whether ``section`` satisfies the hard constraints."""
+    if not section.is_available:
+        return False
+    if not constraints.include_full and section.is_full():
+        return False
+    if constraints.earliest_start and section.start_time < constraints.earliest_start:
+        return False
+    if constraints.latest_end and section.end_time > constraints.latest_end:
+        return False
+    if set(parse_meeting_days(section.meeting_days)) & set(constraints.free_days):
+        return False
+    return True
+
+
+def make_candidate(section, constraints: Constraints) -> Candidate:
+    mask = section_mask(section.meeting_days, section.start_time, section.end_time)
+    off_campus = constraints.campus and section.campus.lower() != constraints.campus.lower()
+    return Candidate(
+        section=section,
+        course_id=section.course_id,
+        mask=mask,
+        days=_day_bits(mask),
+        credits=section.course.credits,
+        penalty=CAMPUS_PENALTY if off_campus else 0,
+    )
+
+
+class GenerationResult(NamedTuple):
+    schedules: List[Dict]
+    complete: bool
+    explored: int
+    elapsed: float
+
+
+def generate_schedules(
+    candidates_by_course: Dict[int, List[Candidate]],
+    constraints: Constraints,
+    limit: int = 10,
+    occupied: int = 0,
+    occupied_credits: int = 0,
+    time_budget: Optional[float] = None,
+) -> GenerationResult:
+    """
+    Return the best ``limit`` conflict-free schedules.
+
+    ``candidates_by_course`` maps each requested course id to its eligible
+    candidates. ``occupied`` is the mask of sections the student already
+    attends and ``occupied_credits`` their credits; both count against the
+    schedule. Each schedule is ``{'sections': [...], 'credits': int,
+    'penalty': int, 'idle_minutes': int, 'missing': [course_id, ...]}``.
+    """
+    if time_budget is None:
+        time_budget = getattr(settings, 'SCHEDULE_GENERATOR_TIME_BUDGET', 0.5)
+    started = clock.perf_counter()
+    deadline = started + time_budget
+
+    # Fail-first: the most constrained courses are placed first
+    courses = sorted(candidates_by_course, key=lambda course_id: len(candidates_by_course[course_id]))
+    options = [
+        sorted(candidates_by_course[course_id], key=lambda candidate: candidate.penalty)
+        for course_id in courses
+    ]
+    max_credits = constraints.max_credits
+    initial_days = _day_bits(occupied)
+
+    # Kept sorted best-first by (-included, penalty, idle, order)
+    best = []
+    chosen = []
+    state = {'explored': 0, 'timed_out': False}
+
+    def day_penalty(days):
+        return bin(days).count('1') * DAY_PENALTY
+
+    def worst_key():
+        return best[-1][0] if len(best) >= limit else None
+
+    def record(mask, credits, penalty):
+        key = (-len(chosen), penalty, _idle_minutes(mask), state['explored'])
+        worst = worst_key()
+        if (worst is not None and key >= worst) or (best and key[0] > best[0][0][0]):
+            return
+        bisect.insort(best, (key, list(chosen), credits))
+        # Only schedules with the most courses are kept
+        best[:] = [entry for entry in best[:limit] if entry[0][0] == best[0][0][0]]
+
+    def search(depth, mask, days, credits, penalty):
+        state['explored'] += 1
+        if state['explored'] % BUDGET_CHECK_INTERVAL == 0 and clock.perf_counter() > deadline:
+            state['timed_out'] = True
+        if state['timed_out']:
+            return
+
+        reachable = -(len(chosen) + len(courses) - depth)
+        if best and reachable > best[0][0][0]:
+            return
+        worst = worst_key()
+        if worst is not None and (
+            reachable > worst[0] or (reachable == worst[0] and penalty + day_penalty(days) > worst[1])
+        ):
+            return
+
+        if depth == len(courses):
+            record(mask, credits, penalty + day_penalty(days))
+            return
+
+        for candidate in options[depth]:
+            if candidate.mask & mask:
+                continue
+            if max_credits is not None and credits + candidate.credits > max_credits:
+                continue
+            chosen.append(candidate)
+            search(
+                depth + 1, mask | candidate.mask, days | candidate.days,
+                credits + candidate.credits, penalty + candidate.penalty
+            )
+            chosen.pop()
+            if state['timed_out']:
+                return
+
+        # Leave this course out
+        search(depth + 1, mask, days, credits, penalty)
+
+    search(0, occupied, initial_days, occupied_credits, 0)
+
+    schedules = []
+    for key, picked, credits in best:
+        if not picked:
+            continue
+        picked_courses = {candidate.course_id for candidate in picked}
+        schedules.append({
+            'sections': [candidate.section for candidate in picked],
+            'credits': credits - occupied_credits,
+            'penalty': key[1],
+            'idle_minutes': key[2],
+            'missing': [course_id for course_id in candidates_by_course if course_id not in picked_courses],
+        })
+
+    return GenerationResult(
+        schedules=schedules,
+        complete=not state['timed_out'],
+        explored=state['explored'],
+        elapsed=clock.perf_counter() - started,
+    )
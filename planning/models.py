@@ -69,6 +69,9 @@ class StudentPlan(models.Model):
         verbose_name = _('Student Plan')
         verbose_name_plural = _('Student Plans')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.student.username} - {self.name} ({self.term} {self.year})"
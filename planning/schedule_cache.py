@@ -0,0 +1,315 @@
+"""
+Cached schedule projections.
+
+The schedule page and ``/api/enrollments/schedule/`` show a student's
+registered sections together with the sections in their cart. Rather than
+rebuilding that grid from the database on every view, a projection is kept
+in the cache per student and scope (all terms, or one term and year) and
+patched in place as things change:
+
+- enrollments add or remove their entry when saved or deleted (see
+  ``planning.signals``);
+- the cart views report the new cart so ``added`` entries follow it.
+
+A projection remembers the catalog version it was built from and is
+rebuilt from scratch when the catalog moves, so edits to section times,
+rooms or instructors are picked up without tracking them individually.
+Projections that are not cached are never patched; the next read builds
+them.
+
+Patching is a read-modify-write, so each student also has a generation
+counter. A projection is only served while its generation is current.
+A patch first moves the counter with an atomic ``incr`` and only patches
+projections that were current just before; anything written under an
+older generation (a patch that lost a race, a build that read the
+database before the change committed) is rebuilt on the next read.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from courses.models import CourseSection
+from courses.versioning import get_catalog_version
+
+from .utils import DAYS, group_by_day, section_entry
+
+SCHEDULE_KEY = 'planning:schedule:{student_id}:{scope}'
+GENERATION_KEY = 'planning:schedule_generation:{student_id}'
+ALL_TERMS = 'all'
+
+
+def _hour_slot(hour):
+    if hour < 12:
+        return {'hour': hour, 'display': f'{hour}:00', 'period': 'AM'}
+    return {'hour': hour, 'display': f'{hour - 12 if hour > 12 else 12}:00', 'period': 'PM'}
+
+
+# Rows of the schedule grid (7 AM - 9 PM)
+TIME_SLOTS = tuple(_hour_slot(hour) for hour in range(7, 22))
+
+
+def schedule_scope(term=None, year=None) -> str:
+    if term and year:
+        return f'{term.strip().lower()}-{year}'
+    return ALL_TERMS
+
+
+def term_from_params(params):
+    """``(term, year)`` from request query params, or ``(None, None)`` for all terms."""
+    term, year = params.get('term'), params.get('year')
+    if not term or not str(year or '').isdigit():
+        return None, None
+    return term, int(year)
+
+
+def _key(student_id, scope):
+    return SCHEDULE_KEY.format(student_id=student_id, scope=scope)
+
+
+def _generation_key(student_id):
+    return GENERATION_KEY.format(student_id=student_id)
+
+
+def _seed_generation(key):
+    # Seeded from the clock so a counter restarted after eviction never
+    # repeats a generation an older projection may still carry
+    cache.add(key, int(time.time() * 1000), timeout=None)
+    return cache.get(key)
+
+
+def _current_generation(student_id):
+    key = _generation_key(student_id)
+    generation = cache.get(key)
+    return _seed_generation(key) if generation is None else generation
+
+
+def _next_generation(student_id):
+    key = _generation_key(student_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        _seed_generation(key)
+        return cache.incr(key)
+
+
+def _timeout():
+    return getattr(settings, 'SCHEDULE_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _version(scope, term):
+    return get_catalog_version() if scope == ALL_TERMS else get_catalog_version(term)
+
+
+def _in_scope(section, scope):
+    return scope == ALL_TERMS or schedule_scope(section.term, section.year) == scope
+
+
+def _scopes_for(section):
+    return (ALL_TERMS, schedule_scope(section.term, section.year))
+
+
+def _registered_key(enrollment_id):
+    return f'registered:{enrollment_id}'
+
+
+def _added_key(section_id):
+    return f'added:{section_id}'
+
+
+def _cart_sections(section_ids):
+    return CourseSection.objects.filter(
+        id__in=section_ids, is_available=True
+    ).select_related('course', 'instructor')
+
+
+def _added_entry(section):
+    return section_entry(section, status='added')
+
+
+def _registered_entry(enrollment):
+    return section_entry(enrollment.section, status='registered', enrollment_id=enrollment.id)
+
+
+def _refresh(projection):
+    """Recompute the grid and totals after entries changed."""
+    courses = projection['courses']
+    registered = sorted(
+        (entry for entry in courses.values() if entry['status'] == 'registered'),
+        key=lambda entry: entry['start_time']
+    )
+    added = [
+        courses[_added_key(section_id)]
+        for section_id in projection['cart'] if _added_key(section_id) in courses
+    ]
+    projection['registered'] = registered
+    projection['added'] = added
+    projection['total_credits'] = sum(entry['credits'] for entry in registered)
+    projection['schedule'] = group_by_day(courses.values())
+    return projection
+
+
+def build_schedule(student, cart=(), term=None, year=None) -> dict:
+    """Build a projection from the database and cache it."""
+    from registration.models import Enrollment
+
+    scope = schedule_scope(term, year)
+    version = _version(scope, term)
+    # Read before the database, so a change committed meanwhile retires it
+    generation = _current_generation(student.pk)
+
+    enrollments = Enrollment.objects.filter(
+        student=student, status=Enrollment.Status.ENROLLED
+    ).select_related('section__course', 'section__instructor')
+    sections = _cart_sections(cart)
+    if scope != ALL_TERMS:
+        enrollments = enrollments.filter(section__term__iexact=term, section__year=year)
+        sections = sections.filter(term__iexact=term, year=year)
+
+    courses = {_registered_key(e.id): _registered_entry(e) for e in enrollments}
+    courses.update({_added_key(s.id): _added_entry(s) for s in sections})
+    projection = _refresh({
+        'scope': scope,
+        'catalog_version': version,
+        'generation': generation,
+        'cart': list(cart),
+        'courses': courses,
+    })
+    cache.set(_key(student.pk, scope), projection, timeout=_timeout())
+    return projection
+
+
+def get_schedule(student, cart=(), term=None, year=None) -> dict:
+    """
+    Return the schedule projection for ``student``.
+
+    ``cart`` is the list of section ids in the student's cart; a cached
+    projection built for a different cart is patched to match it.
+    """
+    scope = schedule_scope(term, year)
+    cart = list(cart)
+    key, generation_key = _key(student.pk, scope), _generation_key(student.pk)
+    cached = cache.get_many([key, generation_key])
+    projection = cached.get(key)
+    if (
+        projection is None
+        or projection.get('generation') != cached.get(generation_key)
+        or projection['catalog_version'] != _version(scope, term)
+    ):
+        return build_schedule(student, cart, term, year)
+
+    if projection['cart'] != cart:
+        _apply_cart(projection, cart, _cart_sections(set(cart) - set(projection['cart'])))
+        # Keeps its generation: if a patch landed meanwhile, this is stale
+        cache.set(key, projection, timeout=_timeout())
+    return projection
+
+
+def _apply_cart(projection, cart, new_sections):
+    courses = projection['courses']
+    for section_id in set(projection['cart']) - set(cart):
+        courses.pop(_added_key(section_id), None)
+    for section in new_sections:
+        if _in_scope(section, projection['scope']):
+            courses[_added_key(section.id)] = _added_entry(section)
+    projection['cart'] = cart
+    _refresh(projection)
+
+
+def _patch(student_id, scopes, apply):
+    """
+    Run ``apply`` on each cached projection in ``scopes``.
+
+    Moving the generation first retires every projection at once; only
+    those that were current before the move are patched and carried over.
+    If another patch moves it again before these are written, they are
+    already stale and the next read rebuilds them.
+    """
+    generation = _next_generation(student_id)
+    keys = [_key(student_id, scope) for scope in set(scopes)]
+    projections = {
+        key: projection for key, projection in cache.get_many(keys).items()
+        if projection.get('generation') == generation - 1
+    }
+    for projection in projections.values():
+        apply(projection)
+        projection['generation'] = generation
+        _refresh(projection)
+    if projections:
+        cache.set_many(projections, timeout=_timeout())
+    return projections
+
+
+def cart_changed(student_id, old_cart, new_cart):
+    """Patch cached projections after a student's cart changed."""
+    old_cart, new_cart = list(old_cart), list(new_cart)
+    changed = set(old_cart) ^ set(new_cart)
+    if not changed:
+        return
+
+    sections = list(CourseSection.objects.filter(id__in=changed).select_related('course', 'instructor'))
+    scopes = {ALL_TERMS}
+    scopes.update(schedule_scope(section.term, section.year) for section in sections)
+    added = [
+        section for section in sections
+        if section.id in new_cart and section.is_available
+    ]
+
+    _patch(student_id, scopes, lambda projection: _apply_cart(projection, new_cart, added))
+
+
+def enrollment_changed(enrollment):
+    """Add, replace or remove ``enrollment``'s entry in cached projections."""
+    from registration.models import Enrollment
+
+    # Runs after commit: the enrollment or its section may be gone by now,
+    # in which case their delete signals update the projections
+    try:
+        section = enrollment.section
+    except CourseSection.DoesNotExist:
+        return
+
+    if enrollment.status != Enrollment.Status.ENROLLED:
+        enrollment_removed(enrollment.student_id, enrollment.pk, section)
+        return
+
+    scopes = _scopes_for(section)
+    if not cache.get_many([_key(enrollment.student_id, scope) for scope in scopes]):
+        # Nothing to patch, but a build already reading the old rows must not stick
+        _next_generation(enrollment.student_id)
+        return
+    enrollment = Enrollment.objects.select_related(
+        'section__course', 'section__instructor'
+    ).filter(pk=enrollment.pk).first()
+    if enrollment is None:
+        return
+    entry = _registered_entry(enrollment)
+
+    def apply(projection):
+        projection['courses'][_registered_key(enrollment.pk)] = entry
+
+    _patch(enrollment.student_id, scopes, apply)
+
+
+def enrollment_removed(student_id, enrollment_id, section=None):
+    """
+    Drop an enrollment's entry from cached projections.
+
+    Without ``section`` only the all-terms projection is patched; that only
+    happens when the section itself was deleted, which moves the catalog
+    version and retires the term projections anyway.
+    """
+    key = _registered_key(enrollment_id)
+    scopes = _scopes_for(section) if section is not None else (ALL_TERMS,)
+    _patch(student_id, scopes, lambda projection: projection['courses'].pop(key, None))
+
+
+def schedule_payload(projection) -> dict:
+    """The parts of a projection returned by the API."""
+    return {
+        'days': list(DAYS),
+        'schedule': projection['schedule'],
+        'registered_count': len(projection['registered']),
+        'added_count': len(projection['added']),
+        'total_credits': projection['total_credits'],
+    }
@@ -5,6 +5,7 @@ from rest_framework import serializers
 from .models import StudentPlan, PlannedCourse, ScheduleConflict
 from courses.serializers import CourseSectionSerializer
 from authentication.models import User
+from .utils import DAYS
 
 
 class StudentPlanListSerializer(serializers.ModelSerializer):
@@ -157,3 +158,27 @@ class AddCourseToPlanSerializer(serializers.Serializer):
             return value
         except CourseSection.DoesNotExist:
             raise serializers.ValidationError("Section does not exist")
+
+
+class GenerateSchedulesSerializer(serializers.Serializer):
+    """Serializer for schedule generation requests."""
+    
+    course_ids = serializers.ListField(
+        child=serializers.IntegerField(), min_length=1, max_length=12
+    )
+    term = serializers.CharField(max_length=20)
+    year = serializers.IntegerField()
+    earliest_start = serializers.TimeField(required=False)
+    latest_end = serializers.TimeField(required=False)
+    free_days = serializers.ListField(
+        child=serializers.ChoiceField(choices=DAYS), required=False, default=list
+    )
+    campus = serializers.CharField(required=False, allow_blank=True, default='')
+    max_credits = serializers.IntegerField(required=False, min_value=1)
+    include_full = serializers.BooleanField(default=False)
+    respect_enrollments = serializers.BooleanField(default=True)
+    limit = serializers.IntegerField(default=10, min_value=1, max_value=50)
+    
+    def validate_course_ids(self, value):
+        """Drop duplicates while keeping the requested order."""
+        return list(dict.fromkeys(value))
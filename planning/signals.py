@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from registration.models import Enrollment
+from . import schedule_cache
+
+
+@receiver(post_save, sender=Enrollment)
+def update_schedule_on_enrollment_save(sender, instance, **kwargs):
+    """Patch cached schedules once an enrollment change commits."""
+    transaction.on_commit(lambda: schedule_cache.enrollment_changed(instance))
+
+
+@receiver(post_delete, sender=Enrollment)
+def update_schedule_on_enrollment_delete(sender, instance, **kwargs):
+    # The instance loses its pk once the delete finishes, and in a cascade
+    # from CourseSection the section row is already gone
+    student_id, enrollment_id = instance.student_id, instance.pk
+    section = instance.section if Enrollment.section.is_cached(instance) else None
+    transaction.on_commit(lambda: schedule_cache.enrollment_removed(student_id, enrollment_id, section))
@@ -1,3 +1,348 @@
-from django.test import TestCase
+from datetime import time
+from types import SimpleNamespace
+import itertools
+from unittest import mock
+import json
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from courses.models import Course, CourseSection
+from registration.models import Enrollment
+from . import generator, schedule_cache
+from .utils import check_time_overlap, parse_meeting_days
+
+User = get_user_model()
+
+
+# Enrolling publishes seat counts on commit; keep that off Redis
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class ScheduleProjectionTestCase(TestCase):
+    """Test the cached schedule projection behind the schedule page and API."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='teststu',
+            password='testpass',
+            email='test@test.com'
+        )
+        self.user.role = User.Role.STUDENT
+        self.user.save()
+
+        self.course = Course.objects.create(
+            course_code='CS101', title='Intro to CS', credits=3,
+            department='CS', description='Test course'
+        )
+        self.other_course = Course.objects.create(
+            course_code='MATH101', title='Calculus I', credits=4,
+            department='MATH', description='Test course'
+        )
+        self.section = CourseSection.objects.create(
+            course=self.course, section_number='001', crn='10001', term='Fall', year=2024,
+            meeting_days='MWF', start_time=time(9, 0), end_time=time(10, 0), max_enrollment=30
+        )
+        self.cart_section = CourseSection.objects.create(
+            course=self.other_course, section_number='001', crn='10002', term='Fall', year=2024,
+            meeting_days='TR', start_time=time(11, 0), end_time=time(12, 15), max_enrollment=30
+        )
+        self.spring_section = CourseSection.objects.create(
+            course=self.other_course, section_number='002', crn='10003', term='Spring', year=2025,
+            meeting_days='MW', start_time=time(13, 0), end_time=time(14, 15), max_enrollment=30
+        )
+        self.client.login(username='teststu', password='testpass')
+
+    def schedule(self, **params):
+        response = self.client.get('/api/enrollments/schedule/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def codes(self, data, day):
+        return [(entry['course_code'], entry['status']) for entry in data['schedule'][day]]
+
+    def enroll(self, section):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/registration-actions/enroll/', {'section_id': section.id},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def test_schedule_page_shows_registered_and_added_courses(self):
+        Enrollment.objects.create(student=self.user, section=self.section)
+        session = self.client.session
+        session['added_courses'] = [self.cart_section.id]
+        session.save()
+
+        response = self.client.get(reverse('planning:schedule'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['enrollments']), 1)
+        self.assertEqual(len(response.context['added_courses_sections']), 1)
+        self.assertEqual(response.context['total_credits'], 3)
+        schedule = response.context['schedule_data']['schedule']
+        self.assertEqual(schedule['MON'][0]['status'], 'registered')
+        self.assertEqual(schedule['THU'][0]['status'], 'added')
+        self.assertEqual(len(response.context['time_slots']), 15)
+
+    def test_repeat_views_are_served_from_cache(self):
+        self.schedule()
+
+        with mock.patch.object(schedule_cache, 'build_schedule') as build:
+            self.client.get(reverse('planning:schedule'))
+            self.schedule()
+
+        build.assert_not_called()
+
+    def test_enroll_and_drop_patch_cached_projection(self):
+        self.schedule()
+
+        with mock.patch.object(schedule_cache, 'build_schedule', side_effect=AssertionError):
+            enrollment_id = self.enroll(self.section)
+            data = self.schedule()
+            self.assertEqual(self.codes(data, 'WED'), [('CS101', 'registered')])
+            self.assertEqual(data['total_credits'], 3)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    '/api/registration-actions/drop/', {'enrollment_id': enrollment_id},
+                    content_type='application/json'
+                )
+            self.assertEqual(response.status_code, 200)
+            data = self.schedule()
+
+        self.assertEqual(data['schedule']['WED'], [])
+        self.assertEqual(data['registered_count'], 0)
+
+    def test_stale_writes_after_a_patch_are_rebuilt(self):
+        """A projection written back from before a patch is never served."""
+        self.schedule()
+        key = schedule_cache._key(self.user.pk, schedule_cache.ALL_TERMS)
+        stale = cache.get(key)
+
+        self.enroll(self.section)
+        # A slower request that read the projection before the enrollment writes it back
+        cache.set(key, stale)
+
+        self.assertEqual(self.codes(self.schedule(), 'WED'), [('CS101', 'registered')])
+
+    def test_build_racing_an_enrollment_is_rebuilt(self):
+        """A build that read the database before a change committed is retired by it."""
+        key = schedule_cache._key(self.user.pk, schedule_cache.ALL_TERMS)
+        stale = schedule_cache.build_schedule(self.user)
+        cache.delete(key)
+
+        self.enroll(self.section)
+        # The slow build only lands in the cache after the enrollment committed
+        cache.set(key, stale)
+
+        self.assertEqual(self.codes(self.schedule(), 'WED'), [('CS101', 'registered')])
+
+    def test_enrollment_deleted_before_commit_callback(self):
+        """A save whose enrollment or section is gone when its callback runs changes nothing."""
+        self.schedule()
+        for deleted in ('enrollment', 'section'):
+            with self.captureOnCommitCallbacks() as callbacks:
+                enrollment = Enrollment.objects.create(student=self.user, section=self.section)
+            # Deleted (in another transaction) before the callbacks ran
+            if deleted == 'enrollment':
+                Enrollment.objects.filter(pk=enrollment.pk).delete()
+            else:
+                CourseSection.objects.filter(pk=self.section.pk).delete()
+                Enrollment.section.field.delete_cached_value(enrollment)
+            for callback in callbacks:
+                callback()
+
+            self.assertEqual(self.schedule()['registered_count'], 0)
+
+    def test_cart_changes_patch_cached_projection(self):
+        self.schedule()
+
+        with mock.patch.object(schedule_cache, 'build_schedule', side_effect=AssertionError):
+            self.client.post(
+                reverse('registration:add-to-added-courses'),
+                json.dumps({'section_id': self.cart_section.id}),
+                content_type='application/json'
+            )
+            self.assertEqual(self.codes(self.schedule(), 'TUE'), [('MATH101', 'added')])
+
+            self.client.post(
+                reverse('registration:remove-from-added-courses'),
+                json.dumps({'section_id': self.cart_section.id}),
+                content_type='application/json'
+            )
+            data = self.schedule()
+
+        self.assertEqual(data['schedule']['TUE'], [])
+        self.assertEqual(data['added_count'], 0)
+
+    @mock.patch('infrastructure.tasks.dispatch_outbox')
+    def test_catalog_change_rebuilds_projection(self, mock_dispatch_outbox):
+        Enrollment.objects.create(student=self.user, section=self.section)
+        self.schedule()
+
+        self.section.start_time = time(8, 0)
+        self.section.save()
+
+        data = self.schedule()
+        self.assertEqual(data['schedule']['MON'][0]['start_time'], '08:00:00')
+
+    def test_term_scope(self):
+        Enrollment.objects.create(student=self.user, section=self.section)
+        Enrollment.objects.create(student=self.user, section=self.spring_section)
+
+        self.assertEqual(self.schedule()['registered_count'], 2)
+        data = self.schedule(term='Spring', year='2025')
+        self.assertEqual(data['registered_count'], 1)
+        self.assertEqual(self.codes(data, 'MON'), [('MATH101', 'registered')])
+
+        # A new enrollment only reaches the projections for its own term
+        self.enroll(self.cart_section)
+        self.assertEqual(self.schedule(term='Spring', year='2025')['registered_count'], 1)
+        self.assertEqual(self.schedule()['registered_count'], 3)
+
+    def test_schedule_requires_student(self):
+        self.user.role = User.Role.ADVISOR
+        self.user.save()
+        response = self.client.get('/api/enrollments/schedule/')
+        self.assertEqual(response.status_code, 403)
+
+
+class MeetingDaysTestCase(TestCase):
+    """Test parsing of meeting day codes."""
+
+    def test_th_is_thursday(self):
+        self.assertEqual(parse_meeting_days('TTH'), ['TUE', 'THU'])
+        self.assertEqual(parse_meeting_days('TR'), ['TUE', 'THU'])
+        self.assertEqual(parse_meeting_days('MTWTHF'), ['MON', 'TUE', 'WED', 'THU', 'FRI'])
+
+
+class ScheduleGeneratorTestCase(TestCase):
+    """Test conflict-free schedule generation."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='teststu', password='testpass', role=User.Role.STUDENT
+        )
+        self.client = Client()
+        self.client.login(username='teststu', password='testpass')
+
+        self.cs = Course.objects.create(
+            course_code='CS101', title='Intro to CS', credits=3, department='CS', description='Test'
+        )
+        self.math = Course.objects.create(
+            course_code='MATH101', title='Calculus I', credits=4, department='MATH', description='Test'
+        )
+        self.crn = itertools.count(20001)
+        self.cs_morning = self.section(self.cs, '001', 'MWF', time(9, 0), time(9, 50))
+        self.cs_friday = self.section(self.cs, '002', 'TF', time(13, 0), time(14, 15), campus='North Campus')
+        self.math_morning = self.section(self.math, '001', 'MW', time(9, 30), time(10, 45))
+        self.math_afternoon = self.section(self.math, '002', 'MW', time(11, 0), time(12, 15))
+
+    def section(self, course, number, days, start, end, campus='Main Campus'):
+        return CourseSection.objects.create(
+            course=course, section_number=number, crn=str(next(self.crn)), term='Fall', year=2024,
+            meeting_days=days, start_time=start, end_time=end, campus=campus, max_enrollment=30
+        )
+
+    def generate(self, **data):
+        payload = {'course_ids': [self.cs.id, self.math.id], 'term': 'Fall', 'year': 2024}
+        payload.update(data)
+        response = self.client.post(
+            '/api/plans/generate_schedules/', json.dumps(payload), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def section_ids(self, schedule):
+        return {section['section_id'] for section in schedule['sections']}
+
+    def test_masks_agree_with_time_overlap(self):
+        times = [time(9, 0), time(9, 50), time(10, 0), time(10, 45), time(11, 0)]
+        for start1, end1, start2, end2 in itertools.product(times, repeat=4):
+            if start1 >= end1 or start2 >= end2:
+                continue
+            overlap = bool(
+                generator.section_mask('MW', start1, end1) & generator.section_mask('W', start2, end2)
+            )
+            self.assertEqual(overlap, check_time_overlap(start1, end1, start2, end2))
+
+    def test_schedules_are_conflict_free_and_ranked(self):
+        data = self.generate()
+
+        self.assertTrue(data['complete'])
+        schedules = [self.section_ids(schedule) for schedule in data['schedules']]
+        self.assertNotIn({self.cs_morning.id, self.math_morning.id}, schedules)
+        # Three days on campus beat four
+        self.assertEqual(schedules[0], {self.cs_morning.id, self.math_afternoon.id})
+        self.assertEqual(len(schedules), 3)
+
+    def test_hard_constraints_remove_sections(self):
+        data = self.generate(free_days=['FRI'], earliest_start='09:15')
+
+        self.assertEqual(data['unschedulable'], ['CS101'])
+        self.assertEqual(data['schedules'][0]['missing'], ['CS101'])
+        self.assertEqual(self.section_ids(data['schedules'][0]), {self.math_morning.id})
+
+    def test_preferred_campus_ranks_first(self):
+        data = self.generate(campus='North Campus', limit=1)
+        self.assertIn(self.cs_friday.id, self.section_ids(data['schedules'][0]))
+
+    def test_max_credits_includes_as_many_courses_as_fit(self):
+        data = self.generate(max_credits=4)
+        self.assertTrue(all(len(schedule['sections']) == 1 for schedule in data['schedules']))
+
+    def test_existing_enrollments_are_respected(self):
+        other = Course.objects.create(
+            course_code='ENG101', title='Composition', credits=3, department='ENG', description='Test'
+        )
+        Enrollment.objects.create(
+            student=self.user, section=self.section(other, '001', 'MW', time(11, 0), time(11, 50))
+        )
+        data = self.generate()
+        for schedule in data['schedules']:
+            self.assertNotIn(self.math_afternoon.id, self.section_ids(schedule))
+
+    def test_invalid_request(self):
+        response = self.client.post(
+            '/api/plans/generate_schedules/', json.dumps({'course_ids': [], 'term': 'Fall'}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def synthetic_candidates(self, courses=6, sections=10):
+        candidates = {}
+        for course_id in range(courses):
+            candidates[course_id] = []
+            for number in range(sections):
+                days = ('MWF', 'TR', 'MW')[number % 3]
+                start = time(8 + (number + course_id) % 10, 0)
+                end = time(start.hour, 50)
+                section = SimpleNamespace(
+                    course_id=course_id, meeting_days=days, start_time=start, end_time=end,
+                    campus='Main Campus', course=SimpleNamespace(credits=3)
+                )
+                candidates[course_id].append(generator.make_candidate(section, generator.Constraints()))
+        return candidates
+
+    def test_six_courses_finish_well_within_budget(self):
+        result = generator.generate_schedules(
+            self.synthetic_candidates(), generator.Constraints(), limit=10, time_budget=5
+        )
+        self.assertTrue(result.complete)
+        self.assertLess(result.elapsed, 1)
+        self.assertEqual(len(result.schedules), 10)
+        for schedule in result.schedules:
+            self.assertEqual(schedule['missing'], [])
+
+    def test_time_budget_returns_partial_results(self):
+        result = generator.generate_schedules(
+            self.synthetic_candidates(courses=10, sections=20), generator.Constraints(),
+            limit=5, time_budget=0
+        )
+        self.assertFalse(result.complete)
+        self.assertLessEqual(len(result.schedules), 5)
@@ -7,13 +7,16 @@ from django.db.models import Q
 from courses.models import CourseSection
 from .models import PlannedCourse, ScheduleConflict
 
+# Days of the week in display order
+DAYS = ('MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN')
+
 
 def parse_meeting_days(meeting_days: str) -> List[str]:
     """
     Parse meeting days string into individual days.
     
     Args:
-        meeting_days: String like 'MWF', 'TTH', or 'MW'
+        meeting_days: String like 'MWF', 'TTH', 'TR' or 'MW'
         
     Returns:
         List of day codes like ['MON', 'WED', 'FRI']
@@ -29,9 +32,16 @@ def parse_meeting_days(meeting_days: str) -> List[str]:
     }
     
     days = []
-    for char in meeting_days.upper():
-        if char in day_map:
-            days.append(day_map[char])
+    codes = meeting_days.upper()
+    i = 0
+    while i < len(codes):
+        # 'TH' is Thursday, as in 'TTH'; a lone 'T' is Tuesday
+        if codes.startswith('TH', i):
+            day, i = 'THU', i + 2
+        else:
+            day, i = day_map.get(codes[i]), i + 1
+        if day and day not in days:
+            days.append(day)
     
     return days
 
@@ -212,6 +222,44 @@ def check_prerequisites(student, course) -> Tuple[bool, List[str]]:
     return prerequisites_met, missing_prerequisites
 
 
+def section_entry(section, **extra) -> Dict:
+    """
+    Describe ``section`` as one entry of a schedule grid.
+
+    ``section`` needs ``course`` and ``instructor`` loaded; ``extra`` is
+    merged in, e.g. ``status`` or the id of the owning enrollment.
+    """
+    entry = {
+        'section_id': section.id,
+        'course_code': section.course.course_code,
+        'course_title': section.course.title,
+        'section_number': section.section_number,
+        'term': section.term,
+        'year': section.year,
+        'days': parse_meeting_days(section.meeting_days),
+        'start_time': section.start_time,
+        'end_time': section.end_time,
+        'location': section.location,
+        'instructor': section.instructor.get_full_name() if section.instructor else 'TBA',
+        'credits': section.course.credits,
+    }
+    entry.update(extra)
+    return entry
+
+
+def group_by_day(entries) -> Dict[str, List[Dict]]:
+    """Place schedule entries under each day they meet, sorted by start time."""
+    schedule = {day: [] for day in DAYS}
+    for entry in entries:
+        for day in entry['days']:
+            if day in schedule:
+                schedule[day].append(entry)
+
+    for day in DAYS:
+        schedule[day].sort(key=lambda x: x['start_time'])
+    return schedule
+
+
 def get_schedule_grid_data(plan) -> Dict:
     """
     Generate schedule grid data for visualization.
@@ -223,39 +271,16 @@ def get_schedule_grid_data(plan) -> Dict:
         Dictionary with schedule grid data organized by day and time
     """
     planned_courses = plan.planned_courses.select_related(
-        'section__course'
+        'section__course', 'section__instructor'
     ).all()
     
-    # Days of the week in order
-    days = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN']
-    
-    # Initialize schedule grid
-    schedule = {day: [] for day in days}
-    
-    for planned_course in planned_courses:
-        section = planned_course.section
-        meeting_days = parse_meeting_days(section.meeting_days)
-        
-        for day in meeting_days:
-            if day in schedule:
-                schedule[day].append({
-                    'course_code': section.course.course_code,
-                    'course_title': section.course.title,
-                    'section_number': section.section_number,
-                    'start_time': section.start_time,
-                    'end_time': section.end_time,
-                    'location': section.location,
-                    'instructor': section.instructor.get_full_name() if section.instructor else 'TBA',
-                    'credits': section.course.credits,
-                    'planned_course_id': planned_course.id
-                })
-    
-    # Sort courses by start time for each day
-    for day in days:
-        schedule[day].sort(key=lambda x: x['start_time'])
+    schedule = group_by_day(
+        section_entry(planned_course.section, planned_course_id=planned_course.id)
+        for planned_course in planned_courses
+    )
     
     return {
-        'days': days,
+        'days': list(DAYS),
         'schedule': schedule,
         'earliest_time': time(8, 0),  # 8:00 AM
         'latest_time': time(22, 0)     # 10:00 PM
@@ -12,10 +12,16 @@ from .models import StudentPlan, PlannedCourse, ScheduleConflict
 from .serializers import (
     StudentPlanListSerializer, StudentPlanDetailSerializer,
     CreatePlanSerializer, PlannedCourseSerializer,
-    AddCourseToPlanSerializer, ScheduleConflictSerializer
+    AddCourseToPlanSerializer, ScheduleConflictSerializer,
+    GenerateSchedulesSerializer
 )
-from .utils import save_detected_conflicts, check_prerequisites, get_schedule_grid_data
+from .utils import (
+    DAYS, save_detected_conflicts, check_prerequisites, get_schedule_grid_data, section_entry
+)
+from . import generator, schedule_cache
 from courses.models import CourseSection
+from registration import calendar
+from smart_registration.pagination import KeysetPagination
 
 
 @method_decorator(login_required, name='dispatch')
@@ -26,105 +32,32 @@ class SchedulePlanningView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Get student's enrolled courses and added courses
+        # Registered and added courses come from the cached schedule projection
         if self.request.user.is_student():
-            from registration.models import Enrollment
-            from .utils import parse_meeting_days
-            
-            # Get all enrolled courses for the student
-            enrollments = Enrollment.objects.filter(
-                student=self.request.user,
-                status=Enrollment.Status.ENROLLED
-            ).select_related('section__course', 'section__instructor').order_by('section__start_time')
-            
-            context['enrollments'] = enrollments
-            
-            # Calculate total credits
-            total_credits = sum(e.section.course.credits for e in enrollments)
-            context['total_credits'] = total_credits
-            
-            # Get added courses from session
-            added_courses_ids = self.request.session.get('added_courses', [])
-            added_courses_sections = []
-            if added_courses_ids:
-                added_courses_sections = CourseSection.objects.filter(
-                    id__in=added_courses_ids,
-                    is_available=True
-                ).select_related('course', 'instructor')
-            context['added_courses_sections'] = added_courses_sections
-            
-            # Generate schedule grid data for calendar view
-            days = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN']
-            schedule = {day: [] for day in days}
-            
-            # Add enrolled courses to schedule
-            for enrollment in enrollments:
-                section = enrollment.section
-                meeting_days = parse_meeting_days(section.meeting_days)
-                
-                for day in meeting_days:
-                    if day in schedule:
-                        schedule[day].append({
-                            'course_code': section.course.course_code,
-                            'course_title': section.course.title,
-                            'section_number': section.section_number,
-                            'start_time': section.start_time,
-                            'end_time': section.end_time,
-                            'location': section.location,
-                            'instructor': section.instructor.get_full_name() if section.instructor else 'TBA',
-                            'credits': section.course.credits,
-                            'enrollment_id': enrollment.id,
-                            'status': 'registered'
-                        })
-            
-            # Add added courses to schedule
-            for section in added_courses_sections:
-                meeting_days = parse_meeting_days(section.meeting_days)
-                
-                for day in meeting_days:
-                    if day in schedule:
-                        schedule[day].append({
-                            'course_code': section.course.course_code,
-                            'course_title': section.course.title,
-                            'section_number': section.section_number,
-                            'start_time': section.start_time,
-                            'end_time': section.end_time,
-                            'location': section.location,
-                            'instructor': section.instructor.get_full_name() if section.instructor else 'TBA',
-                            'credits': section.course.credits,
-                            'section_id': section.id,
-                            'status': 'added'
-                        })
-            
-            # Sort courses by start time for each day
-            for day in days:
-                schedule[day].sort(key=lambda x: x['start_time'])
-            
+            term, year = schedule_cache.term_from_params(self.request.GET)
+            projection = schedule_cache.get_schedule(
+                self.request.user,
+                cart=self.request.session.get('added_courses', []),
+                term=term,
+                year=year,
+            )
+            context['enrollments'] = projection['registered']
+            context['total_credits'] = projection['total_credits']
+            context['added_courses_sections'] = projection['added']
             context['schedule_data'] = {
-                'days': days,
-                'schedule': schedule
+                'days': list(DAYS),
+                'schedule': projection['schedule']
             }
+            context['time_slots'] = schedule_cache.TIME_SLOTS
             
-            # Create time slots for schedule grid (7 AM - 10 PM)
-            time_slots = []
-            for hour in range(7, 22):
-                # Proper 12-hour format conversion
-                if hour < 12:
-                    display_hour = hour
-                    period = 'AM'
-                elif hour == 12:
-                    display_hour = 12
-                    period = 'PM'
-                else:
-                    display_hour = hour - 12
-                    period = 'PM'
-                
-                time_slots.append({
-                    'hour': hour,
-                    'display': f"{display_hour}:00",
-                    'period': period
-                })
-            context['time_slots'] = time_slots
+            # One calendar subscription per term the student is registered in
+            terms = sorted(
+                {(entry['year'], entry['term']) for entry in projection['registered']}
+            )
+            context['calendar_feeds'] = [
+                {'label': f'{term} {year}', 'url': calendar.feed_url(self.request.user, term, year)}
+                for year, term in terms
+            ]
         
         return context
 
@@ -145,12 +78,15 @@ class StudentPlanViewSet(viewsets.ModelViewSet):
     - add_course: Add a course to the plan
     - remove_course: Remove a course from the plan
     - detect_conflicts: Run conflict detection
+    - generate_schedules: Suggest conflict-free section combinations
     - submit: Submit plan for advisor approval
     - approve: Approve a plan (advisors only)
     - reject: Reject a plan (advisors only)
     """
     serializer_class = StudentPlanListSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         """Return plans based on user role."""
@@ -287,6 +223,98 @@ class StudentPlanViewSet(viewsets.ModelViewSet):
             ).data
         })
     
+    @action(detail=False, methods=['post'])
+    def generate_schedules(self, request):
+        """
+        Suggest conflict-free schedules for a list of desired courses.
+        
+        Sections outside the earliest start, latest end or free days are
+        never used; the preferred campus and fewer days on campus rank
+        schedules higher. Schedules that cannot fit every course include as
+        many as possible and list the rest in ``missing``.
+        """
+        from registration.models import Enrollment
+        
+        serializer = GenerateSchedulesSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        
+        constraints = generator.Constraints(
+            earliest_start=data.get('earliest_start'),
+            latest_end=data.get('latest_end'),
+            free_days=tuple(data['free_days']),
+            campus=data['campus'],
+            max_credits=data.get('max_credits'),
+            include_full=data['include_full'],
+        )
+        course_ids = data['course_ids']
+        
+        sections = CourseSection.objects.filter(
+            course_id__in=course_ids,
+            term__iexact=data['term'],
+            year=data['year']
+        ).select_related('course', 'instructor')
+        candidates = {course_id: [] for course_id in course_ids}
+        courses = {}
+        for section in sections:
+            courses[section.course_id] = section.course
+            if generator.eligible(section, constraints):
+                candidates[section.course_id].append(generator.make_candidate(section, constraints))
+        
+        # Sections the student already attends this term are fixed, except
+        # for requested courses, which may be moving to another section
+        occupied = occupied_credits = 0
+        if data['respect_enrollments'] and request.user.is_student():
+            enrollments = Enrollment.objects.filter(
+                student=request.user,
+                status=Enrollment.Status.ENROLLED,
+                section__term__iexact=data['term'],
+                section__year=data['year']
+            ).exclude(section__course_id__in=course_ids).select_related('section__course')
+            for enrollment in enrollments:
+                section = enrollment.section
+                occupied |= generator.section_mask(section.meeting_days, section.start_time, section.end_time)
+                occupied_credits += section.course.credits
+        
+        result = generator.generate_schedules(
+            candidates,
+            constraints,
+            limit=data['limit'],
+            occupied=occupied,
+            occupied_credits=occupied_credits,
+        )
+        
+        def course_code(course_id):
+            course = courses.get(course_id)
+            return course.course_code if course else None
+        
+        return Response({
+            'schedules': [
+                {
+                    'sections': [
+                        section_entry(
+                            section, campus=section.campus,
+                            available_seats=section.available_seats()
+                        )
+                        for section in schedule['sections']
+                    ],
+                    'credits': schedule['credits'],
+                    'penalty': schedule['penalty'],
+                    'idle_minutes': schedule['idle_minutes'],
+                    'missing': [course_code(course_id) or course_id for course_id in schedule['missing']],
+                }
+                for schedule in result.schedules
+            ],
+            'unschedulable': [
+                course_code(course_id) or course_id
+                for course_id, options in candidates.items() if not options
+            ],
+            'complete': result.complete,
+            'explored': result.explored,
+            'elapsed_ms': round(result.elapsed * 1000, 1),
+        })
+    
     @action(detail=True, methods=['post'])
     def submit(self, request, pk=None):
         """Submit plan for advisor approval."""
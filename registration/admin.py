@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Enrollment, RegistrationRequest, RegistrationLog
+from .models import Enrollment, RegistrationRequest, RegistrationLog, RegistrationWindow
 
 
 @admin.register(Enrollment)
@@ -25,3 +25,10 @@ class RegistrationLogAdmin(admin.ModelAdmin):
     search_fields = ('user__username',)
     raw_id_fields = ('user', 'enrollment', 'request')
 
+
+
+@admin.register(RegistrationWindow)
+class RegistrationWindowAdmin(admin.ModelAdmin):
+    list_display = ('term', 'year', 'cohort', 'opens_at', 'closes_at', 'remind_at', 'reminders_sent_at')
+    list_filter = ('term', 'year', 'cohort')
+    readonly_fields = ('reminder_cursor', 'reminders_sent_at')
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RegistrationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'registration'
+
+    def ready(self):
+        # Import signal handlers to ensure they're registered
+        from . import signals  # noqa: F401
@@ -0,0 +1,252 @@
+"""
+iCalendar (ICS) feeds of enrolled schedules.
+
+Each student gets a subscription URL carrying a signed token, so calendar
+apps can poll it without a session. A feed covers one term: every ENROLLED
+section becomes a weekly recurring event between the term's start and end
+dates (``TERM_DATES``), in local time (``TIME_ZONE``) so classes keep their
+hour across daylight saving changes; the feed's VTIMEZONE defines the zone.
+
+Calendar clients poll often, so feeds are validated against a per-student
+enrollment version kept in the cache. The version is bumped whenever the
+student's enrollments change or a section they are enrolled in is
+rescheduled; a poll whose ETag matches is answered with 304 before any
+enrollment query runs.
+"""
+import hashlib
+import time as clock
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from courses.versioning import get_catalog_changed_at, get_catalog_version
+from planning.utils import DAYS, parse_meeting_days
+
+ENROLLMENT_VERSION_KEY = 'registration:enrollment_version:{student_id}'
+FEED_TOKEN_SALT = 'registration.calendar-feed'
+
+# iCalendar weekday codes by planning day code
+ICAL_DAYS = dict(zip(DAYS, ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')))
+
+
+def _version_key(student_id):
+    return ENROLLMENT_VERSION_KEY.format(student_id=student_id)
+
+
+def get_enrollment_version(student_id) -> int:
+    """
+    The student's enrollment version, a millisecond timestamp of the last
+    change (or of the first time it was asked for).
+    """
+    key = _version_key(student_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(clock.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_enrollment_version(*student_ids):
+    """Mark the enrollments of ``student_ids`` as changed now."""
+    if not student_ids:
+        return
+    keys = [_version_key(student_id) for student_id in set(student_ids)]
+    now = int(clock.time() * 1000)
+    current = cache.get_many(keys)
+    # Always move on to a later second, so Last-Modified changes too, even
+    # if two changes land in the same second or clocks disagree
+    cache.set_many(
+        {key: max(now, (current.get(key, 0) // 1000 + 1) * 1000) for key in keys},
+        timeout=None
+    )
+
+
+def feed_token(student) -> str:
+    return signing.dumps(student.pk, salt=FEED_TOKEN_SALT, compress=True)
+
+
+def feed_url(student, term, year) -> str:
+    """Path of ``student``'s feed for one term."""
+    return reverse('registration:calendar-feed', kwargs={
+        'token': feed_token(student), 'term': term, 'year': year
+    })
+
+
+def student_id_from_token(token):
+    """The student id signed into ``token``, or None if it is not valid."""
+    try:
+        return signing.loads(token, salt=FEED_TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+
+
+def term_dates(term, year):
+    """
+    First and last day of classes for ``term`` in ``year``.
+
+    ``TERM_DATES`` maps term names to ``('MM-DD', 'MM-DD')``; a term whose
+    end falls before its start ends in the following year, and a term that
+    is not configured spans the whole year. Raises ``ValueError`` for years
+    whose dates cannot be represented.
+    """
+    configured = {name.lower(): dates for name, dates in getattr(settings, 'TERM_DATES', {}).items()}
+    start, end = configured.get(term.lower(), ('01-01', '12-31'))
+    start = date.fromisoformat(f'{year}-{start}')
+    end = date.fromisoformat(f'{year}-{end}')
+    if end < start:
+        end = end.replace(year=year + 1)
+    return start, end
+
+
+def feed_validators(student_id, term, year):
+    """
+    ``(etag, last_modified)`` for a student's feed without touching the
+    enrollment tables. Last-Modified is a Unix timestamp in seconds: the
+    later of the student's last enrollment change and the term's last
+    catalog change.
+    """
+    version = get_enrollment_version(student_id)
+    raw = '|'.join(str(part) for part in (
+        student_id, term.lower(), year, version,
+        get_catalog_version(term), term_dates(term, year),
+    ))
+    last_modified = max(version, get_catalog_changed_at(term))
+    return f'"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"', last_modified // 1000
+
+
+def _escape(text):
+    return (
+        str(text).replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """Fold a content line at 75 octets as RFC 5545 requires."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        # Back off so a multi-byte character is never split
+        while limit < len(encoded) and (encoded[limit] & 0xC0) == 0x80:
+            limit -= 1
+        parts.append(encoded[:limit].decode())
+        encoded = encoded[limit:]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _lines(*lines):
+    return ''.join(_fold(line) for line in lines)
+
+
+def _utc_offset(offset):
+    sign = '-' if offset < timedelta(0) else '+'
+    minutes, seconds = divmod(int(abs(offset).total_seconds()), 60)
+    return f'{sign}{minutes // 60:02d}{minutes % 60:02d}' + (f'{seconds:02d}' if seconds else '')
+
+
+def _observance(tz, at, offset_from):
+    """A STANDARD or DAYLIGHT block for the offset taking effect at UTC ``at``."""
+    local = at.astimezone(tz)
+    return (
+        'BEGIN:DAYLIGHT' if local.dst() else 'BEGIN:STANDARD',
+        # Observances start in the local time of the offset they replace
+        f'DTSTART:{(at + offset_from).replace(tzinfo=None):%Y%m%dT%H%M%S}',
+        f'TZOFFSETFROM:{_utc_offset(offset_from)}',
+        f'TZOFFSETTO:{_utc_offset(local.utcoffset())}',
+        f'TZNAME:{local.tzname()}',
+        'END:DAYLIGHT' if local.dst() else 'END:STANDARD',
+    )
+
+
+def _vtimezone(tz, start, end):
+    """
+    A VTIMEZONE for ``tz`` from ``start`` to ``end``, which RFC 5545
+    requires for every TZID used. It lists the offset in force when the
+    term starts and each change during it; changes are found a day at a
+    time and narrowed down to the second.
+    """
+    utc = ZoneInfo('UTC')
+    at = datetime.combine(start, datetime.min.time(), tzinfo=tz).astimezone(utc)
+    stop = datetime.combine(end + timedelta(days=1), datetime.min.time(), tzinfo=tz).astimezone(utc)
+    offset = at.astimezone(tz).utcoffset()
+    lines = ['BEGIN:VTIMEZONE', f'TZID:{tz.key}', *_observance(tz, at, offset)]
+    while at < stop:
+        step = min(at + timedelta(days=1), stop)
+        if step.astimezone(tz).utcoffset() != offset:
+            low, high = at, step
+            while high - low > timedelta(seconds=1):
+                middle = low + (high - low) / 2
+                if middle.astimezone(tz).utcoffset() == offset:
+                    low = middle
+                else:
+                    high = middle
+            lines.extend(_observance(tz, high, offset))
+            offset = high.astimezone(tz).utcoffset()
+        at = step
+    lines.append('END:VTIMEZONE')
+    return _lines(*lines)
+
+
+def _event(section, start, end, tz, stamp, host):
+    days = parse_meeting_days(section.meeting_days)
+    if not days:
+        return ''
+
+    # The first meeting on or after the first day of classes
+    first = start
+    while DAYS[first.weekday()] not in days:
+        first += timedelta(days=1)
+    if first > end:
+        return ''
+
+    local_until = datetime.combine(end, section.end_time, tzinfo=tz)
+    until = local_until.astimezone(ZoneInfo('UTC')).strftime('%Y%m%dT%H%M%SZ')
+    instructor = section.instructor.get_full_name() if section.instructor else 'TBA'
+    return _lines(
+        'BEGIN:VEVENT',
+        f'UID:section-{section.pk}-{section.term.lower()}-{section.year}@{host}',
+        f'DTSTAMP:{stamp}',
+        f'SUMMARY:{_escape(f"{section.course.course_code} - {section.course.title}")}',
+        f'DTSTART;TZID={tz.key}:{datetime.combine(first, section.start_time):%Y%m%dT%H%M%S}',
+        f'DTEND;TZID={tz.key}:{datetime.combine(first, section.end_time):%Y%m%dT%H%M%S}',
+        f'RRULE:FREQ=WEEKLY;UNTIL={until};BYDAY={",".join(ICAL_DAYS[day] for day in days)}',
+        f'LOCATION:{_escape(section.location)}',
+        f'DESCRIPTION:{_escape(f"Section {section.section_number}, {instructor}")}',
+        'END:VEVENT',
+    )
+
+
+def ics_chunks(enrollments, term, year, host):
+    """
+    Yield the feed for ``enrollments`` one event at a time.
+
+    ``enrollments`` should have ``section__course`` and
+    ``section__instructor`` loaded.
+    """
+    start, end = term_dates(term, year)
+    tz = ZoneInfo(settings.TIME_ZONE)
+    stamp = timezone.now().astimezone(ZoneInfo('UTC')).strftime('%Y%m%dT%H%M%SZ')
+
+    yield _lines(
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Smart Registration Services//Schedule//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(f"{term.title()} {year} Schedule")}',
+        f'X-WR-TIMEZONE:{tz.key}',
+    )
+    yield _vtimezone(tz, start, end)
+    for enrollment in enrollments:
+        event = _event(enrollment.section, start, end, tz, stamp, host)
+        if event:
+            yield event
+    yield _lines('END:VCALENDAR')
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_trigram_search'),
+        ('registration', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['enrolled_at', 'id'], name='enrollments_enrolle_13a894_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registrationlog',
+            index=models.Index(fields=['timestamp', 'id'], name='registratio_timesta_9e55d6_idx'),
+        ),
+    ]
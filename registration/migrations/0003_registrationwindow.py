@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0002_enrollment_enrollments_enrolle_13a894_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistrationWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(help_text='Academic term (e.g., Fall, Spring, Summer)', max_length=20)),
+                ('year', models.IntegerField(help_text='Academic year')),
+                ('cohort', models.PositiveSmallIntegerField(blank=True, help_text='Year of study the window is for; empty for every student', null=True)),
+                ('opens_at', models.DateTimeField()),
+                ('closes_at', models.DateTimeField()),
+                ('remind_at', models.DateTimeField(blank=True, help_text='When students who have not registered are reminded; defaults to REGISTRATION_REMINDER_LEAD_HOURS before closing')),
+                ('reminder_cursor', models.BigIntegerField(default=0, help_text='Last student id reminded while reminders are going out')),
+                ('reminders_sent_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Registration Window',
+                'verbose_name_plural': 'Registration Windows',
+                'db_table': 'registration_windows',
+                'ordering': ['opens_at'],
+                'indexes': [models.Index(condition=models.Q(('reminders_sent_at__isnull', True)), fields=['remind_at'], name='registration_window_due_idx'), models.Index(fields=['term', 'year'], name='registratio_term_d03e11_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('closes_at__gt', models.F('opens_at'))), name='registration_window_closes_after_opening')],
+            },
+        ),
+    ]
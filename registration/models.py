@@ -1,13 +1,21 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Exists, OuterRef
 from django.utils.translation import gettext_lazy as _
 from authentication.models import User
 from courses.models import CourseSection
+from infrastructure.tracking import TrackedFieldsMixin
 from planning.models import StudentPlan
 
 
-class Enrollment(models.Model):
+class Enrollment(TrackedFieldsMixin, models.Model):
     """Model representing a student's enrollment in a course section."""
     
+    # Stored status, so the dashboard counters see enrollments being dropped
+    tracked_fields = ('status',)
+    
     class Status(models.TextChoices):
         ENROLLED = 'ENROLLED', _('Enrolled')
         WAITLISTED = 'WAITLISTED', _('Waitlisted')
@@ -48,6 +56,9 @@ class Enrollment(models.Model):
         verbose_name_plural = _('Enrollments')
         unique_together = [['student', 'section']]
         ordering = ['-enrolled_at']
+        indexes = [
+            models.Index(fields=['enrolled_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.student.username} - {self.section} ({self.status})"
@@ -167,7 +178,94 @@ class RegistrationLog(models.Model):
         verbose_name = _('Registration Log')
         verbose_name_plural = _('Registration Logs')
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.user} - {self.action} at {self.timestamp}"
 
+
+
+class RegistrationWindow(models.Model):
+    """Period in which a cohort of students may register for a term."""
+    
+    term = models.CharField(
+        max_length=20,
+        help_text=_('Academic term (e.g., Fall, Spring, Summer)')
+    )
+    
+    year = models.IntegerField(
+        help_text=_('Academic year')
+    )
+    
+    cohort = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text=_('Year of study the window is for; empty for every student')
+    )
+    
+    opens_at = models.DateTimeField()
+    closes_at = models.DateTimeField()
+    
+    remind_at = models.DateTimeField(
+        blank=True,
+        help_text=_('When students who have not registered are reminded; '
+                    'defaults to REGISTRATION_REMINDER_LEAD_HOURS before closing')
+    )
+    
+    reminder_cursor = models.BigIntegerField(
+        default=0,
+        help_text=_('Last student id reminded while reminders are going out')
+    )
+    
+    reminders_sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'registration_windows'
+        verbose_name = _('Registration Window')
+        verbose_name_plural = _('Registration Windows')
+        ordering = ['opens_at']
+        indexes = [
+            # Reminders due: only windows still to be reminded are scanned
+            models.Index(
+                fields=['remind_at'],
+                condition=models.Q(reminders_sent_at__isnull=True),
+                name='registration_window_due_idx'
+            ),
+            models.Index(fields=['term', 'year']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(closes_at__gt=models.F('opens_at')),
+                name='registration_window_closes_after_opening'
+            ),
+        ]
+    
+    def __str__(self):
+        cohort = f" (year {self.cohort})" if self.cohort is not None else ''
+        return f"{self.term} {self.year}{cohort}: {self.opens_at:%Y-%m-%d} to {self.closes_at:%Y-%m-%d}"
+    
+    def save(self, *args, **kwargs):
+        if self.remind_at is None and self.closes_at is not None:
+            lead = getattr(settings, 'REGISTRATION_REMINDER_LEAD_HOURS', 48)
+            self.remind_at = self.closes_at - timedelta(hours=lead)
+        super().save(*args, **kwargs)
+    
+    def unregistered_students(self):
+        """
+        Active students in the cohort with no enrolled or waitlisted section
+        in the window's term, as one anti-join query.
+        """
+        students = User.objects.filter(role=User.Role.STUDENT, is_active=True)
+        if self.cohort is not None:
+            students = students.filter(year_of_study=self.cohort)
+        return students.exclude(Exists(
+            Enrollment.objects.filter(
+                student=OuterRef('pk'),
+                section__term=self.term,
+                section__year=self.year,
+                status__in=[Enrollment.Status.ENROLLED, Enrollment.Status.WAITLISTED],
+            )
+        ))
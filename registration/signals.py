@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from courses.models import CourseSection
+from courses.signals import SEAT_FIELDS
+from .calendar import bump_enrollment_version
+from .models import Enrollment
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def bump_version_on_enrollment_change(sender, instance, **kwargs):
+    """Invalidate the student's calendar feed once the change commits."""
+    student_id = instance.student_id
+    transaction.on_commit(lambda: bump_enrollment_version(student_id))
+
+
+@receiver(post_save, sender=CourseSection)
+def bump_version_on_section_change(sender, instance, created=False, update_fields=None, **kwargs):
+    """A rescheduled or renamed section changes the feed of everyone enrolled."""
+    if created or (update_fields and set(update_fields) <= SEAT_FIELDS):
+        return
+    student_ids = list(Enrollment.objects.filter(
+        section=instance, status=Enrollment.Status.ENROLLED
+    ).values_list('student_id', flat=True))
+    if student_ids:
+        transaction.on_commit(lambda: bump_enrollment_version(*student_ids))
@@ -1,11 +1,15 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APIClient
 from rest_framework import status
 from courses.models import Course, CourseSection
-from registration.models import Enrollment
+from registration import calendar
+from registration.models import Enrollment, RegistrationLog
 from datetime import time
+from unittest import mock
 import json
 
 User = get_user_model()
@@ -326,3 +330,205 @@ class BulkRegistrationTestCase(TestCase):
         enrollments = Enrollment.objects.filter(student=self.user)
         self.assertEqual(enrollments.count(), 2)
 
+
+
+class KeysetPaginationTestCase(TestCase):
+    """Test cursor pagination of high-volume list endpoints."""
+    
+    def setUp(self):
+        self.api_client = APIClient()
+        self.registrar = User.objects.create_user(
+            username='registrar',
+            password='testpass',
+            role=User.Role.REGISTRAR
+        )
+        self.api_client.force_authenticate(user=self.registrar)
+        
+        RegistrationLog.objects.bulk_create([
+            RegistrationLog(user=self.registrar, action=RegistrationLog.Action.REGISTER)
+            for _ in range(25)
+        ])
+        # Identical timestamps force the id tie-breaker to keep pages stable
+        RegistrationLog.objects.update(timestamp=timezone.now())
+    
+    def test_pages_walk_every_row_once_without_counting(self):
+        """Following next links visits each log once, newest first."""
+        seen = []
+        url = '/api/registration-logs/?page_size=10'
+        pages = 0
+        while url:
+            response = self.api_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(log['id'] for log in response.data['results'])
+            url = response.data['next']
+            pages += 1
+        
+        self.assertEqual(pages, 3)
+        expected = list(RegistrationLog.objects.order_by('-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+    
+    def test_previous_link_and_optional_count(self):
+        """Previous links return the prior page and count is opt-in."""
+        first = self.api_client.get('/api/registration-logs/', {'page_size': 10, 'count': 'true'})
+        self.assertEqual(first.data['count'], 25)
+        self.assertIsNone(first.data['previous'])
+        
+        second = self.api_client.get(first.data['next'])
+        back = self.api_client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+    
+    def test_invalid_cursor_is_rejected(self):
+        """A malformed cursor returns 404 rather than an error."""
+        response = self.api_client.get('/api/registration-logs/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+# Seat count saves publish on commit; keep that off Redis
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class CalendarFeedTestCase(TestCase):
+    """Test the signed iCalendar feed and its conditional GET handling."""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='teststu',
+            password='testpass',
+            email='test@test.com',
+            role=User.Role.STUDENT
+        )
+        self.course = Course.objects.create(
+            course_code='CS101',
+            title='Intro to CS',
+            credits=3,
+            department='CS',
+            description='Test course'
+        )
+        self.section = CourseSection.objects.create(
+            course=self.course,
+            section_number='001',
+            crn='10001',
+            term='Fall',
+            year=2024,
+            meeting_days='TTH',
+            start_time=time(10, 30),
+            end_time=time(11, 45),
+            location='CS 102'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enrollment = Enrollment.objects.create(student=self.user, section=self.section)
+        self.url = calendar.feed_url(self.user, 'Fall', 2024)
+    
+    def test_feed_expands_meeting_days_into_weekly_rule(self):
+        """Each enrolled section is one weekly event over the term, no login needed."""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('SUMMARY:CS101 - Intro to CS', body)
+        self.assertIn('RRULE:FREQ=WEEKLY;UNTIL=20241212T114500Z;BYDAY=TU,TH', body)
+        # Fall starts on Sunday 2024-08-25; the first class is that Tuesday
+        self.assertIn('DTSTART;TZID=UTC:20240827T103000', body)
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+    
+    def test_feed_defines_its_timezone(self):
+        """Every TZID used has a VTIMEZONE, including the DST change inside the term."""
+        with self.settings(TIME_ZONE='America/New_York'):
+            body = b''.join(self.client.get(self.url).streaming_content).decode()
+        
+        self.assertIn('DTSTART;TZID=America/New_York:20240827T103000', body)
+        timezone_block = body[body.index('BEGIN:VTIMEZONE'):body.index('END:VTIMEZONE')]
+        self.assertLess(body.index('END:VTIMEZONE'), body.index('BEGIN:VEVENT'))
+        self.assertIn('TZID:America/New_York', timezone_block)
+        self.assertIn(
+            'BEGIN:STANDARD\r\nDTSTART:20241103T020000\r\nTZOFFSETFROM:-0400\r\nTZOFFSETTO:-0500\r\n',
+            timezone_block
+        )
+    
+    def test_matching_etag_returns_304_without_queries(self):
+        """A poll with the current ETag never queries enrollments."""
+        etag = self.client.get(self.url)['ETag']
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+    
+    def test_if_modified_since_returns_304(self):
+        """Clients that only send If-Modified-Since are also answered with 304."""
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+    
+    @mock.patch('infrastructure.tasks.dispatch_outbox')
+    def test_enrollment_and_section_changes_invalidate_feed(self, mock_dispatch_outbox):
+        """Dropping a section or rescheduling it changes the validators."""
+        first = self.client.get(self.url)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.location = 'CS 202'
+            self.section.save()
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['Last-Modified'], first['Last-Modified'])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enrollment.status = Enrollment.Status.DROPPED
+            self.enrollment.save()
+        third = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=second['Last-Modified'])
+        self.assertEqual(third.status_code, 200)
+        self.assertNotIn('BEGIN:VEVENT', b''.join(third.streaming_content).decode())
+    
+    def test_course_edits_move_last_modified(self):
+        """Catalog edits that leave enrollments alone still fail If-Modified-Since."""
+        first = self.client.get(self.url)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.title = 'Introduction to CS'
+            self.course.save()
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['Last-Modified'], first['Last-Modified'])
+        self.assertIn('SUMMARY:CS101 - Introduction to CS', b''.join(response.streaming_content).decode())
+    
+    def test_seat_count_changes_keep_feed_cached(self):
+        """Other students enrolling only moves seat counts, not the feed."""
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.current_enrollment += 1
+            self.section.save(update_fields=['current_enrollment', 'updated_at'])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+    
+    def test_tampered_token_is_rejected(self):
+        """A token that fails signature checks returns 404."""
+        response = self.client.get(self.url.replace(':', 'x:', 1))
+        self.assertEqual(response.status_code, 404)
+    
+    def test_unrepresentable_years_return_404(self):
+        """Years outside the calendar, or a term wrapping past 9999, are not found."""
+        with self.settings(TERM_DATES={'Winter': ('12-15', '01-09')}):
+            for term, year in (('Fall', 0), ('Fall', 12345), ('Winter', 9999)):
+                response = self.client.get(calendar.feed_url(self.user, term, year))
+                self.assertEqual(response.status_code, 404)
+    
+    def test_term_is_slugified_in_filename(self):
+        """Quotes or line breaks in the term cannot break the Content-Disposition header."""
+        for term, filename in (('Fall', 'fall'), ('Fa"ll', 'fall'), ('Fall\n', 'fall'), ('"', 'schedule')):
+            response = self.client.get(calendar.feed_url(self.user, term, 2024))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Disposition'], f'inline; filename="{filename}-2024.ics"')
+    
+    def test_api_returns_feed_url(self):
+        """Students can look up their subscription URL through the API."""
+        api_client = APIClient()
+        api_client.force_authenticate(user=self.user)
+        
+        response = api_client.get('/api/enrollments/calendar_feed/', {'term': 'Fall', 'year': 2024})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['url'].endswith(self.url))
+        
+        response = api_client.get('/api/enrollments/calendar_feed/')
+        self.assertEqual(response.status_code, 400)
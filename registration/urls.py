@@ -6,7 +6,8 @@ from .views import (
     load_plan_to_added_courses, 
     add_to_added_courses, 
     remove_from_added_courses,
-    confirm_all_registration
+    confirm_all_registration,
+    calendar_feed
 )
 
 app_name = 'registration'
@@ -20,6 +21,7 @@ urlpatterns = [
     path('add-to-added-courses/', add_to_added_courses, name='add-to-added-courses'),
     path('remove-from-added-courses/', remove_from_added_courses, name='remove-from-added-courses'),
     path('confirm-all/', confirm_all_registration, name='confirm-all'),
+    path('calendar/<str:token>/<str:term>/<int:year>.ics', calendar_feed, name='calendar-feed'),
     # Legacy redirects (301 permanent)
     path('add-to-cart/', RedirectView.as_view(pattern_name='registration:add-to-added-courses', permanent=True)),
     path('remove-from-cart/', RedirectView.as_view(pattern_name='registration:remove-from-added-courses', permanent=True)),
@@ -4,13 +4,18 @@ from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.utils import timezone
 from django.db import transaction
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.text import slugify
+from django.views.decorators.http import require_safe
 import json
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import Enrollment, RegistrationRequest, RegistrationLog
+from . import calendar
 from .serializers import (
     EnrollmentSerializer, EnrollmentListSerializer,
     RegistrationRequestSerializer, CreateRegistrationRequestSerializer,
@@ -19,8 +24,10 @@ from .serializers import (
 )
 from planning.utils import check_prerequisites, check_schedule_conflict
 from planning.models import StudentPlan
+from planning import schedule_cache
 from courses.models import CourseSection
-from notifications.models import Notification
+from infrastructure import outbox
+from smart_registration.pagination import KeysetPagination
 
 
 @method_decorator(login_required, name='dispatch')
@@ -75,6 +82,8 @@ class EnrollmentViewSet(viewsets.ReadOnlyModelViewSet):
     """
     serializer_class = EnrollmentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-enrolled_at', '-id')
     
     def get_queryset(self):
         """Return enrollments based on user role."""
@@ -125,6 +134,47 @@ class EnrollmentViewSet(viewsets.ReadOnlyModelViewSet):
             'total_credits': sum(e.section.course.credits for e in enrolled)
         })
     
+    @action(detail=False, methods=['get'])
+    def schedule(self, request):
+        """
+        Get the weekly schedule of registered and cart sections.
+        
+        Served from the cached schedule projection; pass ``term`` and
+        ``year`` to limit it to one term.
+        """
+        if not request.user.is_student():
+            return Response(
+                {'error': 'Only students can view their schedule'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        term, year = schedule_cache.term_from_params(request.query_params)
+        projection = schedule_cache.get_schedule(
+            request.user,
+            cart=request.session.get('added_courses', []),
+            term=term,
+            year=year,
+        )
+        return Response(schedule_cache.schedule_payload(projection))
+    
+    @action(detail=False, methods=['get'])
+    def calendar_feed(self, request):
+        """Get the iCalendar subscription URL for one term."""
+        if not request.user.is_student():
+            return Response(
+                {'error': 'Only students can subscribe to their schedule'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        term, year = schedule_cache.term_from_params(request.query_params)
+        if term is None:
+            return Response(
+                {'error': 'term and year parameters are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({'url': request.build_absolute_uri(calendar.feed_url(request.user, term, year))})
+    
     @action(detail=False, methods=['get'])
     def by_section(self, request):
         """Get enrollments for a specific section."""
@@ -356,7 +406,7 @@ class RegistrationActionViewSet(viewsets.ViewSet):
                 action = RegistrationLog.Action.REGISTER
                 # Update enrollment count
                 section.current_enrollment += 1
-                section.save()
+                section.save(update_fields=['current_enrollment', 'updated_at'])
             
             enrollment = Enrollment.objects.create(
                 student=request.user,
@@ -425,7 +475,7 @@ class RegistrationActionViewSet(viewsets.ViewSet):
             if old_status == Enrollment.Status.ENROLLED:
                 if enrollment.section.current_enrollment > 0:
                     enrollment.section.current_enrollment -= 1
-                    enrollment.section.save()
+                    enrollment.section.save(update_fields=['current_enrollment', 'updated_at'])
             
             # Log the action
             RegistrationLog.objects.create(
@@ -520,6 +570,8 @@ class RegistrationLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     serializer_class = RegistrationLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-timestamp', '-id')
     
     def get_queryset(self):
         """Return logs based on user role."""
@@ -568,6 +620,7 @@ def load_plan_to_added_courses(request, plan_id):
     
     # Get or create added courses list in session
     added_courses = request.session.get('added_courses', [])
+    previous = list(added_courses)
     
     # Add sections to added courses (avoid duplicates)
     added = 0
@@ -578,6 +631,7 @@ def load_plan_to_added_courses(request, plan_id):
             added += 1
     
     request.session['added_courses'] = added_courses
+    schedule_cache.cart_changed(request.user.pk, previous, added_courses)
     
     return JsonResponse({
         'success': True,
@@ -605,8 +659,10 @@ def add_to_added_courses(request):
     added_courses = request.session.get('added_courses', [])
     
     if section_id not in added_courses:
+        previous = list(added_courses)
         added_courses.append(section_id)
         request.session['added_courses'] = added_courses
+        schedule_cache.cart_changed(request.user.pk, previous, added_courses)
         return JsonResponse({
             'success': True, 
             'message': 'Course added to Added Courses',
@@ -631,8 +687,10 @@ def remove_from_added_courses(request):
     added_courses = request.session.get('added_courses', [])
     
     if section_id in added_courses:
+        previous = list(added_courses)
         added_courses.remove(section_id)
         request.session['added_courses'] = added_courses
+        schedule_cache.cart_changed(request.user.pk, previous, added_courses)
         return JsonResponse({
             'success': True, 
             'message': 'Course removed from Added Courses',
@@ -716,7 +774,7 @@ def confirm_all_registration(request):
                 else:
                     enrollment_status = Enrollment.Status.ENROLLED
                     section.current_enrollment += 1
-                    section.save()
+                    section.save(update_fields=['current_enrollment', 'updated_at'])
                 
                 Enrollment.objects.create(
                     student=request.user,
@@ -739,21 +797,58 @@ def confirm_all_registration(request):
     
     # Clear added courses on success
     if registered > 0:
+        schedule_cache.cart_changed(request.user.pk, request.session.get('added_courses', []), [])
         request.session['added_courses'] = []
         
-        # Create enrollment confirmed notification
-        Notification.objects.create(
-            recipient=request.user,
-            notification_type=Notification.Type.ENROLLMENT_CONFIRMED,
-            title='Enrollment Confirmed',
-            message=f'You have successfully registered for {registered} course(s).',
-            link='/registration/register/',
-            is_sent=True,
-            sent_at=timezone.now()
-        )
+        # The confirmation notification is created by the outbox dispatcher
+        outbox.record('enrollment.confirmed', student_id=request.user.pk, registered=registered)
     
     return JsonResponse({
         'success': True,
         'registered': registered,
         'failed': failed
     })
+
+
+@require_safe
+def calendar_feed(request, token, term, year):
+    """
+    Stream a student's schedule for one term as iCalendar.
+
+    Authenticated by the signed token in the URL rather than a session so
+    calendar apps can subscribe. Polls carrying a current ETag or
+    Last-Modified get a 304 without querying enrollments.
+    """
+    student_id = calendar.student_id_from_token(token)
+    if student_id is None:
+        raise Http404('Unknown calendar feed')
+    try:
+        calendar.term_dates(term, year)
+    except ValueError:
+        # A year whose term dates fall outside what ``date`` can represent
+        raise Http404('Unknown term')
+    
+    etag, last_modified = calendar.feed_validators(student_id, term, year)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+    
+    enrollments = Enrollment.objects.filter(
+        student_id=student_id,
+        status=Enrollment.Status.ENROLLED,
+        section__term__iexact=term,
+        section__year=year
+    ).select_related(
+        'section__course', 'section__instructor'
+    ).order_by('section__start_time', 'id')
+    
+    response = StreamingHttpResponse(
+        calendar.ics_chunks(enrollments.iterator(), term, year, request.get_host()),
+        content_type='text/calendar; charset=utf-8'
+    )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    # The term comes from the URL; keep quotes and line breaks out of the header
+    response['Content-Disposition'] = f'inline; filename="{slugify(term) or "schedule"}-{year}.ics"'
+    return response
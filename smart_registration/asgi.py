@@ -11,6 +11,7 @@ import os
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
+from channels.security.websocket import AllowedHostsOriginValidator
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_registration.settings')
 
@@ -18,12 +19,20 @@ django_asgi_app = get_asgi_application()
 
 # Import routing after Django app is initialized
 from advisor import routing as advisor_routing
+from courses import routing as courses_routing
+from notifications import routing as notifications_routing
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
-    "websocket": AuthMiddlewareStack(
-        URLRouter(
-            advisor_routing.websocket_urlpatterns
+    # Connections are authenticated by the session cookie, so only pages
+    # served from ALLOWED_HOSTS may open them
+    "websocket": AllowedHostsOriginValidator(
+        AuthMiddlewareStack(
+            URLRouter(
+                advisor_routing.websocket_urlpatterns +
+                courses_routing.websocket_urlpatterns +
+                notifications_routing.websocket_urlpatterns
+            )
         )
     ),
 })
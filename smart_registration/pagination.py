@@ -0,0 +1,164 @@
+"""
+Keyset (cursor) pagination for high-volume list endpoints.
+
+Pages are selected with a ``WHERE (created_at, id) < (:last_created_at,
+:last_id)`` style condition over a stable, indexed ordering instead of
+``OFFSET``, so any page costs the same as the first one. The total count
+is only computed when the client asks for it with ``?count=true``.
+
+Views choose their ordering with a ``cursor_ordering`` attribute, e.g.
+``('-timestamp', '-id')``. The last field must be unique (normally ``id``)
+and a composite index on the ordering fields should back it.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a composite ordering with optional counts."""
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(getattr(view, 'cursor_ordering', self.ordering))
+        self.page_size = self.get_page_size(request)
+        self.fields = [queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() == 'true':
+            self.count = queryset.count()
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+        ordering = [self._flip(name) for name in self.ordering] if reverse else list(self.ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self._after(ordering, cursor['position']))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next_position = self.previous_position = None
+        if results:
+            if reverse:
+                self.previous_position = self._position(results[0]) if has_more else None
+                self.next_position = self._position(results[-1])
+            else:
+                self.previous_position = self._position(results[0]) if cursor else None
+                self.next_position = self._position(results[-1]) if has_more else None
+        elif cursor is not None:
+            # Walked off either end; let the client go back the way it came
+            if reverse:
+                self.next_position = cursor['position']
+            else:
+                self.previous_position = cursor['position']
+
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self._link(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self._link(self.previous_position, reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            position = [field.to_python(value) for field, value in zip(self.fields, data['p'])]
+            if len(position) != len(self.fields):
+                raise ValueError
+            return {'position': position, 'reverse': bool(data.get('r'))}
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        data = {'p': position}
+        if reverse:
+            data['r'] = 1
+        # isoformat() keeps microseconds, which DjangoJSONEncoder would truncate
+        raw = json.dumps(data, default=lambda value: value.isoformat(), separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def _link(self, position, reverse):
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(position, reverse)
+        )
+
+    def _position(self, obj):
+        return [getattr(obj, field.attname) for field in self.fields]
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    @staticmethod
+    def _after(ordering, position):
+        """
+        Rows strictly after ``position`` in ``ordering``, expanded to
+        ``a > x OR (a = x AND b > y) ...`` so each branch can use the index.
+        """
+        condition = Q()
+        for i, name in enumerate(ordering):
+            branch = Q(**{
+                ordering[j].lstrip('-'): position[j] for j in range(i)
+            })
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            branch &= Q(**{f'{name.lstrip("-")}__{lookup}': position[i]})
+            condition |= branch
+        return condition
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 import dotenv
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -62,6 +63,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -221,6 +223,41 @@ SPECTACULAR_SETTINGS = {
     'VERSION': '1.0.0',
 }
 
+# Cache Configuration
+# Catalog API responses and catalog version counters live here, so every
+# worker must share the same cache; local memory is only for development.
+if config('USE_LOCMEM_CACHE', default=config('USE_SQLITE', default=False, cast=bool), cast=bool):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('CACHE_URL', default='redis://localhost:6379/1'),
+        }
+    }
+
+# Seconds a cached catalog API response is kept (entries are also
+# invalidated whenever the catalog version changes)
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds a student's cached schedule projection is kept between views
+SCHEDULE_CACHE_TIMEOUT = config('SCHEDULE_CACHE_TIMEOUT', default=86400, cast=int)
+
+# Seconds the schedule generator may search before returning partial results
+SCHEDULE_GENERATOR_TIME_BUDGET = config('SCHEDULE_GENERATOR_TIME_BUDGET', default=0.5, cast=float)
+
+# First and last day of classes ('MM-DD') per term, used by calendar feeds
+TERM_DATES = {
+    'Spring': ('01-13', '05-09'),
+    'Summer': ('06-02', '08-08'),
+    'Fall': ('08-25', '12-12'),
+    'Winter': ('12-15', '01-09'),
+}
+
 # Channels Configuration
 CHANNEL_LAYERS = {
     'default': {
@@ -231,6 +268,12 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Minimum seconds between seat count pushes for one section on one connection
+SEAT_UPDATE_INTERVAL = config('SEAT_UPDATE_INTERVAL', default=1.0, cast=float)
+
+# Seconds a connection waits to gather a burst of notifications into one frame
+NOTIFICATION_PUSH_DELAY = config('NOTIFICATION_PUSH_DELAY', default=0.25, cast=float)
+
 # Celery Configuration
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
@@ -248,6 +291,90 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@example.edu')
 
+# Students handled per query/insert/email task when fanning out notifications
+NOTIFICATION_FANOUT_BATCH_SIZE = config('NOTIFICATION_FANOUT_BATCH_SIZE', default=500, cast=int)
+
+# Emails sent over one mail connection, and retries of failed messages
+# (the delay doubles from EMAIL_RETRY_BACKOFF seconds on each attempt)
+EMAIL_BATCH_SIZE = config('EMAIL_BATCH_SIZE', default=100, cast=int)
+EMAIL_MAX_RETRIES = config('EMAIL_MAX_RETRIES', default=3, cast=int)
+EMAIL_RETRY_BACKOFF = config('EMAIL_RETRY_BACKOFF', default=30, cast=int)
+
+# Seconds a notification stays open to later events on the same subject;
+# merged events share its email, which is held until the window closes
+NOTIFICATION_COALESCE_WINDOW = config('NOTIFICATION_COALESCE_WINDOW', default=300, cast=int)
+
+# Hour of the day (in TIME_ZONE) at which daily digests are emailed
+NOTIFICATION_DIGEST_HOUR = config('NOTIFICATION_DIGEST_HOUR', default=7, cast=int)
+
+# Read notifications older than this many days are purged nightly, in chunks
+NOTIFICATION_RETENTION_DAYS = config('NOTIFICATION_RETENTION_DAYS', default=90, cast=int)
+NOTIFICATION_PURGE_BATCH_SIZE = config('NOTIFICATION_PURGE_BATCH_SIZE', default=1000, cast=int)
+
+# Hours before a registration window closes that unregistered students are
+# reminded, unless the window sets its own reminder time
+REGISTRATION_REMINDER_LEAD_HOURS = config('REGISTRATION_REMINDER_LEAD_HOURS', default=48, cast=int)
+
+# Minutes before an advisor meeting that reminders are sent, and how often
+# (seconds) the reminder task runs and how finely it times them
+MEETING_REMINDER_OFFSETS = [
+    int(minutes) for minutes in config('MEETING_REMINDER_OFFSETS', default='1440,60').split(',') if minutes.strip()
+]
+MEETING_REMINDER_TICK = config('MEETING_REMINDER_TICK', default=60, cast=int)
+MEETING_REMINDER_RESOLUTION = config('MEETING_REMINDER_RESOLUTION', default=1, cast=int)
+
+# Chat messages are saved together every CHAT_FLUSH_INTERVAL seconds, or as
+# soon as CHAT_FLUSH_SIZE are waiting; a failing save is retried CHAT_FLUSH_RETRIES times
+CHAT_FLUSH_INTERVAL = config('CHAT_FLUSH_INTERVAL', default=0.05, cast=float)
+CHAT_FLUSH_SIZE = config('CHAT_FLUSH_SIZE', default=500, cast=int)
+CHAT_FLUSH_RETRIES = config('CHAT_FLUSH_RETRIES', default=3, cast=int)
+# A connection's read receipts are marked at most once every CHAT_READ_DELAY seconds
+CHAT_READ_DELAY = config('CHAT_READ_DELAY', default=0.5, cast=float)
+
+# Seconds the dashboard counters stay cached
+USER_COUNTERS_CACHE_TIMEOUT = config('USER_COUNTERS_CACHE_TIMEOUT', default=86400, cast=int)
+
+# Outbox events handled per transaction, and retries of failing events
+# (the delay doubles from OUTBOX_RETRY_BACKOFF seconds on each attempt).
+# Commits request a dispatch; the periodic one every OUTBOX_DISPATCH_INTERVAL
+# seconds catches events whose request was lost
+OUTBOX_BATCH_SIZE = config('OUTBOX_BATCH_SIZE', default=100, cast=int)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+OUTBOX_RETRY_BACKOFF = config('OUTBOX_RETRY_BACKOFF', default=30, cast=int)
+OUTBOX_DISPATCH_INTERVAL = config('OUTBOX_DISPATCH_INTERVAL', default=30, cast=int)
+OUTBOX_RETENTION_DAYS = config('OUTBOX_RETENTION_DAYS', default=7, cast=int)
+
+CELERY_BEAT_SCHEDULE = {
+    'send-daily-digests': {
+        'task': 'notifications.tasks.send_daily_digests',
+        'schedule': crontab(hour=NOTIFICATION_DIGEST_HOUR, minute=0),
+    },
+    'check-registration-deadlines': {
+        'task': 'notifications.tasks.check_registration_deadlines',
+        'schedule': crontab(minute='*/15'),
+    },
+    'check-meeting-reminders': {
+        'task': 'notifications.tasks.check_meeting_reminders',
+        'schedule': MEETING_REMINDER_TICK,
+    },
+    'reconcile-user-counters': {
+        'task': 'infrastructure.tasks.reconcile_user_counters',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'purge-read-notifications': {
+        'task': 'notifications.tasks.purge_read_notifications',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'dispatch-outbox': {
+        'task': 'infrastructure.tasks.dispatch_outbox',
+        'schedule': OUTBOX_DISPATCH_INTERVAL,
+    },
+    'purge-outbox': {
+        'task': 'infrastructure.tasks.purge_outbox',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
+
 # Security Settings
 SECURE_SSL_REDIRECT = config('SECURE_SSL_REDIRECT', default=False, cast=bool)
 SESSION_COOKIE_SECURE = config('SESSION_COOKIE_SECURE', default=False, cast=bool)
@@ -18,6 +18,8 @@ from registration.views import (
     EnrollmentViewSet, RegistrationRequestViewSet,
     RegistrationActionViewSet, RegistrationLogViewSet
 )
+from notifications.views import NotificationViewSet
+from advisor.views import ConversationViewSet, MeetingSlotViewSet, MeetingViewSet
 from authentication.views import home
 
 # Create API router
@@ -29,6 +31,10 @@ router.register(r'enrollments', EnrollmentViewSet, basename='enrollment')
 router.register(r'registration-requests', RegistrationRequestViewSet, basename='registration-request')
 router.register(r'registration-actions', RegistrationActionViewSet, basename='registration-action')
 router.register(r'registration-logs', RegistrationLogViewSet, basename='registration-log')
+router.register(r'notifications', NotificationViewSet, basename='notification')
+router.register(r'meeting-slots', MeetingSlotViewSet, basename='meeting-slot')
+router.register(r'meetings', MeetingViewSet, basename='meeting')
+router.register(r'conversations', ConversationViewSet, basename='conversation')
 
 urlpatterns = [
     # Home page